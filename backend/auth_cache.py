@@ -0,0 +1,58 @@
+"""Authentication Cache
+
+Memoizes decoded JWTs so repeated requests with the same bearer token
+skip signature verification. A decoded payload is kept until the
+token's own exp, after which the next request decodes it again and gets
+the usual ExpiredSignatureError. Tokens that fail to decode are never
+cached.
+
+The master behind a token is read through doc_cache, whose short TTL
+and invalidation on profile updates keep it fresh.
+"""
+
+import os
+import time
+from typing import Optional
+
+import jwt
+
+from doc_cache import TTLCache, doc_cache
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv('AUTH_TOKEN_CACHE_SIZE', '10000'))
+
+
+class TokenCache:
+    """Decoded JWT payloads keyed by token, each kept until its exp"""
+
+    def __init__(self, secret: str, algorithm: str, maxsize: int = AUTH_TOKEN_CACHE_SIZE):
+        self.secret = secret
+        self.algorithm = algorithm
+        self._tokens = TTLCache(maxsize, ttl_seconds=0)
+
+    def decode(self, token: str) -> dict:
+        """Payload of a valid token; raises jwt.InvalidTokenError otherwise"""
+        
+        payload = self._tokens.get(token)
+        if payload is not None:
+            return payload
+        
+        payload = jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        lifetime = payload['exp'] - time.time() if 'exp' in payload else 0
+        if lifetime > 0:
+            self._tokens.set(token, payload, lifetime)
+        return payload
+
+    def clear(self):
+        self._tokens.clear()
+
+    def stats(self) -> dict:
+        return self._tokens.stats()
+
+
+async def get_master_profile(db, master_id: str) -> Optional[dict]:
+    """The master's profile without its password hash, read through doc_cache"""
+    
+    master = await doc_cache.get_master(db, master_id)
+    if master is None:
+        return None
+    return {key: value for key, value in master.items() if key != 'password_hash'}
@@ -0,0 +1,172 @@
+"""Slot Availability Engine
+
+Keeps an in-process index of busy intervals (active bookings and calendar
+blocks) for each master as sorted, merged start/end arrays. Free start
+times for a service are found with a binary search to the first busy
+interval in range and a single forward walk, i.e. O(log n + k).
+
+The index for a master is rebuilt lazily on the next read after any
+booking or calendar block write invalidates it.
+"""
+
+import os
+import time
+import logging
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Granularity of offered start times (minutes past midnight UTC)
+SLOT_STEP_MINUTES = int(os.getenv('SLOT_STEP_MINUTES', '15'))
+
+# Rebuild even without writes so the horizon moves and writes made by other
+# server processes become visible
+INDEX_TTL_SECONDS = int(os.getenv('AVAILABILITY_INDEX_TTL_SECONDS', '300'))
+
+# Booking statuses that occupy the master's time
+BUSY_BOOKING_STATUSES = ['pending', 'confirmed']
+
+# Longest booking we expect to span into the horizon
+MAX_BOOKING_SPAN = timedelta(days=1)
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Normalize a datetime to the naive UTC form Mongo returns"""
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def align_up(value: datetime, step_minutes: int) -> datetime:
+    """Round value up to the next step boundary within its day"""
+
+    midnight = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    step = timedelta(minutes=step_minutes)
+    remainder = (value - midnight) % step
+    return value if not remainder else value + (step - remainder)
+
+
+class BusyIntervals:
+    """Sorted, non-overlapping busy intervals for one master"""
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime]], horizon: datetime):
+        self.horizon = horizon
+        self.starts: List[datetime] = []
+        self.ends: List[datetime] = []
+
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if self.ends and start <= self.ends[-1]:
+                # Merge touching/overlapping intervals
+                self.ends[-1] = max(self.ends[-1], end)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        """True if [start, end) does not overlap any busy interval"""
+
+        i = bisect_right(self.ends, start)
+        return i == len(self.starts) or self.starts[i] >= end
+
+    def free_slots(
+        self,
+        range_start: datetime,
+        range_end: datetime,
+        duration_minutes: int,
+        step_minutes: int = SLOT_STEP_MINUTES
+    ) -> List[datetime]:
+        """Start times in [range_start, range_end) where the service fits"""
+
+        duration = timedelta(minutes=duration_minutes)
+        step = timedelta(minutes=step_minutes)
+
+        cursor = align_up(max(range_start, self.horizon), step_minutes)
+        i = bisect_right(self.ends, cursor)
+        slots = []
+
+        while cursor + duration <= range_end:
+            if i < len(self.starts) and self.starts[i] < cursor + duration:
+                # Next busy interval clashes - skip past it
+                cursor = max(cursor, align_up(self.ends[i], step_minutes))
+                i += 1
+                continue
+            slots.append(cursor)
+            cursor += step
+
+        return slots
+
+
+class AvailabilityIndex:
+    """Process-wide cache of BusyIntervals keyed by master_id"""
+
+    def __init__(self, ttl_seconds: int = INDEX_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[str, Tuple[float, BusyIntervals]] = {}
+        self._versions: Dict[str, int] = {}
+
+    def invalidate(self, master_id: str):
+        """Drop the index for a master after a booking or block write"""
+
+        self._versions[master_id] = self._versions.get(master_id, 0) + 1
+        self._entries.pop(master_id, None)
+
+    def clear(self):
+        """Drop every master's index"""
+
+        self._entries.clear()
+
+    async def get(self, db, master_id: str) -> BusyIntervals:
+        """Return the busy intervals for a master, building them if needed"""
+
+        entry = self._entries.get(master_id)
+        if entry and time.monotonic() - entry[0] < self.ttl_seconds:
+            return entry[1]
+
+        version = self._versions.get(master_id, 0)
+        intervals = await self._load(db, master_id)
+
+        # Only cache if nothing was written while we were loading
+        if self._versions.get(master_id, 0) == version:
+            self._entries[master_id] = (time.monotonic(), intervals)
+        return intervals
+
+    async def _load(self, db, master_id: str) -> BusyIntervals:
+        horizon = datetime.utcnow().replace(second=0, microsecond=0)
+
+        bookings = await db.bookings.find(
+            {
+                "master_id": master_id,
+                "status": {"$in": BUSY_BOOKING_STATUSES},
+                "booking_date": {"$gte": horizon - MAX_BOOKING_SPAN}
+            },
+            {"_id": 0, "booking_date": 1, "duration_minutes": 1}
+        ).to_list(None)
+
+        blocks = await db.calendar_blocks.find(
+            {"master_id": master_id, "end_datetime": {"$gt": horizon}},
+            {"_id": 0, "start_datetime": 1, "end_datetime": 1}
+        ).to_list(None)
+
+        intervals = [
+            (b['booking_date'], b['booking_date'] + timedelta(minutes=b.get('duration_minutes') or 0))
+            for b in bookings
+        ]
+        intervals += [
+            (to_naive_utc(b['start_datetime']), to_naive_utc(b['end_datetime']))
+            for b in blocks
+        ]
+
+        logger.debug(f"Availability index built for {master_id}: {len(intervals)} busy intervals")
+        return BusyIntervals(intervals, horizon)
+
+
+# Global instance
+availability_index = AvailabilityIndex()
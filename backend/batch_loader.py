@@ -0,0 +1,124 @@
+"""Batch Loader
+
+DataLoader-style coalescing for lookups by a single field (id, booking
+slug). Loads requested during the same event loop tick are queued and
+fetched together with one $in query when the loop gets to the dispatch
+callback. A key that is already queued or being fetched is not fetched
+again: later callers wait on the same result (single-flight).
+
+Every caller gets its own copy of the document, since handlers mutate
+what they load. Writers call forget() so that loads after a write do not
+join a fetch that started before it.
+"""
+
+import os
+import copy
+import asyncio
+import logging
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+BATCH_LOADER_MAX_KEYS = int(os.getenv('BATCH_LOADER_MAX_KEYS', '100'))
+
+
+class BatchLoader:
+    """Coalesces find-by-field lookups on one collection into batched $in queries"""
+
+    def __init__(self, collection: str, field: str = "id", max_keys: int = BATCH_LOADER_MAX_KEYS):
+        self.collection = collection
+        self.field = field
+        self.max_keys = max_keys
+        # Keys waiting for the next dispatch, grouped by database (tests swap server.db)
+        self._queued: Dict[int, Tuple[Any, Dict[Any, asyncio.Future]]] = {}
+        self._in_flight: Dict[Tuple[int, Any], asyncio.Future] = {}
+        self._scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self.loads = 0
+        self.coalesced = 0
+        self.queries = 0
+
+    async def load(self, db, value: Any) -> Optional[dict]:
+        """The document whose field equals value, or None"""
+        
+        self.loads += 1
+        future = self._pending(db, value)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._queued.setdefault(id(db), (db, {}))[1][value] = future
+            if not self._scheduled:
+                self._scheduled = True
+                loop.call_soon(self._dispatch)
+        else:
+            self.coalesced += 1
+        
+        # shield: a cancelled caller must not cancel the fetch for the others
+        doc = await asyncio.shield(future)
+        return copy.deepcopy(doc)
+
+    def _pending(self, db, value: Any) -> Optional[asyncio.Future]:
+        queued = self._queued.get(id(db))
+        if queued is not None and value in queued[1]:
+            return queued[1][value]
+        return self._in_flight.get((id(db), value))
+
+    def _dispatch(self):
+        self._scheduled = False
+        queued, self._queued = self._queued, {}
+        for db, futures in queued.values():
+            items = list(futures.items())
+            for start in range(0, len(items), self.max_keys):
+                batch = dict(items[start:start + self.max_keys])
+                for value, future in batch.items():
+                    self._in_flight[(id(db), value)] = future
+                task = asyncio.ensure_future(self._fetch(db, batch))
+                # The loop only keeps weak references to tasks
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, db, batch: Dict[Any, asyncio.Future]):
+        self.queries += 1
+        try:
+            docs = await db[self.collection].find(
+                {self.field: {"$in": list(batch)}},
+                {"_id": 0}
+            ).to_list(None)
+        except Exception as e:
+            logger.warning(f"⚠️ Batch load of {len(batch)} {self.collection} failed: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    # Retrieved here so callers that went away don't leave it unobserved
+                    future.exception()
+        else:
+            by_value = {doc.get(self.field): doc for doc in docs}
+            for value, future in batch.items():
+                if not future.done():
+                    future.set_result(by_value.get(value))
+        finally:
+            for value, future in batch.items():
+                if self._in_flight.get((id(db), value)) is future:
+                    del self._in_flight[(id(db), value)]
+
+    def forget(self, value: Any):
+        """Stop sharing any fetch of value that started before a write"""
+        
+        for key in [key for key in self._in_flight if key[1] == value]:
+            del self._in_flight[key]
+
+    def forget_all(self):
+        """forget() for every value, when a write's old value is unknown"""
+        
+        self._in_flight.clear()
+
+    def stats(self) -> dict:
+        return {
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "queries": self.queries,
+            "loads_per_query": round(self.loads / self.queries, 2) if self.queries else 0.0
+        }
+
+    def reset_stats(self):
+        self.loads = self.coalesced = self.queries = 0
@@ -0,0 +1,105 @@
+"""Benchmark: authenticated request throughput with and without the auth cache
+
+Sends concurrent GET /api/auth/me requests in-process, first through the
+previous get_current_master (jwt.decode plus a masters find_one on every
+request) and then through the cached one (memoized token, master read
+through doc_cache). Reports requests per second and Mongo reads.
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_auth [requests] [concurrency]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'slotta_bench')
+
+import httpx
+import jwt
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+
+class ReadCounter(monitoring.CommandListener):
+
+    def __init__(self):
+        self.reads = 0
+
+    def started(self, event):
+        if event.command_name in ('find', 'aggregate', 'getMore'):
+            self.reads += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def main(total: int, concurrency: int):
+    import server
+    from doc_cache import doc_cache
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    async def uncached_master(credentials: HTTPAuthorizationCredentials = Depends(server.security)):
+        """The previous get_current_master"""
+        
+        payload = jwt.decode(credentials.credentials, server.JWT_SECRET, algorithms=[server.JWT_ALGORITHM])
+        master = await server.db.masters.find_one({"id": payload['sub']}, {"_id": 0, "password_hash": 0})
+        if not master:
+            raise HTTPException(status_code=401, detail="Master not found")
+        return master
+
+    counter = ReadCounter()
+    mongo = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    server.db = mongo[db_name]
+    
+    try:
+        await server.db.masters.insert_one({
+            "id": "master-1", "email": "m@slotta.app", "name": "Master", "booking_slug": "master-1",
+            "password_hash": "x", "settings": {"daily_summary_enabled": True}
+        })
+        headers = {"Authorization": f"Bearer {server.create_token('master-1', 'm@slotta.app')}"}
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            async def one():
+                async with semaphore:
+                    response = await http.get("/api/auth/me", headers=headers)
+                    response.raise_for_status()
+            
+            print(f"\n{total} requests, concurrency {concurrency}")
+            print(f"{'auth':>10}{'req/s':>10}{'reads':>8}")
+            for name, override in (("uncached", uncached_master), ("cached", None)):
+                server.app.dependency_overrides.clear()
+                if override:
+                    server.app.dependency_overrides[server.get_current_master] = override
+                server.token_cache.clear()
+                doc_cache.clear()
+                counter.reads = 0
+                started = time.perf_counter()
+                await asyncio.gather(*[one() for _ in range(total)])
+                elapsed = time.perf_counter() - started
+                print(f"{name:>10}{total / elapsed:>10.0f}{counter.reads:>8}")
+    finally:
+        server.app.dependency_overrides.clear()
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    asyncio.run(main(total, concurrency))
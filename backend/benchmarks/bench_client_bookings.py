@@ -0,0 +1,141 @@
+"""Benchmark: client booking history, per-booking lookups vs batched joins
+
+Seeds a client with 10, 100 and 1000 bookings in a scratch database and
+times GET /api/bookings/client/email/{email} (one page holding the whole
+history) against the previous implementation, which ran a services and
+a masters find_one for every booking. Reports median latency and the
+number of Mongo reads per request.
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_client_bookings [repeats]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+import statistics
+from datetime import datetime, timedelta
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'slotta_bench')
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from db_indexes import ensure_indexes
+
+SIZES = (10, 100, 1000)
+
+
+class ReadCounter(monitoring.CommandListener):
+
+    def __init__(self):
+        self.reads = 0
+
+    def started(self, event):
+        if event.command_name in ('find', 'aggregate', 'getMore'):
+            self.reads += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def per_booking_lookups(db, email):
+    """The previous implementation of get_client_bookings_by_email"""
+    
+    client = await db.clients.find_one({"email": email}, {"_id": 0})
+    bookings = await db.bookings.find({"client_id": client['id']}, {"_id": 0}).sort("booking_date", -1).to_list(1000)
+    enriched = []
+    for booking in bookings:
+        service = await db.services.find_one({"id": booking['service_id']}, {"_id": 0, "name": 1, "price": 1})
+        master = await db.masters.find_one({"id": booking['master_id']}, {"_id": 0, "name": 1, "location": 1})
+        enriched.append({
+            **booking,
+            "service_name": service['name'] if service else "Unknown",
+            "service_price": service['price'] if service else 0,
+            "master_name": master['name'] if master else "Unknown",
+            "master_location": master.get('location') if master else None
+        })
+    return enriched
+
+
+async def seed(db, size):
+    email = f"client-{size}@slotta.app"
+    start = datetime(2026, 1, 1, 9, 0)
+    await db.clients.insert_one({"id": f"client-{size}", "email": email, "name": "Client"})
+    await db.bookings.insert_many([
+        {
+            "id": str(uuid.uuid4()),
+            "master_id": f"master-{i % 10}",
+            "client_id": f"client-{size}",
+            "service_id": f"service-{i % 30}",
+            "status": "completed",
+            "booking_date": start + timedelta(hours=i),
+            "duration_minutes": 60,
+            "slotta_amount": 20.0
+        }
+        for i in range(size)
+    ])
+    return email
+
+
+async def main(repeats: int):
+    import server
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    
+    counter = ReadCounter()
+    mongo = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    db = mongo[db_name]
+    server.db = db
+    
+    try:
+        await ensure_indexes(db)
+        await db.masters.insert_many([
+            {"id": f"master-{i}", "email": f"m{i}@slotta.app", "booking_slug": f"master-{i}", "name": f"Master {i}", "location": "Lisbon"}
+            for i in range(10)
+        ])
+        await db.services.insert_many([
+            {"id": f"service-{i}", "master_id": f"master-{i % 10}", "name": f"Service {i}", "price": 60.0}
+            for i in range(30)
+        ])
+        
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            async def batched(email):
+                response = await http.get(f"/api/bookings/client/email/{email}", params={"limit": 1000})
+                response.raise_for_status()
+
+            async def legacy(email):
+                await per_booking_lookups(db, email)
+            
+            print(f"\nMedian of {repeats} requests per size")
+            print(f"{'bookings':>10}{'implementation':>22}{'latency':>12}{'reads':>8}")
+            for size in SIZES:
+                email = await seed(db, size)
+                for name, fetch in (("per-booking lookups", legacy), ("batched $in joins", batched)):
+                    latencies = []
+                    for _ in range(repeats):
+                        counter.reads = 0
+                        started = time.perf_counter()
+                        await fetch(email)
+                        latencies.append(time.perf_counter() - started)
+                    print(f"{size:>10}{name:>22}{statistics.median(latencies) * 1000:>10.1f}ms{counter.reads:>8}")
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(main(repeats))
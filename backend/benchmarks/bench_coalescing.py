@@ -0,0 +1,108 @@
+"""Benchmark: Mongo reads per request as concurrency rises, with batch loaders
+
+Sends a spike of GET /api/masters/{booking_slug} and GET
+/api/services/{service_id} requests in-process over a few hot masters
+and services, at increasing concurrency. The process-level doc_cache is
+disabled so every request misses it; only the batch loaders (one $in
+query per tick, single-flight per key) reduce the reads. Reports
+requests per second and Mongo reads per request.
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_coalescing [requests] [hot documents]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'slotta_bench')
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from db_indexes import ensure_indexes
+
+CONCURRENCY = (1, 10, 50, 200)
+
+
+class ReadCounter(monitoring.CommandListener):
+
+    def __init__(self):
+        self.reads = 0
+
+    def started(self, event):
+        if event.command_name in ('find', 'aggregate', 'getMore'):
+            self.reads += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def main(total: int, hot: int):
+    import server
+    from doc_cache import doc_cache
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    
+    counter = ReadCounter()
+    mongo = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    server.db = mongo[db_name]
+    
+    # Cross-request caching off: measure coalescing alone
+    for cache in (doc_cache.masters, doc_cache.master_slugs, doc_cache.services):
+        cache.maxsize = 0
+    
+    try:
+        await ensure_indexes(server.db)
+        await server.db.masters.insert_many([
+            {"id": f"master-{i}", "email": f"m{i}@slotta.app", "name": f"Master {i}", "booking_slug": f"master-{i}"}
+            for i in range(hot)
+        ])
+        await server.db.services.insert_many([
+            {"id": f"service-{i}", "master_id": f"master-{i}", "name": "Cut", "duration_minutes": 60,
+             "price": 80.0, "base_slotta": 20.0, "active": True}
+            for i in range(hot)
+        ])
+        paths = [
+            f"/api/masters/master-{n % hot}" if n % 2 == 0 else f"/api/services/service-{n % hot}"
+            for n in range(total)
+        ]
+        
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"\n{total} requests over {hot} masters and {hot} services")
+            print(f"{'concurrency':>12}{'req/s':>10}{'reads':>8}{'reads/req':>11}")
+            for concurrency in CONCURRENCY:
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def one(path):
+                    async with semaphore:
+                        response = await http.get(path)
+                        response.raise_for_status()
+                
+                doc_cache.clear()
+                counter.reads = 0
+                started = time.perf_counter()
+                await asyncio.gather(*[one(path) for path in paths])
+                elapsed = time.perf_counter() - started
+                print(f"{concurrency:>12}{total / elapsed:>10.0f}{counter.reads:>8}{counter.reads / total:>11.2f}")
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    hot = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    asyncio.run(main(total, hot))
@@ -0,0 +1,104 @@
+"""Benchmark: concurrent requests sending email
+
+Simulates N concurrent booking requests that each send one email through
+a local fake SendGrid endpoint with a fixed response delay, and compares:
+
+- blocking: the old path, SendGridAPIClient.send() called inside the
+  coroutine (blocks the event loop for every email)
+- async: EmailService posting over the pooled 'sendgrid' HTTP client
+
+For each mode it reports wall time and the longest event-loop stall seen
+by a heartbeat task. With the blocking client the wall time grows with N
+and the loop stalls for the whole send; with the async client requests
+overlap and the loop stays responsive.
+
+Usage (from backend/):
+    python -m benchmarks.bench_email_concurrency [concurrency] [delay_seconds]
+"""
+
+import sys
+import time
+import asyncio
+
+from benchmarks.stub_server import StubServer
+
+
+async def _heartbeat(stalls: list, stop: asyncio.Event, interval: float = 0.005):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        stalls.append(now - last - interval)
+        last = now
+
+
+async def _measure(send_one, concurrency: int):
+    stalls = []
+    stop = asyncio.Event()
+    beat = asyncio.create_task(_heartbeat(stalls, stop))
+    await asyncio.sleep(0.01)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[send_one(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await beat
+    return elapsed, max(stalls, default=0.0)
+
+
+async def main(concurrency: int, delay: float):
+    from services.email_service import EmailService
+    from services.http_clients import http_clients
+
+    with StubServer(delay=delay, status=202) as stub:
+        rows = []
+
+        try:
+            from sendgrid import SendGridAPIClient
+            from sendgrid.helpers.mail import Mail
+
+            sg = SendGridAPIClient('SG.benchmark', host=stub.url)
+
+            async def send_blocking(i):
+                sg.send(Mail(
+                    from_email='noreply@slotta.com',
+                    to_emails=f'client{i}@example.com',
+                    subject='Booking Confirmed',
+                    html_content='<p>Hi</p>'
+                ))
+
+            rows.append(("blocking SendGridAPIClient", *await _measure(send_blocking, concurrency)))
+        except ImportError:
+            print("sendgrid package not installed - skipping blocking baseline")
+
+        service = EmailService()
+        service.api_key = 'SG.benchmark'
+        service.enabled = True
+        service.api_url = f"{stub.url}/v3/mail/send"
+        http_clients.get('sendgrid')  # pool setup (TLS context) happens at app startup
+
+        async def send_async(i):
+            assert await service.send_booking_confirmation(
+                to_email=f'client{i}@example.com',
+                client_name='Client',
+                master_name='Master',
+                service_name='Cut',
+                booking_date='Monday, January 01, 2030',
+                booking_time='10:00 AM',
+                slotta_amount=20.0
+            )
+
+        rows.append(("async EmailService", *await _measure(send_async, concurrency)))
+        await http_clients.aclose()
+
+    print(f"\n{concurrency} concurrent sends, fake SendGrid delay {delay * 1000:.0f}ms")
+    print(f"{'mode':<30}{'wall time':>12}{'max loop stall':>18}")
+    for name, elapsed, stall in rows:
+        print(f"{name:<30}{elapsed * 1000:>10.0f}ms{stall * 1000:>16.0f}ms")
+
+
+if __name__ == '__main__':
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.1
+    asyncio.run(main(concurrency, delay))
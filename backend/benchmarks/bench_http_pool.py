@@ -0,0 +1,69 @@
+"""Benchmark: pooled vs per-call HTTP clients
+
+Sends N requests to a local HTTP stub, first the old way (a new
+httpx.AsyncClient per call, as TelegramService and GoogleCalendarService
+used to do) and then through the shared http_clients registry. Reports
+wall time, mean latency and how many TCP connections the stub accepted,
+i.e. how many handshakes were paid. The stub is plain HTTP, so the real
+savings against TLS endpoints are larger than shown here.
+
+Usage (from backend/):
+    python -m benchmarks.bench_http_pool [requests] [concurrency]
+"""
+
+import sys
+import time
+import asyncio
+
+import httpx
+
+from benchmarks.stub_server import StubServer
+
+
+async def _run(send_one, total: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(i):
+        async with semaphore:
+            await send_one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[limited(i) for i in range(total)])
+    return time.perf_counter() - started
+
+
+async def main(total: int, concurrency: int):
+    from services.http_clients import http_clients
+
+    with StubServer() as stub:
+        url = f"{stub.url}/bot123/sendMessage"
+
+        async def per_call_client(i):
+            async with httpx.AsyncClient() as client:
+                response = await client.post(url, json={"chat_id": i, "text": "hi"})
+                response.raise_for_status()
+
+        async def pooled_client(i):
+            response = await http_clients.get('telegram').post(url, json={"chat_id": i, "text": "hi"})
+            response.raise_for_status()
+
+        rows = []
+        for name, send_one in (("new client per call", per_call_client), ("shared pool", pooled_client)):
+            stub.reset_counters()
+            elapsed = await _run(send_one, total, concurrency)
+            rows.append((name, elapsed, stub.connections))
+
+        stats = http_clients.stats()['telegram']
+        await http_clients.aclose()
+
+    print(f"\n{total} requests, concurrency {concurrency}")
+    print(f"{'mode':<24}{'wall time':>12}{'per request':>14}{'connections':>14}")
+    for name, elapsed, connections in rows:
+        print(f"{name:<24}{elapsed * 1000:>10.0f}ms{elapsed / total * 1000:>12.2f}ms{connections:>14}")
+    print(f"\nPool stats: {stats}")
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    asyncio.run(main(total, concurrency))
@@ -0,0 +1,101 @@
+"""Benchmark: master analytics, Python-side sums vs $facet aggregation
+
+Seeds a master with a growing number of bookings in a scratch database
+and compares the previous get_master_analytics, which loaded up to 10,000
+bookings and transactions into Python, with master_analytics, which
+aggregates in MongoDB. Reports median latency and the booking count each
+implementation returns (the old one stops at 10,000).
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_master_analytics [repeats]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db_indexes import ensure_indexes
+from master_analytics import master_analytics
+
+SIZES = (1000, 10000, 100000)
+STATUSES = ["confirmed", "completed", "completed", "no-show", "cancelled"]
+INSERT_BATCH = 10000
+
+
+async def python_side(db, master_id):
+    """The previous implementation of get_master_analytics"""
+    
+    bookings = await db.bookings.find({"master_id": master_id}, {"_id": 0}).to_list(10000)
+    total_bookings = len(bookings)
+    no_shows = len([b for b in bookings if b['status'] == 'no-show'])
+    total_slotta_protected = sum(b.get('slotta_amount', 0) for b in bookings)
+    transactions = await db.transactions.find({"master_id": master_id}, {"_id": 0}).to_list(10000)
+    wallet_balance = sum(t['amount'] for t in transactions if t['type'] == 'wallet_credit')
+    return {
+        "total_bookings": total_bookings,
+        "no_shows": no_shows,
+        "time_protected_eur": total_slotta_protected,
+        "wallet_balance": wallet_balance
+    }
+
+
+async def seed(db, master_id, size):
+    start = datetime(2024, 1, 1, 9, 0)
+    for offset in range(0, size, INSERT_BATCH):
+        await db.bookings.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "master_id": master_id,
+                "client_id": f"client-{i % 500}",
+                "service_id": f"service-{i % 8}",
+                "status": STATUSES[i % len(STATUSES)],
+                "booking_date": start + timedelta(minutes=30 * i),
+                "duration_minutes": 30,
+                "slotta_amount": 15.0,
+                "notes": "x" * 200
+            }
+            for i in range(offset, min(offset + INSERT_BATCH, size))
+        ])
+    await db.transactions.insert_many([
+        {"id": str(uuid.uuid4()), "master_id": master_id, "type": "wallet_credit", "amount": 5.0,
+         "created_at": start + timedelta(hours=i)}
+        for i in range(min(size // 10, 20000))
+    ])
+
+
+async def main(repeats: int):
+    mongo = AsyncIOMotorClient(os.getenv('MONGO_URL', 'mongodb://localhost:27017'))
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    db = mongo[db_name]
+    
+    try:
+        await ensure_indexes(db)
+        print(f"\nMedian of {repeats} runs per size")
+        print(f"{'bookings':>10}{'implementation':>18}{'latency':>12}{'counted':>10}")
+        for size in SIZES:
+            master_id = f"master-{size}"
+            await seed(db, master_id, size)
+            for name, compute in (("python sums", python_side), ("$facet", master_analytics)):
+                latencies = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    result = await compute(db, master_id)
+                    latencies.append(time.perf_counter() - started)
+                print(f"{size:>10}{name:>18}{statistics.median(latencies) * 1000:>10.1f}ms{result['total_bookings']:>10}")
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(main(repeats))
@@ -0,0 +1,133 @@
+"""Benchmark: PUT /api/bookings/{id}/no-show throughput and Mongo commands per no-show
+
+Marks a batch of confirmed bookings (each with a Stripe payment intent)
+as no-shows in-process, at increasing concurrency. Stripe, email and
+Telegram are replaced by stubs that take SIDE_EFFECT_MS each; they only
+run from the notification outbox after the commit, so the handler's
+latency should not include them. The outbox workers are not started.
+Reports no-shows per second, p50/p95 latency and Mongo commands per
+no-show.
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+on a replica set the writes run in one transaction. The scratch database
+is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_no_show [no-shows per level] [side effect ms]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'slotta_bench')
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from db_indexes import ensure_indexes
+
+CONCURRENCY = (1, 10, 50)
+
+
+class CommandCounter(monitoring.CommandListener):
+
+    def __init__(self):
+        self.commands = 0
+
+    def started(self, event):
+        self.commands += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def main(total: int, side_effect_ms: float):
+    import server
+    from notification_outbox import notification_outbox
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    logging.getLogger('server').setLevel(logging.WARNING)
+
+    def stub(kind):
+        async def run(**payload):
+            await asyncio.sleep(side_effect_ms / 1000)
+            return True
+        return run
+    
+    for kind in list(notification_outbox.handlers):
+        notification_outbox.register(kind, stub(kind))
+    
+    counter = CommandCounter()
+    mongo = AsyncIOMotorClient(os.environ['MONGO_URL'], event_listeners=[counter])
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    server.db = mongo[db_name]
+    
+    try:
+        await ensure_indexes(server.db)
+        await server.db.masters.insert_one({
+            "id": "master-0", "email": "m@slotta.app", "name": "Master", "booking_slug": "master-0",
+            "telegram_chat_id": "42"
+        })
+        bookings = total * len(CONCURRENCY)
+        await server.db.clients.insert_many([
+            {"id": f"client-{i}", "email": f"c{i}@slotta.app", "name": f"Client {i}", "total_bookings": 1}
+            for i in range(bookings)
+        ])
+        start = datetime(2026, 1, 1, 9)
+        await server.db.bookings.insert_many([
+            {"id": f"booking-{i}", "master_id": "master-0", "client_id": f"client-{i}", "service_id": "service-0",
+             "booking_date": start + timedelta(hours=i), "status": "confirmed", "slotta_amount": 20.0,
+             "stripe_payment_intent_id": f"pi_{i}"}
+            for i in range(bookings)
+        ])
+        
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as http:
+            print(f"\n{total} no-shows per level, side effects {side_effect_ms:.0f}ms each (post-commit)")
+            print(f"{'concurrency':>12}{'no-shows/s':>12}{'p50 ms':>9}{'p95 ms':>9}{'cmds/no-show':>14}")
+            for level, concurrency in enumerate(CONCURRENCY):
+                semaphore = asyncio.Semaphore(concurrency)
+                latencies = []
+
+                async def one(i):
+                    async with semaphore:
+                        started = time.perf_counter()
+                        response = await http.put(f"/api/bookings/booking-{i}/no-show")
+                        response.raise_for_status()
+                        latencies.append(time.perf_counter() - started)
+                
+                counter.commands = 0
+                started = time.perf_counter()
+                await asyncio.gather(*[one(level * total + i) for i in range(total)])
+                elapsed = time.perf_counter() - started
+                print(
+                    f"{concurrency:>12}{total / elapsed:>12.0f}"
+                    f"{_percentile(latencies, 0.5) * 1000:>9.1f}{_percentile(latencies, 0.95) * 1000:>9.1f}"
+                    f"{counter.commands / total:>14.1f}"
+                )
+        
+        queued = await server.db.notifications.count_documents({"status": "pending"})
+        print(f"Outbox jobs queued: {queued} ({queued / bookings:.0f} per no-show)")
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    side_effect_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 300
+    asyncio.run(main(total, side_effect_ms))
@@ -0,0 +1,96 @@
+"""Benchmark: deep pages, skip/offset vs keyset cursors
+
+Seeds a master with 200,000 transactions in a scratch database and times
+fetching one 50-row page at increasing depths, once with the previous
+skip(offset) query and once with pagination.fetch_page resuming from the
+cursor of the preceding row. Reports median latency per page; the keyset
+column should stay flat while skip grows with the offset.
+
+Needs a MongoDB server at MONGO_URL (default mongodb://localhost:27017);
+the scratch database is dropped afterwards.
+
+Usage (from backend/):
+    python -m benchmarks.bench_pagination [repeats]
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import statistics
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from db_indexes import ensure_indexes
+from pagination import encode_cursor, fetch_page
+
+ROWS = 200000
+PAGE_SIZE = 50
+DEPTHS = (0, 1000, 10000, 50000, 100000, 190000)
+INSERT_BATCH = 10000
+MASTER_ID = "master-1"
+
+
+async def skip_page(db, offset, cursor):
+    """The previous get_master_transactions query"""
+    return await db.transactions.find(
+        {"master_id": MASTER_ID},
+        {"_id": 0}
+    ).sort("created_at", -1).skip(offset).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+
+async def keyset_page(db, offset, cursor):
+    docs, _ = await fetch_page(db.transactions, {"master_id": MASTER_ID}, "created_at", -1, PAGE_SIZE, cursor)
+    return docs
+
+
+async def seed(db):
+    start = datetime(2024, 1, 1)
+    for offset in range(0, ROWS, INSERT_BATCH):
+        await db.transactions.insert_many([
+            {"id": f"tx-{i:07d}", "master_id": MASTER_ID, "type": "wallet_credit", "amount": 5.0,
+             "description": "Credit", "created_at": start + timedelta(minutes=i)}
+            for i in range(offset, min(offset + INSERT_BATCH, ROWS))
+        ])
+
+
+async def main(repeats: int):
+    mongo = AsyncIOMotorClient(os.getenv('MONGO_URL', 'mongodb://localhost:27017'))
+    db_name = f"slotta_bench_{uuid.uuid4().hex[:8]}"
+    db = mongo[db_name]
+    
+    try:
+        await ensure_indexes(db)
+        await seed(db)
+        
+        print(f"\n{ROWS} transactions, {PAGE_SIZE} per page, median of {repeats} runs")
+        print(f"{'offset':>10}{'skip':>12}{'keyset':>12}")
+        for depth in DEPTHS:
+            # Cursor of the row just before the page, as a client holding it would send
+            cursor = None
+            if depth:
+                previous = await db.transactions.find(
+                    {"master_id": MASTER_ID}, {"_id": 0}
+                ).sort([("created_at", -1), ("id", -1)]).skip(depth - 1).limit(1).to_list(1)
+                cursor = encode_cursor(previous[0], "created_at")
+            
+            medians = []
+            for fetch in (skip_page, keyset_page):
+                latencies = []
+                for _ in range(repeats):
+                    started = time.perf_counter()
+                    page = await fetch(db, depth, cursor)
+                    latencies.append(time.perf_counter() - started)
+                assert len(page) == PAGE_SIZE
+                medians.append(statistics.median(latencies) * 1000)
+            print(f"{depth:>10}{medians[0]:>10.1f}ms{medians[1]:>10.1f}ms")
+    finally:
+        await mongo.drop_database(db_name)
+        mongo.close()
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(main(repeats))
@@ -0,0 +1,72 @@
+"""Benchmark: list response serialization, response_model vs trusted orjson
+
+Serializes pages of booking documents the way FastAPI does for a route
+with response_model=List[Booking] (validate, dump to JSON-able Python,
+json.dumps in JSONResponse) and with fast_json.trusted_response (filter
+to model fields, fill defaults, orjson). Reports rows serialized per
+second for each page size. Pure CPU, no database needed.
+
+Usage (from backend/):
+    python -m benchmarks.bench_serialization [repeats]
+"""
+
+import sys
+import time
+import uuid
+import statistics
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from fast_json import trusted_response
+from models import Booking
+
+SIZES = (10, 100, 1000)
+
+
+def make_bookings(count):
+    start = datetime(2026, 1, 1, 9, 0)
+    return [
+        {
+            "id": str(uuid.uuid4()), "master_id": "master-1", "client_id": f"client-{i % 50}",
+            "service_id": f"service-{i % 8}", "booking_date": start + timedelta(hours=i),
+            "duration_minutes": 60, "service_price": 80.0, "slotta_amount": 15.0, "status": "confirmed",
+            "risk_score": 30, "reschedule_deadline": start + timedelta(hours=i - 24),
+            "stripe_payment_intent_id": f"pi_{i}", "payment_authorized": True,
+            "notes": "Please use the side entrance", "created_at": start, "updated_at": start
+        }
+        for i in range(count)
+    ]
+
+
+def response_model_path(adapter, docs):
+    """What FastAPI does for a response_model route"""
+    content = adapter.dump_python(adapter.validate_python(docs), mode="json")
+    return JSONResponse(content).body
+
+
+def trusted_path(adapter, docs):
+    return trusted_response(docs, Booking).body
+
+
+def main(repeats: int):
+    adapter = TypeAdapter(List[Booking])
+    print(f"\nMedian of {repeats} runs per page size")
+    print(f"{'rows':>8}{'implementation':>18}{'latency':>12}{'rows/s':>12}")
+    for size in SIZES:
+        docs = make_bookings(size)
+        for name, serialize in (("response_model", response_model_path), ("trusted orjson", trusted_path)):
+            latencies = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                serialize(adapter, docs)
+                latencies.append(time.perf_counter() - started)
+            median = statistics.median(latencies)
+            print(f"{size:>8}{name:>18}{median * 1000:>10.2f}ms{size / median:>12.0f}")
+
+
+if __name__ == '__main__':
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    main(repeats)
@@ -0,0 +1,81 @@
+"""Benchmark: two-call vs single-call payment authorization latency
+
+Compares the booking flow's Stripe critical path:
+- two calls: create_payment_intent followed by a PaymentIntent.confirm
+  (the flow authorize_payment replaced)
+- one call: authorize_payment (create with confirm=True)
+
+Each booking is authorized sequentially and the per-booking latency
+percentiles and upstream request counts are reported. Against a stub with
+a fixed delay the single-call path should take about half as long.
+
+Runs against stripe-mock if STRIPE_API_BASE is set, otherwise against a
+local stub (see bench_stripe_concurrency).
+
+Usage (from backend/):
+    python -m benchmarks.bench_stripe_authorize [bookings] [stub_delay_seconds]
+"""
+
+import os
+import sys
+import time
+import asyncio
+import statistics
+from contextlib import nullcontext
+
+import stripe
+
+from benchmarks.stub_server import StubServer
+from benchmarks.bench_stripe_concurrency import PAYMENT_INTENT, make_service
+
+
+async def two_calls(service, i):
+    intent = await service.create_payment_intent(
+        amount=25.0,
+        customer_email=f'client{i}@example.com',
+        metadata={'booking_type': 'slotta_hold'}
+    )
+    await service._call(stripe.PaymentIntent.confirm, intent['id'], payment_method='pm_card_visa')
+
+
+async def one_call(service, i):
+    await service.authorize_payment(
+        amount=25.0,
+        customer_email=f'client{i}@example.com',
+        payment_method_id='pm_card_visa',
+        metadata={'booking_type': 'slotta_hold'},
+        idempotency_key=f'slotta-hold-bench-{i}-{time.time_ns()}'
+    )
+
+
+async def main(bookings: int, delay: float):
+    api_base = os.getenv('STRIPE_API_BASE')
+    stub = None if api_base else StubServer(delay=delay, body=PAYMENT_INTENT)
+
+    with stub or nullcontext():
+        service = make_service(api_base or stub.url, 4)
+        print(f"\n{bookings} sequential authorizations against {'stripe-mock' if api_base else f'stub ({delay * 1000:.0f}ms)'}")
+        print(f"{'path':<28}{'p50':>10}{'p95':>10}{'requests/booking':>20}")
+
+        for name, authorize in (("create + confirm", two_calls), ("create(confirm=True)", one_call)):
+            if stub:
+                stub.reset_counters()
+            latencies = []
+            for i in range(bookings):
+                started = time.perf_counter()
+                await authorize(service, i)
+                latencies.append(time.perf_counter() - started)
+
+            latencies.sort()
+            p50 = statistics.median(latencies)
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            per_booking = f"{stub.requests / bookings:.1f}" if stub else "n/a"
+            print(f"{name:<28}{p50 * 1000:>8.1f}ms{p95 * 1000:>8.1f}ms{per_booking:>20}")
+
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    bookings = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    asyncio.run(main(bookings, delay))
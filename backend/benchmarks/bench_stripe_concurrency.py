@@ -0,0 +1,83 @@
+"""Benchmark: Stripe call throughput vs thread pool size
+
+Fires a fixed number of concurrent create_payment_intent calls through
+StripeService at several STRIPE_MAX_CONCURRENCY settings and reports
+calls per second. Because SDK calls run on the service's thread pool,
+throughput should scale roughly linearly with the pool size until the
+upstream saturates; the old inline SDK calls were stuck at pool size 1
+and also froze the event loop.
+
+Runs against stripe-mock if STRIPE_API_BASE points at it, e.g.
+    docker run -p 12111:12111 stripe/stripe-mock
+    STRIPE_API_BASE=http://localhost:12111 python -m benchmarks.bench_stripe_concurrency
+otherwise against a local stub with a fixed per-call delay.
+
+Usage (from backend/):
+    python -m benchmarks.bench_stripe_concurrency [calls] [stub_delay_seconds]
+"""
+
+import os
+import sys
+import time
+import asyncio
+from contextlib import nullcontext
+
+from benchmarks.stub_server import StubServer
+
+POOL_SIZES = [1, 2, 4, 8, 16]
+
+PAYMENT_INTENT = {
+    "id": "pi_bench",
+    "object": "payment_intent",
+    "client_secret": "pi_bench_secret",
+    "status": "requires_capture"
+}
+
+
+def make_service(api_base: str, max_concurrency: int):
+    import stripe
+    from services.stripe_service import StripeService
+
+    service = StripeService()
+    service.enabled = True
+    service.max_concurrency = max_concurrency
+    stripe.api_key = 'sk_test_123'
+    stripe.api_base = api_base
+    stripe.max_network_retries = 0
+    return service
+
+
+async def run(service, calls: int) -> float:
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        service.create_payment_intent(
+            amount=25.0,
+            customer_email=f'client{i}@example.com',
+            metadata={'booking_type': 'slotta_hold'}
+        )
+        for i in range(calls)
+    ])
+    elapsed = time.perf_counter() - started
+    assert all(results), "some calls failed"
+    return elapsed
+
+
+async def main(calls: int, delay: float):
+    api_base = os.getenv('STRIPE_API_BASE')
+    stub = nullcontext() if api_base else StubServer(delay=delay, body=PAYMENT_INTENT)
+
+    with stub:
+        base = api_base or stub.url
+        print(f"\n{calls} concurrent create_payment_intent calls against {'stripe-mock' if api_base else f'stub ({delay * 1000:.0f}ms)'}")
+        print(f"{'pool size':>10}{'wall time':>12}{'calls/s':>10}")
+        for size in POOL_SIZES:
+            service = make_service(base, size)
+            elapsed = await run(service, calls)
+            service.shutdown()
+            print(f"{size:>10}{elapsed * 1000:>10.0f}ms{calls / elapsed:>10.1f}")
+
+
+if __name__ == '__main__':
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    asyncio.run(main(calls, delay))
@@ -0,0 +1,91 @@
+"""Bulk Client Reclassification
+
+Recomputes risk score and reliability for every client using the
+vectorized SlottaEngine rules. Clients are streamed in chunks and only
+rows whose values changed are written back, in unordered bulk writes.
+
+Run after a policy change in SlottaEngine so existing clients pick up
+the new rules without one round trip per client.
+"""
+
+import logging
+from typing import Dict
+
+import pandas as pd
+from pymongo import UpdateOne
+
+from slotta_engine import SlottaEngine
+
+logger = logging.getLogger(__name__)
+
+CLIENT_STATS_PROJECTION = {
+    "_id": 1,
+    "total_bookings": 1,
+    "no_shows": 1,
+    "cancellations": 1,
+    "reliability": 1,
+    "risk_score": 1
+}
+
+
+def build_reclassification_ops(chunk: list) -> list:
+    """Return UpdateOne ops for the clients in chunk whose tags changed"""
+    
+    frame = pd.DataFrame.from_records(chunk)
+    for column in ("total_bookings", "no_shows", "cancellations"):
+        if column not in frame:
+            frame[column] = 0
+        frame[column] = frame[column].fillna(0).astype("int64")
+    
+    risk = SlottaEngine.calculate_risk_score_batch(
+        frame["total_bookings"], frame["no_shows"], frame["cancellations"]
+    )
+    reliability = SlottaEngine.determine_reliability_batch(
+        frame["total_bookings"], frame["no_shows"]
+    )
+    
+    # A column none of the chunk's clients have yet compares unequal to everything
+    missing = pd.Series(None, index=frame.index, dtype=object)
+    current_risk = frame["risk_score"] if "risk_score" in frame else missing
+    current_reliability = frame["reliability"] if "reliability" in frame else missing
+    changed = (current_risk.ne(risk) | current_reliability.ne(reliability)).to_numpy()
+    
+    ops = []
+    for i in changed.nonzero()[0]:
+        doc = chunk[i]
+        # Match on the counters we read so a client updated concurrently by a
+        # booking handler is left alone instead of overwritten with stale tags
+        ops.append(UpdateOne(
+            {
+                "_id": doc["_id"],
+                "total_bookings": doc.get("total_bookings"),
+                "no_shows": doc.get("no_shows"),
+                "cancellations": doc.get("cancellations")
+            },
+            {"$set": {"risk_score": int(risk[i]), "reliability": reliability[i]}}
+        ))
+    return ops
+
+
+async def reclassify_clients(db, chunk_size: int = 1000) -> Dict[str, int]:
+    """Stream all clients and write back changed risk/reliability tags"""
+    
+    scanned = 0
+    changed = 0
+    modified = 0
+    
+    cursor = db.clients.find({}, CLIENT_STATS_PROJECTION).batch_size(chunk_size)
+    while True:
+        chunk = await cursor.to_list(chunk_size)
+        if not chunk:
+            break
+        
+        scanned += len(chunk)
+        ops = build_reclassification_ops(chunk)
+        if ops:
+            changed += len(ops)
+            result = await db.clients.bulk_write(ops, ordered=False)
+            modified += result.modified_count
+    
+    logger.info(f"✅ Clients reclassified: {modified} of {scanned} updated")
+    return {"scanned": scanned, "changed": changed, "modified": modified}
@@ -0,0 +1,237 @@
+"""Daily Summary Fan-out
+
+Builds and sends the morning summary email for every master with
+summaries enabled. Masters are read in id-ordered batches; for each batch
+today's schedule, time protected and wallet totals come from three
+$group aggregations over all masters in the batch, and service/client
+names from one $in lookup each. Emails are then sent with bounded
+concurrency.
+
+Each send is checkpointed in the daily_summary_runs collection under
+"<date>:<master_id>". A master is claimed before its email goes out, so
+a run that is interrupted and started again skips everyone already
+claimed and only retries sends that failed.
+
+A claim is leased for DAILY_SUMMARY_LEASE_SECONDS. If a run crashes
+between claiming and recording the result, the checkpoint stays at
+"sending"; once its lease has run out a later run takes it over, logs a
+warning and sends again, so that master may get the email twice rather
+than not at all.
+"""
+
+import os
+import asyncio
+import logging
+from datetime import date, datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+DAILY_SUMMARY_BATCH_SIZE = int(os.getenv('DAILY_SUMMARY_BATCH_SIZE', '500'))
+DAILY_SUMMARY_CONCURRENCY = int(os.getenv('DAILY_SUMMARY_CONCURRENCY', '20'))
+DAILY_SUMMARY_LEASE_SECONDS = int(os.getenv('DAILY_SUMMARY_LEASE_SECONDS', '300'))
+
+# Bookings listed per master (the email shows the first few)
+MAX_UPCOMING = 100
+
+SCHEDULED_STATUSES = ["confirmed", "pending"]
+
+SummarySender = Callable[..., Awaitable[bool]]
+
+
+def checkpoint_id(day: date, master_id: str) -> str:
+    return f"{day.isoformat()}:{master_id}"
+
+
+def _claimable(now: datetime) -> dict:
+    """Checkpoint states that may be claimed again: failed, or sending with an expired lease"""
+    
+    return {"$or": [
+        {"status": "failed"},
+        {"status": "sending", "locked_until": {"$not": {"$gte": now}}}
+    ]}
+
+
+async def build_summaries(db, masters: List[dict], day: date) -> List[dict]:
+    """Summary email arguments for a batch of masters"""
+    
+    master_ids = [m['id'] for m in masters]
+    start_of_day = datetime.combine(day, datetime.min.time())
+    end_of_day = start_of_day + timedelta(days=1)
+    
+    schedules = await db.bookings.aggregate([
+        {"$match": {
+            "master_id": {"$in": master_ids},
+            "booking_date": {"$gte": start_of_day, "$lt": end_of_day},
+            "status": {"$in": SCHEDULED_STATUSES}
+        }},
+        {"$sort": {"booking_date": 1}},
+        {"$group": {
+            "_id": "$master_id",
+            "bookings": {"$push": {
+                "booking_date": "$booking_date",
+                "service_id": "$service_id",
+                "client_id": "$client_id"
+            }}
+        }}
+    ]).to_list(None)
+    
+    protected = await db.bookings.aggregate([
+        {"$match": {"master_id": {"$in": master_ids}, "status": "confirmed"}},
+        {"$group": {"_id": "$master_id", "total_slotta": {"$sum": "$slotta_amount"}}}
+    ]).to_list(None)
+    
+    wallets = await db.transactions.aggregate([
+        {"$match": {"master_id": {"$in": master_ids}}},
+        {"$group": {"_id": "$master_id", "total": {"$sum": "$amount"}}}
+    ]).to_list(None)
+    
+    bookings_by_master = {s['_id']: s['bookings'][:MAX_UPCOMING] for s in schedules}
+    protected_by_master = {p['_id']: p['total_slotta'] for p in protected}
+    wallet_by_master = {w['_id']: w['total'] for w in wallets}
+    
+    todays = [b for bookings in bookings_by_master.values() for b in bookings]
+    service_ids = list({b['service_id'] for b in todays})
+    client_ids = list({b['client_id'] for b in todays})
+    services = await db.services.find(
+        {"id": {"$in": service_ids}}, {"_id": 0, "id": 1, "name": 1}
+    ).to_list(None) if service_ids else []
+    clients = await db.clients.find(
+        {"id": {"$in": client_ids}}, {"_id": 0, "id": 1, "name": 1}
+    ).to_list(None) if client_ids else []
+    service_names = {s['id']: s['name'] for s in services}
+    client_names = {c['id']: c['name'] for c in clients}
+    
+    summaries = []
+    for master in masters:
+        upcoming = [
+            {
+                "time": b['booking_date'].strftime("%H:%M"),
+                "client": client_names.get(b['client_id'], "Client"),
+                "service": service_names.get(b['service_id'], "Service")
+            }
+            for b in bookings_by_master.get(master['id'], [])
+        ]
+        summaries.append({
+            "master_id": master['id'],
+            "to_email": master['email'],
+            "master_name": master['name'],
+            "upcoming_bookings": upcoming,
+            "time_protected": protected_by_master.get(master['id'], 0),
+            "pending_payouts": wallet_by_master.get(master['id'], 0)
+        })
+    return summaries
+
+
+async def _claim(db, day: date, master_id: str) -> bool:
+    """Checkpoint a master before sending; False if already claimed today"""
+    
+    now = datetime.utcnow()
+    locked_until = now + timedelta(seconds=DAILY_SUMMARY_LEASE_SECONDS)
+    try:
+        await db.daily_summary_runs.insert_one({
+            "_id": checkpoint_id(day, master_id),
+            "date": day.isoformat(),
+            "master_id": master_id,
+            "status": "sending",
+            "started_at": now,
+            "locked_until": locked_until
+        })
+        return True
+    except DuplicateKeyError:
+        # Only a failed send, or one whose run died mid-send, may be claimed again
+        previous = await db.daily_summary_runs.find_one_and_update(
+            {"_id": checkpoint_id(day, master_id), **_claimable(now)},
+            {"$set": {"status": "sending", "started_at": now, "locked_until": locked_until}}
+        )
+        if previous and previous['status'] == "sending":
+            logger.warning(
+                f"⚠️ Daily summary for {master_id} was left sending since "
+                f"{previous.get('started_at')}; sending again"
+            )
+        return previous is not None
+
+
+async def _send_one(db, day: date, summary: dict, send: SummarySender, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        if not await _claim(db, day, summary['master_id']):
+            return "skipped"
+        
+        error = None
+        try:
+            sent = await send(**{k: v for k, v in summary.items() if k != 'master_id'})
+            if not sent:
+                error = "sender reported failure"
+        except Exception as e:
+            error = str(e)
+        
+        await db.daily_summary_runs.update_one(
+            {"_id": checkpoint_id(day, summary['master_id'])},
+            {
+                "$set": {
+                    "status": "failed" if error else "sent",
+                    "finished_at": datetime.utcnow(),
+                    "error": error
+                },
+                "$unset": {"locked_until": ""}
+            }
+        )
+        if error:
+            logger.error(f"❌ Daily summary for {summary['master_id']} failed: {error}")
+            return "failed"
+        return "sent"
+
+
+async def send_daily_summaries(
+    db,
+    send: SummarySender,
+    day: Optional[date] = None,
+    batch_size: int = DAILY_SUMMARY_BATCH_SIZE,
+    concurrency: int = DAILY_SUMMARY_CONCURRENCY
+) -> Dict[str, int]:
+    """Send today's summary to every master with summaries enabled"""
+    
+    day = day or datetime.utcnow().date()
+    semaphore = asyncio.Semaphore(concurrency)
+    counts = {"sent": 0, "skipped": 0, "failed": 0}
+    last_id = None
+    
+    while True:
+        query = {"settings.daily_summary_enabled": {"$ne": False}}
+        if last_id is not None:
+            query["id"] = {"$gt": last_id}
+        masters = await db.masters.find(
+            query, {"_id": 0, "id": 1, "email": 1, "name": 1}
+        ).sort("id", 1).limit(batch_size).to_list(batch_size)
+        if not masters:
+            break
+        last_id = masters[-1]['id']
+        
+        # Skip masters already handled by an earlier (interrupted) run
+        done = await db.daily_summary_runs.find(
+            {
+                "_id": {"$in": [checkpoint_id(day, m['id']) for m in masters]},
+                "$nor": [_claimable(datetime.utcnow())]
+            },
+            {"master_id": 1}
+        ).to_list(None)
+        done_ids = {d['master_id'] for d in done}
+        pending = [m for m in masters if m['id'] not in done_ids]
+        counts["skipped"] += len(masters) - len(pending)
+        if not pending:
+            continue
+        
+        summaries = await build_summaries(db, pending, day)
+        results = await asyncio.gather(*[
+            _send_one(db, day, summary, send, semaphore) for summary in summaries
+        ])
+        for result in results:
+            counts[result] += 1
+    
+    logger.info(
+        f"✅ Daily summaries for {day}: {counts['sent']} sent, "
+        f"{counts['skipped']} already sent, {counts['failed']} failed"
+    )
+    return counts
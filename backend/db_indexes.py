@@ -0,0 +1,116 @@
+"""MongoDB Index Manager
+
+Declares every index the API relies on, one list per collection, and
+creates them at startup. create_index is a no-op for indexes that
+already exist, so ensure_indexes is safe to run on every boot.
+
+index_report compares the declarations with what exists on the server
+and uses $indexStats to flag indexes that have not served any operation
+since the server started.
+"""
+
+import logging
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "masters": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+        IndexModel([("booking_slug", ASCENDING)], unique=True),
+    ],
+    "clients": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "services": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("master_id", ASCENDING), ("active", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("master_id", ASCENDING), ("created_at", ASCENDING), ("id", ASCENDING)]),
+    ],
+    "bookings": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("master_id", ASCENDING), ("booking_date", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("master_id", ASCENDING), ("status", ASCENDING), ("booking_date", DESCENDING), ("id", DESCENDING)]),
+        IndexModel([("client_id", ASCENDING), ("booking_date", DESCENDING), ("id", DESCENDING)]),
+        # Covers the per-client $group of master_clients
+        IndexModel([("master_id", ASCENDING), ("client_id", ASCENDING), ("booking_date", DESCENDING), ("status", ASCENDING)]),
+    ],
+    "transactions": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("master_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]),
+    ],
+    "calendar_blocks": [
+        IndexModel([("id", ASCENDING)]),
+        IndexModel([("master_id", ASCENDING), ("start_datetime", ASCENDING), ("id", ASCENDING)]),
+        IndexModel([("master_id", ASCENDING), ("end_datetime", ASCENDING)]),
+        IndexModel([("master_id", ASCENDING), ("google_event_id", ASCENDING)]),
+    ],
+    "notifications": [
+        IndexModel([("id", ASCENDING)], unique=True),
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+    ],
+    "master_stats_daily": [
+        IndexModel([("master_id", ASCENDING), ("day", ASCENDING)]),
+    ],
+    "daily_summary_runs": [
+        # Checkpoints are only needed while a day's run can still resume
+        IndexModel([("started_at", ASCENDING)], expireAfterSeconds=7 * 24 * 3600),
+    ],
+    "slot_reservations": [
+        # Leases are removed by MongoDB once expires_at has passed
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("reservation_id", ASCENDING)]),
+    ],
+    "slot_holds": [
+        # Cancelled-hold counters outlive Stripe's idempotency keys, then go
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+    ],
+}
+
+
+async def ensure_indexes(db) -> Dict[str, List[str]]:
+    """Create all declared indexes; returns the names ensured per collection
+    
+    Indexes are created one at a time, so a failing one (e.g. duplicate
+    data blocking a unique index) is logged and skipped without losing the
+    other indexes of its collection, and the API still starts.
+    """
+    
+    ensured = {}
+    for collection, models in INDEXES.items():
+        names = []
+        for model in models:
+            try:
+                names += await db[collection].create_indexes([model])
+            except OperationFailure as e:
+                logger.error(f"❌ Failed to create index {model.document['name']} on {collection}: {e}")
+        ensured[collection] = names
+    logger.info(f"🗂️  Indexes ensured on {len(ensured)} collections")
+    return ensured
+
+
+async def index_report(db) -> Dict[str, dict]:
+    """Missing declared indexes and indexes unused since server start"""
+    
+    report = {}
+    for collection, models in INDEXES.items():
+        declared = {model.document['name'] for model in models}
+        existing = await db[collection].index_information()
+        
+        usage = await db[collection].aggregate([{"$indexStats": {}}]).to_list(None)
+        unused = sorted(
+            stat['name'] for stat in usage
+            if stat['name'] != '_id_' and stat['accesses']['ops'] == 0
+        )
+        
+        report[collection] = {
+            "missing": sorted(declared - set(existing)),
+            "undeclared": sorted(set(existing) - declared - {'_id_'}),
+            "unused": unused
+        }
+    return report
@@ -0,0 +1,265 @@
+"""Document Cache
+
+Read-through caching for the masters, services and clients documents
+that a single request tends to fetch more than once:
+
+- A per-request identity map (a ContextVar set by RequestScopeMiddleware)
+  returns the same document for repeated lookups within one request.
+- A process-level TTL/LRU cache holds masters (by id and booking slug),
+  services (by id) and each master's service list pages across requests.
+
+Clients are only kept in the identity map: their counters are updated by
+every booking write, so sharing them across requests would serve stale
+stats. Writes in this process invalidate the affected entries; the short
+TTL bounds how long writes made by other processes stay invisible.
+
+Misses go through batch loaders, so concurrent requests missing the same
+or different documents in one event loop tick share one $in query.
+"""
+
+import os
+import copy
+import time
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Hashable, Optional
+
+from batch_loader import BatchLoader
+
+logger = logging.getLogger(__name__)
+
+DOC_CACHE_TTL_SECONDS = float(os.getenv('DOC_CACHE_TTL_SECONDS', '30'))
+DOC_CACHE_MAXSIZE = int(os.getenv('DOC_CACHE_MAXSIZE', '10000'))
+
+# Documents fetched during the current request, keyed by (collection, id)
+_request_docs: ContextVar[Optional[Dict[tuple, dict]]] = ContextVar('request_docs', default=None)
+
+
+class TTLCache:
+    """LRU mapping whose entries expire ttl_seconds after they were stored
+    
+    set() can give an entry its own lifetime instead of ttl_seconds.
+    """
+
+    def __init__(self, maxsize: int = DOC_CACHE_MAXSIZE, ttl_seconds: float = DOC_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[0]:
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        if self.maxsize <= 0:
+            return
+        lifetime = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + lifetime, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions
+        }
+
+
+class RequestScopeMiddleware:
+    """ASGI middleware giving every HTTP request a fresh identity map"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        token = _request_docs.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _request_docs.reset(token)
+
+
+class DocumentCache:
+    """Identity map plus process-wide TTL caches for hot lookups"""
+
+    def __init__(self, maxsize: int = DOC_CACHE_MAXSIZE, ttl_seconds: float = DOC_CACHE_TTL_SECONDS):
+        self.masters = TTLCache(maxsize, ttl_seconds)
+        self.master_slugs = TTLCache(maxsize, ttl_seconds)
+        self.services = TTLCache(maxsize, ttl_seconds)
+        self.service_lists = TTLCache(maxsize, ttl_seconds)
+        self.loaders = {collection: BatchLoader(collection) for collection in ("masters", "services", "clients")}
+        self.slug_loader = BatchLoader("masters", "booking_slug")
+        self.request_hits = 0
+        self._versions: Dict[tuple, int] = {}
+        self._writes = 0
+    
+    # Identity map
+
+    def _scoped(self, collection: str, doc_id: str) -> Optional[dict]:
+        docs = _request_docs.get()
+        doc = docs.get((collection, doc_id)) if docs is not None else None
+        if doc is not None:
+            self.request_hits += 1
+        return doc
+
+    def _remember(self, collection: str, doc: dict) -> dict:
+        docs = _request_docs.get()
+        if docs is not None:
+            docs[(collection, doc['id'])] = doc
+        return doc
+
+    def _forget(self, collection: str, doc_id: str):
+        docs = _request_docs.get()
+        if docs is not None:
+            docs.pop((collection, doc_id), None)
+
+    async def _get(self, db, collection: str, doc_id: str, cache: Optional[TTLCache]) -> Optional[dict]:
+        doc = self._scoped(collection, doc_id)
+        if doc is not None:
+            return doc
+        
+        cached = cache.get(doc_id) if cache is not None else None
+        if cached is not None:
+            # Each request gets its own copy to mutate
+            return self._remember(collection, copy.deepcopy(cached))
+        
+        version = self._versions.get((collection, doc_id), 0)
+        doc = await self.loaders[collection].load(db, doc_id)
+        if doc is None:
+            return None
+        # Only cache if nothing was written while we were loading
+        if cache is not None and self._versions.get((collection, doc_id), 0) == version:
+            cache.set(doc_id, copy.deepcopy(doc))
+        return self._remember(collection, doc)
+    
+    # Reads
+
+    async def get_master(self, db, master_id: str) -> Optional[dict]:
+        return await self._get(db, "masters", master_id, self.masters)
+
+    async def get_master_by_slug(self, db, booking_slug: str) -> Optional[dict]:
+        master_id = self.master_slugs.get(booking_slug)
+        if master_id is not None:
+            master = await self.get_master(db, master_id)
+            # The slug may have moved to another master since it was cached
+            if master is not None and master.get('booking_slug') == booking_slug:
+                return master
+        
+        writes = self._writes
+        master = await self.slug_loader.load(db, booking_slug)
+        if master is None:
+            return None
+        self.master_slugs.set(booking_slug, master['id'])
+        if self._writes == writes:
+            self.masters.set(master['id'], copy.deepcopy(master))
+        return self._remember("masters", master)
+
+    async def get_service(self, db, service_id: str) -> Optional[dict]:
+        return await self._get(db, "services", service_id, self.services)
+
+    async def get_client(self, db, client_id: str) -> Optional[dict]:
+        return await self._get(db, "clients", client_id, None)
+
+    def get_service_list(self, master_id: str, variant: tuple) -> Any:
+        """A cached page of a master's services (variant = the query parameters)"""
+        
+        pages = self.service_lists.get(master_id)
+        if pages is None or variant not in pages:
+            return None
+        return copy.deepcopy(pages[variant])
+
+    def set_service_list(self, master_id: str, variant: tuple, page: Any):
+        pages = self.service_lists.get(master_id) or {}
+        pages[variant] = copy.deepcopy(page)
+        self.service_lists.set(master_id, pages)
+    
+    # Writes
+
+    def _bump(self, collection: str, doc_id: str):
+        key = (collection, doc_id)
+        self._versions[key] = self._versions.get(key, 0) + 1
+        self._writes += 1
+
+    def invalidate_master(self, master_id: str):
+        """Drop a master after it was written"""
+        
+        self._bump("masters", master_id)
+        self.masters.pop(master_id)
+        self._forget("masters", master_id)
+        self.loaders["masters"].forget(master_id)
+        self.slug_loader.forget_all()
+
+    def invalidate_service(self, service_id: str, master_id: Optional[str] = None):
+        """Drop a service (and its master's service lists) after it was written"""
+        
+        self._bump("services", service_id)
+        self.services.pop(service_id)
+        self._forget("services", service_id)
+        self.loaders["services"].forget(service_id)
+        if master_id:
+            self.service_lists.pop(master_id)
+
+    def forget_client(self, client_id: str):
+        """Drop a client from this request's identity map after a write"""
+        
+        self._forget("clients", client_id)
+        self.loaders["clients"].forget(client_id)
+
+    def remember_client(self, client: dict):
+        """Map a client this request just wrote and got back (find_one_and_update)"""
+        
+        self.loaders["clients"].forget(client['id'])
+        self._remember("clients", client)
+
+    def clear(self):
+        for cache in (self.masters, self.master_slugs, self.services, self.service_lists):
+            cache.clear()
+        for loader in (*self.loaders.values(), self.slug_loader):
+            loader.reset_stats()
+        self.request_hits = 0
+
+    def stats(self) -> dict:
+        return {
+            "masters": self.masters.stats(),
+            "master_slugs": self.master_slugs.stats(),
+            "services": self.services.stats(),
+            "service_lists": self.service_lists.stats(),
+            "request_hits": self.request_hits,
+            "loaders": {
+                **{collection: loader.stats() for collection, loader in self.loaders.items()},
+                "master_slugs": self.slug_loader.stats()
+            }
+        }
+
+
+# Global instance
+doc_cache = DocumentCache()
@@ -0,0 +1,121 @@
+"""Master Analytics
+
+Computes a master's booking statistics inside MongoDB. One aggregation
+over the master's bookings uses $facet to count bookings and sum Slotta
+amounts per status (and optionally per service), then a $lookup into
+transactions adds the wallet total. Only the grouped numbers leave the
+server, so the result is exact for any number of bookings.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from models import BookingStatus
+
+SLOTTA_AMOUNT = {"$ifNull": ["$slotta_amount", 0]}
+
+
+def _status_count(status: str) -> dict:
+    return {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+
+
+def analytics_pipeline(
+    master_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    by_service: bool = False
+) -> list:
+    """Aggregation over bookings returning a single analytics document"""
+    
+    match = {"master_id": master_id}
+    if date_from or date_to:
+        match["booking_date"] = {}
+        if date_from:
+            match["booking_date"]["$gte"] = date_from
+        if date_to:
+            match["booking_date"]["$lt"] = date_to
+    
+    facets = {
+        "by_status": [
+            {"$group": {"_id": "$status", "count": {"$sum": 1}, "slotta": {"$sum": SLOTTA_AMOUNT}}}
+        ]
+    }
+    if by_service:
+        facets["by_service"] = [
+            {"$group": {
+                "_id": "$service_id",
+                "bookings": {"$sum": 1},
+                "completed": _status_count(BookingStatus.COMPLETED.value),
+                "no_shows": _status_count(BookingStatus.NO_SHOW.value),
+                "slotta": {"$sum": SLOTTA_AMOUNT}
+            }},
+            {"$sort": {"bookings": -1}},
+            {"$lookup": {"from": "services", "localField": "_id", "foreignField": "id", "as": "service"}},
+            {"$project": {
+                "_id": 0,
+                "service_id": "$_id",
+                "service_name": {"$ifNull": [{"$arrayElemAt": ["$service.name", 0]}, "Unknown"]},
+                "bookings": 1,
+                "completed": 1,
+                "no_shows": 1,
+                "time_protected_eur": "$slotta"
+            }}
+        ]
+    
+    return [
+        {"$match": match},
+        {"$facet": facets},
+        # $facet always emits exactly one document, so the wallet total is
+        # attached even when the master has no bookings
+        {"$lookup": {
+            "from": "transactions",
+            "pipeline": [
+                {"$match": {"master_id": master_id, "type": "wallet_credit"}},
+                {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+            ],
+            "as": "wallet"
+        }}
+    ]
+
+
+def summarize(by_status: Dict[str, int], slotta_total: float, wallet_balance: float) -> dict:
+    """Analytics response from booking counts per status and totals"""
+    
+    total_bookings = sum(by_status.values())
+    no_shows = by_status.get(BookingStatus.NO_SHOW.value, 0)
+    return {
+        "total_bookings": total_bookings,
+        "completed_bookings": by_status.get(BookingStatus.COMPLETED.value, 0),
+        "no_shows": no_shows,
+        "no_show_rate": (no_shows / total_bookings * 100) if total_bookings > 0 else 0,
+        "time_protected_eur": slotta_total,
+        "wallet_balance": wallet_balance,
+        "avg_slotta": slotta_total / total_bookings if total_bookings > 0 else 0,
+        "by_status": by_status
+    }
+
+
+async def master_analytics(
+    db,
+    master_id: str,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    by_service: bool = False
+) -> dict:
+    """Booking counts, Slotta totals and wallet balance for a master"""
+    
+    result = await db.bookings.aggregate(
+        analytics_pipeline(master_id, date_from, date_to, by_service),
+        allowDiskUse=True
+    ).to_list(1)
+    facets = result[0] if result else {}
+    wallet = facets.get('wallet') or [{}]
+    
+    analytics = summarize(
+        {s['_id']: s['count'] for s in facets.get('by_status', [])},
+        sum(s['slotta'] for s in facets.get('by_status', [])),
+        wallet[0].get('total', 0)
+    )
+    if by_service:
+        analytics["services"] = facets.get('by_service', [])
+    return analytics
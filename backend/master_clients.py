@@ -0,0 +1,96 @@
+"""Master Clients
+
+Lists the clients who have booked with a master using one aggregation
+over the master's bookings. It groups by client_id inside MongoDB, which
+also gives per-relationship stats: bookings, completed visits and
+no-shows with this master, plus the date of the latest booking. Then it
+pages in (last_booking_date, id) order with a keyset cursor and joins
+only that page's client documents.
+
+With a fields selection, the final projection keeps only the selected
+client and relationship fields (plus the cursor's last_booking_date).
+"""
+
+from typing import List, Optional, Tuple
+
+from models import BookingStatus
+from pagination import after_cursor, encode_cursor
+
+
+# MasterClient fields computed by the $group stage; the rest come from the client
+RELATIONSHIP_FIELDS = ("last_booking_date", "master_bookings", "master_visits", "master_no_shows")
+
+
+def _status_count(status: str) -> dict:
+    return {"$sum": {"$cond": [{"$eq": ["$status", status]}, 1, 0]}}
+
+
+def _page_projection(fields: Optional[List[str]]) -> dict:
+    if fields is None:
+        return {"_id": 0, "client._id": 0}
+    return {
+        "_id": 0,
+        "id": 1,
+        "last_booking_date": 1,
+        **{
+            name if name in RELATIONSHIP_FIELDS else f"client.{name}": 1
+            for name in fields
+        }
+    }
+
+
+def master_clients_pipeline(
+    master_id: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> list:
+    """Aggregation over bookings returning up to limit + 1 clients, most recent first"""
+    
+    pipeline = [
+        {"$match": {"master_id": master_id}},
+        {"$group": {
+            "_id": "$client_id",
+            "last_booking_date": {"$max": "$booking_date"},
+            "master_bookings": {"$sum": 1},
+            "master_visits": _status_count(BookingStatus.COMPLETED.value),
+            "master_no_shows": _status_count(BookingStatus.NO_SHOW.value)
+        }},
+        {"$addFields": {"id": "$_id"}},
+        {"$sort": {"last_booking_date": -1, "id": -1}},
+    ]
+    if cursor:
+        pipeline.append({"$match": after_cursor("last_booking_date", -1, cursor)})
+    pipeline += [
+        {"$limit": limit + 1},
+        {"$lookup": {"from": "clients", "localField": "id", "foreignField": "id", "as": "client"}},
+        {"$project": _page_projection(fields)},
+    ]
+    return pipeline
+
+
+async def master_clients_page(
+    db,
+    master_id: str,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    fields: Optional[List[str]] = None
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of the master's clients with relationship stats, and the next page cursor"""
+    
+    rows = await db.bookings.aggregate(
+        master_clients_pipeline(master_id, limit, cursor, fields),
+        allowDiskUse=True
+    ).to_list(None)
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1], "last_booking_date")
+    
+    clients = []
+    for row in rows:
+        # Bookings whose client document is gone are skipped
+        if row['client']:
+            clients.append({**row.pop('client')[0], **row})
+    return clients, next_cursor
@@ -0,0 +1,381 @@
+"""Master Stats Rollups
+
+Keeps a running rollup per master in master_stats plus one bucket per
+master and day in master_stats_daily, so dashboard reads are O(1)
+instead of a scan of the master's history. Both hold booking counts and
+Slotta sums per status and transaction sums per type:
+
+    {"_id": master_id, "counts": {"confirmed": 3, ...},
+     "slotta": {"confirmed": 45.0, ...}, "transactions": {"wallet_credit": 12.5}}
+
+Booking handlers apply $inc deltas as bookings are created or change
+status and as transactions are written. Bookings are bucketed by the
+booking_date day, transactions by the created_at day.
+
+A master's rollup is built lazily. The first read inserts an empty
+rollup marked building, so deltas start landing in it; deltas for a
+master with no rollup document are skipped. While the rollup is building,
+reads are computed from raw data. Once the marker is BUILD_SETTLE_SECONDS
+old, requests that were mid-write when it was inserted have applied or
+skipped their deltas, and one read claims the backfill. It reads the
+stored values, recomputes from raw data and reads the stored values
+again. If a delta landed in between, the backfill is abandoned and
+retried after another settle period, because that write may already be
+in the recomputation. Otherwise the difference is applied with $inc and
+the marker removed.
+
+The backfill and reconcile_master_stats compare raw data with stored
+values that are not read atomically. A write whose raw document is
+stored before the recomputation but whose delta arrives after the
+second read is counted twice, so reconcile_master_stats is still meant
+to run as a periodic repair.
+"""
+
+import os
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from master_analytics import summarize
+
+logger = logging.getLogger(__name__)
+
+# Float sums within this much are considered equal (also by wallet_ledger)
+DRIFT_TOLERANCE = 0.005
+
+# Drifted fields listed per master in a reconcile report
+MAX_DRIFT_FIELDS = 20
+
+# How long a new rollup (or wallet balance) stays building before it is
+# backfilled: longer than a request takes from its raw write to its delta
+BUILD_SETTLE_SECONDS = int(os.getenv('STATS_BUILD_SETTLE_SECONDS', '60'))
+
+
+def day_key(value: datetime) -> str:
+    """UTC day of a datetime, matching $dateToString on the stored value"""
+    
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%d')
+
+
+def bucket_id(master_id: str, day: str) -> str:
+    return f"{master_id}:{day}"
+
+
+def enum_value(value) -> str:
+    """Plain string for a stored enum field (also used by wallet_ledger)"""
+    return getattr(value, 'value', value)
+
+
+async def _apply(db, master_id: str, day: str, inc: dict, session=None):
+    """Apply a delta to the master rollup and its day bucket (within session if given)"""
+    
+    result = await db.master_stats.update_one(
+        {"_id": master_id},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        session=session
+    )
+    if result.matched_count == 0:
+        # Not built yet - the first read counts this write from raw data
+        return
+    await db.master_stats_daily.update_one(
+        {"_id": bucket_id(master_id, day)},
+        {"$inc": inc, "$setOnInsert": {"master_id": master_id, "day": day}},
+        upsert=True,
+        session=session
+    )
+
+
+async def record_booking_created(db, booking: dict):
+    """Count a newly stored booking"""
+    
+    status = enum_value(booking['status'])
+    await _apply(db, booking['master_id'], day_key(booking['booking_date']), {
+        f"counts.{status}": 1,
+        f"slotta.{status}": booking.get('slotta_amount') or 0
+    })
+
+
+async def record_status_change(db, booking: dict, new_status, session=None):
+    """Move a booking from its stored status to new_status"""
+    
+    old_status = enum_value(booking['status'])
+    new_status = enum_value(new_status)
+    amount = booking.get('slotta_amount') or 0
+    await _apply(db, booking['master_id'], day_key(booking['booking_date']), {
+        f"counts.{old_status}": -1,
+        f"counts.{new_status}": 1,
+        f"slotta.{old_status}": -amount,
+        f"slotta.{new_status}": amount
+    }, session)
+
+
+async def record_transaction(db, transaction: dict, session=None):
+    """Add a master transaction to the wallet sums"""
+    
+    if not transaction.get('master_id'):
+        return
+    await _apply(db, transaction['master_id'], day_key(transaction['created_at']), {
+        f"transactions.{enum_value(transaction['type'])}": transaction['amount']
+    }, session)
+
+
+async def compute_master_stats(db, master_id: str) -> dict:
+    """Rollup and day buckets for a master, recomputed from raw data"""
+    
+    booking_groups = await db.bookings.aggregate([
+        {"$match": {"master_id": master_id}},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$booking_date"}},
+                "status": "$status"
+            },
+            "count": {"$sum": 1},
+            "slotta": {"$sum": {"$ifNull": ["$slotta_amount", 0]}}
+        }}
+    ], allowDiskUse=True).to_list(None)
+    
+    transaction_groups = await db.transactions.aggregate([
+        {"$match": {"master_id": master_id}},
+        {"$group": {
+            "_id": {
+                "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$created_at"}},
+                "type": "$type"
+            },
+            "amount": {"$sum": "$amount"}
+        }}
+    ], allowDiskUse=True).to_list(None)
+
+    def empty():
+        return {"counts": defaultdict(int), "slotta": defaultdict(float), "transactions": defaultdict(float)}
+    
+    totals = empty()
+    days = defaultdict(empty)
+    for group in booking_groups:
+        status = group['_id']['status']
+        for target in (totals, days[group['_id']['day']]):
+            target['counts'][status] += group['count']
+            target['slotta'][status] += group['slotta']
+    for group in transaction_groups:
+        for target in (totals, days[group['_id']['day']]):
+            target['transactions'][group['_id']['type']] += group['amount']
+
+    def plain(stats):
+        return {field: dict(values) for field, values in stats.items()}
+    
+    return {
+        "master": {"_id": master_id, **plain(totals)},
+        "daily": [
+            {"_id": bucket_id(master_id, day), "master_id": master_id, "day": day, **plain(stats)}
+            for day, stats in days.items()
+        ]
+    }
+
+
+async def _stored(db, master_id: str):
+    """The stored rollup (None if missing) and its values plus day buckets, flattened"""
+    
+    stored = await db.master_stats.find_one({"_id": master_id})
+    stored_daily = await db.master_stats_daily.find({"master_id": master_id}).to_list(None)
+    flat = _flatten(stored or {})
+    for bucket in stored_daily:
+        flat.update(_flatten(bucket, f"daily.{bucket['day']}."))
+    return stored, flat
+
+
+async def _adjust(db, master_id: str, stored: Dict[str, float], actual: Dict[str, float]):
+    """$inc the rollup and day buckets from stored to actual, keeping deltas applied meanwhile"""
+    
+    rollup = {}
+    buckets = defaultdict(dict)
+    for key in set(stored) | set(actual):
+        diff = actual.get(key, 0) - stored.get(key, 0)
+        if not diff:
+            continue
+        if key.startswith("daily."):
+            _, day, field = key.split(".", 2)
+            buckets[day][field] = diff
+        else:
+            rollup[key] = diff
+    
+    if buckets:
+        await db.master_stats_daily.bulk_write([
+            UpdateOne(
+                {"_id": bucket_id(master_id, day)},
+                {"$inc": inc, "$setOnInsert": {"master_id": master_id, "day": day}},
+                upsert=True
+            )
+            for day, inc in buckets.items()
+        ], ordered=False)
+    
+    now = datetime.utcnow()
+    update = {"$set": {"updated_at": now, "rebuilt_at": now}, "$unset": {"building": "", "building_since": ""}}
+    if rollup:
+        update["$inc"] = rollup
+    await db.master_stats.update_one({"_id": master_id}, update, upsert=True)
+
+
+def settled_before(now: datetime) -> datetime:
+    """Building markers set before this have settled (also used by wallet_ledger)"""
+    return now - timedelta(seconds=BUILD_SETTLE_SECONDS)
+
+
+async def _finish_build(db, master_id: str) -> bool:
+    """Claim a settled building rollup and backfill it; False if not claimed or deltas landed meanwhile"""
+    
+    now = datetime.utcnow()
+    claimed = await db.master_stats.find_one_and_update(
+        {"_id": master_id, "building": True, "building_since": {"$lte": settled_before(now)}},
+        # Other readers wait another settle period before they try
+        {"$set": {"building_since": now}}
+    )
+    if claimed is None:
+        return False
+    
+    _, before = await _stored(db, master_id)
+    computed = await compute_master_stats(db, master_id)
+    _, after = await _stored(db, master_id)
+    if before != after:
+        return False
+    await _adjust(db, master_id, after, _flatten_computed(computed))
+    return True
+
+
+async def get_master_stats(db, master_id: str) -> dict:
+    """The master's rollup, computed from raw data until it is built"""
+    
+    stats = await db.master_stats.find_one({"_id": master_id})
+    if stats is not None and not stats.get('building'):
+        return stats
+    
+    if stats is None:
+        now = datetime.utcnow()
+        try:
+            await db.master_stats.insert_one({
+                "_id": master_id, "building": True, "building_since": now, "updated_at": now
+            })
+        except DuplicateKeyError:
+            pass
+    
+    if await _finish_build(db, master_id):
+        return await db.master_stats.find_one({"_id": master_id})
+    return (await compute_master_stats(db, master_id))['master']
+
+
+async def get_daily_stats(db, master_id: str, day_from: Optional[date], day_to: Optional[date]) -> dict:
+    """Counts and sums over the day buckets in [day_from, day_to) (after get_master_stats)"""
+    
+    rollup = await db.master_stats.find_one({"_id": master_id}, {"building": 1})
+    if rollup is None or rollup.get('building'):
+        # Buckets are incomplete until the rollup is built
+        buckets = [
+            bucket for bucket in (await compute_master_stats(db, master_id))['daily']
+            if (not day_from or bucket['day'] >= day_from.isoformat())
+            and (not day_to or bucket['day'] < day_to.isoformat())
+        ]
+    else:
+        query = {"master_id": master_id}
+        if day_from or day_to:
+            query["day"] = {}
+            if day_from:
+                query["day"]["$gte"] = day_from.isoformat()
+            if day_to:
+                query["day"]["$lt"] = day_to.isoformat()
+        buckets = await db.master_stats_daily.find(query).to_list(None)
+    
+    summed = {"counts": defaultdict(int), "slotta": defaultdict(float), "transactions": defaultdict(float)}
+    for bucket in buckets:
+        for field, values in summed.items():
+            for key, value in bucket.get(field, {}).items():
+                values[key] += value
+    return {field: dict(values) for field, values in summed.items()}
+
+
+async def stats_analytics(
+    db,
+    master_id: str,
+    day_from: Optional[date] = None,
+    day_to: Optional[date] = None
+) -> dict:
+    """Analytics (same shape as master_analytics) read from the rollups"""
+    
+    stats = await get_master_stats(db, master_id)
+    period = await get_daily_stats(db, master_id, day_from, day_to) if (day_from or day_to) else stats
+    
+    by_status = {status: count for status, count in (period.get('counts') or {}).items() if count}
+    return summarize(
+        by_status,
+        round(sum((period.get('slotta') or {}).values()), 2),
+        round((stats.get('transactions') or {}).get('wallet_credit', 0), 2)
+    )
+
+
+def _flatten(doc: dict, prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for field in ("counts", "slotta", "transactions"):
+        for key, value in (doc.get(field) or {}).items():
+            flat[f"{prefix}{field}.{key}"] = value
+    return flat
+
+
+def _flatten_computed(computed: dict) -> Dict[str, float]:
+    flat = _flatten(computed['master'])
+    for bucket in computed['daily']:
+        flat.update(_flatten(bucket, f"daily.{bucket['day']}."))
+    return flat
+
+
+def _drift(stored: Dict[str, float], actual: Dict[str, float]) -> Dict[str, dict]:
+    drift = {}
+    for key in sorted(set(stored) | set(actual)):
+        stored_value = stored.get(key, 0)
+        actual_value = actual.get(key, 0)
+        if abs(stored_value - actual_value) > DRIFT_TOLERANCE:
+            drift[key] = {"stored": stored_value, "actual": actual_value}
+    return drift
+
+
+async def reconcile_master_stats(
+    db,
+    master_ids: Optional[List[str]] = None,
+    fix: bool = True
+) -> dict:
+    """Recompute rollups from raw data and report (and optionally fix) drift"""
+    
+    if master_ids is None:
+        masters = await db.masters.find({}, {"_id": 0, "id": 1}).to_list(None)
+        master_ids = [m['id'] for m in masters]
+    
+    settled = settled_before(datetime.utcnow())
+    drifted = []
+    for master_id in master_ids:
+        stored, stored_flat = await _stored(db, master_id)
+        if stored is not None and stored.get('building') and stored.get('building_since', settled) > settled:
+            # Reads compute it from raw data until the build settles
+            continue
+        computed = await compute_master_stats(db, master_id)
+        actual_flat = _flatten_computed(computed)
+        
+        drift = _drift(stored_flat, actual_flat)
+        if stored is not None and not stored.get('building') and not drift:
+            continue
+        
+        if drift:
+            drifted.append({
+                "master_id": master_id,
+                "missing": stored is None,
+                "fields": dict(list(drift.items())[:MAX_DRIFT_FIELDS]),
+                "drifted_fields": len(drift)
+            })
+        if fix:
+            await _adjust(db, master_id, stored_flat, actual_flat)
+    
+    if drifted:
+        logger.warning(f"⚠️ Master stats drift for {len(drifted)} of {len(master_ids)} masters")
+    logger.info(f"✅ Master stats reconciled for {len(master_ids)} masters")
+    return {"checked": len(master_ids), "drifted": drifted, "fixed": fix}
@@ -107,10 +107,18 @@ class Client(MongoModel):
     no_shows: int = 0
     cancellations: int = 0
     reliability: ClientReliability = ClientReliability.NEW
+    risk_score: int = 50  # 0-100, refreshed by the reclassification job
     wallet_balance: float = 0.0
     stripe_customer_id: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class MasterClient(Client):
+    # Stats for this client's bookings with one master
+    master_bookings: int = 0
+    master_visits: int = 0
+    master_no_shows: int = 0
+    last_booking_date: Optional[datetime] = None
+
 class ClientCreate(BaseModel):
     email: EmailStr
     name: str
@@ -191,3 +199,9 @@ class TransactionCreate(BaseModel):
     type: TransactionType
     amount: float
     description: str
+
+# Batch reads
+BATCH_GET_MAX_IDS = 100
+
+class BatchGetRequest(BaseModel):
+    ids: List[str] = Field(..., min_length=1, max_length=BATCH_GET_MAX_IDS)
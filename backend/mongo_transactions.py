@@ -0,0 +1,45 @@
+"""MongoDB Multi-Document Transactions
+
+Runs a group of writes atomically when the server supports transactions
+(replica set or sharded cluster). On a standalone mongod, as used in
+local development, the same writes run one after another without a
+session; callers keep them idempotent or reconcilable for that case.
+"""
+
+import logging
+from typing import Any, Awaitable, Callable, Dict
+
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Transaction support per client (checked once per connection)
+_support: Dict[int, bool] = {}
+
+
+async def supports_transactions(db) -> bool:
+    """True if db's deployment is a replica set or mongos"""
+    
+    key = id(db.client)
+    if key not in _support:
+        try:
+            hello = await db.client.admin.command('hello')
+            _support[key] = bool(hello.get('setName')) or hello.get('msg') == 'isdbgrid'
+        except (PyMongoError, NotImplementedError, AttributeError):
+            _support[key] = False
+        if not _support[key]:
+            logger.warning("⚠️ MongoDB transactions unavailable (standalone server), writes are not atomic")
+    return _support[key]
+
+
+async def run_transaction(db, writes: Callable[[Any], Awaitable[Any]]) -> Any:
+    """Run writes(session) in a transaction, or writes(None) without one
+    
+    The transaction is retried on transient errors by with_transaction.
+    """
+    
+    if not await supports_transactions(db):
+        return await writes(None)
+    
+    async with await db.client.start_session() as session:
+        return await session.with_transaction(writes)
@@ -0,0 +1,197 @@
+"""Notification Outbox
+
+Booking handlers enqueue notification jobs (emails, Telegram messages,
+Google Calendar events) into the notifications collection and return
+immediately. A small pool of asyncio workers started with the app drains
+the collection with bounded concurrency:
+
+- a job is claimed atomically and leased, so a crashed worker's job is
+  picked up again once the lease runs out
+- a failed send (exception, timeout or a falsy return from the service,
+  e.g. None from a calendar insert that errored) is retried with
+  exponential backoff
+- after NOTIFICATION_MAX_ATTEMPTS the job is dead-lettered (status "dead")
+  and kept for inspection
+
+Jobs can be enqueued inside a MongoDB transaction, so that they exist
+exactly when the state change they follow was committed. Besides
+notifications this carries other post-commit side effects that are safe
+to retry, such as idempotent Stripe captures.
+"""
+
+import os
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+NOTIFICATION_WORKERS = int(os.getenv('NOTIFICATION_WORKERS', '4'))
+NOTIFICATION_MAX_ATTEMPTS = int(os.getenv('NOTIFICATION_MAX_ATTEMPTS', '5'))
+NOTIFICATION_BACKOFF_SECONDS = float(os.getenv('NOTIFICATION_BACKOFF_SECONDS', '5'))
+NOTIFICATION_TIMEOUT_SECONDS = float(os.getenv('NOTIFICATION_TIMEOUT_SECONDS', '30'))
+
+# How long a claimed job stays invisible to other workers
+LEASE_SECONDS = 120
+
+# Workers also poll, so jobs enqueued by other processes or due for retry
+# are picked up without a wakeup
+POLL_INTERVAL_SECONDS = 1.0
+
+
+class NotificationOutbox:
+
+    def __init__(
+        self,
+        workers: int = NOTIFICATION_WORKERS,
+        max_attempts: int = NOTIFICATION_MAX_ATTEMPTS,
+        backoff_seconds: float = NOTIFICATION_BACKOFF_SECONDS,
+        timeout_seconds: float = NOTIFICATION_TIMEOUT_SECONDS
+    ):
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        self.handlers: Dict[str, Callable[..., Awaitable[bool]]] = {}
+        self.db = None
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, kind: str, handler: Callable[..., Awaitable[bool]]):
+        """Map a job kind to the coroutine that sends it (a falsy result is a failure)"""
+
+        self.handlers[kind] = handler
+
+    async def enqueue(self, db, kind: str, **payload) -> str:
+        """Store a notification job; it is sent by the worker pool"""
+
+        job_ids = await self.enqueue_many(db, [(kind, payload)])
+        return job_ids[0]
+
+    async def enqueue_many(self, db, jobs: List[Tuple[str, dict]], session=None) -> List[str]:
+        """Store several (kind, payload) jobs with one insert (within session if given)
+
+        Workers are not woken for jobs written in a session: they are not
+        visible until the commit, after which the caller calls wake().
+        """
+
+        for kind, _ in jobs:
+            if kind not in self.handlers:
+                raise ValueError(f"Unknown notification kind: {kind}")
+        if not jobs:
+            return []
+
+        now = datetime.utcnow()
+        docs = [
+            {
+                "id": str(uuid.uuid4()),
+                "kind": kind,
+                "payload": payload,
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": now,
+                "last_error": None,
+                "created_at": now
+            }
+            for kind, payload in jobs
+        ]
+        await db.notifications.insert_many(docs, session=session)
+
+        if session is None:
+            self.wake()
+        return [doc['id'] for doc in docs]
+
+    def wake(self):
+        """Let idle workers look for jobs now instead of at their next poll"""
+
+        if self._wakeup:
+            self._wakeup.set()
+
+    async def start(self, db):
+        """Start the worker pool (call from the app startup event)"""
+
+        self.db = db
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"📨 Notification outbox started with {self.workers} workers")
+
+    async def stop(self):
+        """Stop the workers; in-flight jobs are retried after their lease"""
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, number: int):
+        while True:
+            try:
+                self._wakeup.clear()
+                job = await self._claim()
+                if job:
+                    await self._run(job)
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Notification worker {number} error: {e}")
+                await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    async def _claim(self) -> Optional[dict]:
+        now = datetime.utcnow()
+        return await self.db.notifications.find_one_and_update(
+            {"$or": [
+                {"status": "pending", "next_attempt_at": {"$lte": now}},
+                {"status": "in_progress", "locked_until": {"$lt": now}}
+            ]},
+            {
+                "$set": {"status": "in_progress", "locked_until": now + timedelta(seconds=LEASE_SECONDS)},
+                "$inc": {"attempts": 1}
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _run(self, job: dict):
+        handler = self.handlers.get(job['kind'])
+        error = None
+
+        try:
+            if handler is None:
+                raise ValueError(f"No handler registered for {job['kind']}")
+            sent = await asyncio.wait_for(handler(**job['payload']), self.timeout_seconds)
+            if not sent:
+                error = "handler reported failure"
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            error = str(e)
+
+        now = datetime.utcnow()
+        if error is None:
+            update = {"status": "sent", "sent_at": now, "last_error": None}
+        elif job['attempts'] >= self.max_attempts:
+            update = {"status": "dead", "last_error": error}
+            logger.error(f"❌ Notification {job['id']} ({job['kind']}) dead-lettered: {error}")
+        else:
+            delay = self.backoff_seconds * 2 ** (job['attempts'] - 1)
+            update = {"status": "pending", "next_attempt_at": now + timedelta(seconds=delay), "last_error": error}
+            logger.warning(f"⚠️ Notification {job['id']} ({job['kind']}) failed, retrying in {delay}s: {error}")
+
+        await self.db.notifications.update_one(
+            {"id": job['id']},
+            {"$set": update, "$unset": {"locked_until": ""}}
+        )
+
+
+# Global instance
+notification_outbox = NotificationOutbox()
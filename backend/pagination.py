@@ -0,0 +1,98 @@
+"""Keyset Pagination
+
+Pages are read in (sort field, id) order. The cursor returned with a page
+is an opaque, URL-safe token holding the sort value and id of its last
+row, and the next page starts strictly after that row. With an index on
+(filter fields..., sort field, id) every page costs the same, unlike
+skip() which re-reads all earlier rows.
+
+Rows whose sort field is null or missing sort before every other value,
+so they come first in ascending order and last in descending order; the
+cursor filter follows the same order and pages through them by id.
+"""
+
+import json
+import base64
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a cursor token cannot be decoded"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "$date" in value:
+        return datetime.fromisoformat(value["$date"])
+    return value
+
+
+def encode_cursor(doc: dict, sort_field: str) -> str:
+    """Cursor pointing just past doc"""
+    
+    payload = json.dumps([_encode_value(doc.get(sort_field)), doc['id']], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    """(sort value, id) of the row a cursor points past"""
+    
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return _decode_value(value), str(doc_id)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor}") from e
+
+
+def after_cursor(sort_field: str, direction: int, cursor: str) -> dict:
+    """Filter matching the rows that come after the cursor"""
+    
+    value, doc_id = decode_cursor(cursor)
+    op = "$lt" if direction < 0 else "$gt"
+    # {field: None} matches null and missing values alike
+    same_value = {sort_field: value, "id": {op: doc_id}}
+    if value is None:
+        if direction < 0:
+            return same_value
+        return {"$or": [{sort_field: {"$ne": None}}, same_value]}
+    branches = [{sort_field: {op: value}}, same_value]
+    if direction < 0:
+        branches.append({sort_field: None})
+    return {"$or": branches}
+
+
+async def fetch_page(
+    collection,
+    query: dict,
+    sort_field: str,
+    direction: int = -1,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    skip: int = 0
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of documents and the cursor for the next page (None at the end)
+    
+    skip is only for callers that still page by offset; it re-reads the
+    skipped rows, so cursors should be preferred.
+    """
+    
+    if cursor:
+        query = {"$and": [query, after_cursor(sort_field, direction, cursor)]}
+    
+    docs = await collection.find(
+        query,
+        projection or {"_id": 0}
+    ).sort([(sort_field, direction), ("id", direction)]).skip(skip).limit(limit + 1).to_list(limit + 1)
+    
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort_field)
@@ -1,15 +1,19 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, status, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
+import asyncio
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Optional
 import hashlib
+import uuid
 import jwt
 
 # Load environment
@@ -19,11 +23,38 @@ load_dotenv(ROOT_DIR / '.env')
 # Import models and services
 from models import (
     Master, MasterCreate, MasterLogin, MasterResponse, Service, ServiceCreate,
-    Client, ClientCreate, Booking, BookingCreate, BookingCreateWithPayment,
-    Transaction, TransactionCreate, BookingStatus, ClientReliability
+    Client, ClientCreate, MasterClient, Booking, BookingCreate, BookingCreateWithPayment,
+    Transaction, TransactionCreate, BookingStatus, ClientReliability, BatchGetRequest
 )
 from slotta_engine import SlottaEngine
-from services import email_service, telegram_service, stripe_service, google_calendar_service
+from client_reclassification import reclassify_clients
+from daily_summaries import send_daily_summaries
+from master_analytics import master_analytics
+from master_clients import master_clients_page
+from master_stats import (
+    record_booking_created, record_status_change, record_transaction,
+    stats_analytics, reconcile_master_stats
+)
+from wallet_ledger import insert_transactions, record_hold_change, get_wallet_balance, check_wallets
+from mongo_transactions import run_transaction
+from availability import availability_index, to_naive_utc, SLOT_STEP_MINUTES
+from slot_reservations import (
+    SlotConflictError, reserve_slot, confirm_reservation, release_reservation,
+    cancelled_holds, count_cancelled_hold
+)
+from db_indexes import ensure_indexes, index_report
+from pagination import InvalidCursorError, fetch_page
+from data_export import EXPORT_FORMATS, stream_export
+from doc_cache import doc_cache, RequestScopeMiddleware
+from auth_cache import TokenCache, get_master_profile
+from fast_json import FastJSONResponse, trusted_response, trusted_document
+from sparse_fields import InvalidFieldsError, parse_fields, projection, batch_get
+from state_transitions import set_fields, transition_booking, update_client_stats
+from notification_outbox import notification_outbox
+from services import (
+    email_service, telegram_service, stripe_service, google_calendar_service, http_clients,
+    PaymentAuthorizationError
+)
 
 # Configure logging
 logging.basicConfig(
@@ -37,6 +68,17 @@ mongo_url = os.environ['MONGO_URL']
 client = AsyncIOMotorClient(mongo_url)
 db = client[os.environ['DB_NAME']]
 
+# Notification kinds handled by the outbox workers
+notification_outbox.register("email.booking_confirmation", email_service.send_booking_confirmation)
+notification_outbox.register("email.master_new_booking", email_service.send_master_new_booking)
+notification_outbox.register("telegram.new_booking", telegram_service.notify_new_booking)
+notification_outbox.register("telegram.new_booking_alert", telegram_service.send_new_booking_alert)
+notification_outbox.register("calendar.create_event", google_calendar_service.create_event)
+notification_outbox.register("email.no_show_alert", email_service.send_no_show_alert)
+notification_outbox.register("telegram.no_show", telegram_service.notify_no_show)
+# Not a notification, but the same retried post-commit delivery (captures are idempotent)
+notification_outbox.register("stripe.capture_payment", stripe_service.capture_payment)
+
 # JWT Settings
 JWT_SECRET = os.environ.get('JWT_SECRET', 'slotta_jwt_secret_key_2025')
 JWT_ALGORITHM = "HS256"
@@ -45,6 +87,9 @@ JWT_EXPIRATION_HOURS = 24 * 7  # 7 days
 # Security
 security = HTTPBearer(auto_error=False)
 
+# Decoded tokens, kept until they expire
+token_cache = TokenCache(JWT_SECRET, JWT_ALGORITHM)
+
 def hash_password(password: str) -> str:
     """Hash password using SHA256"""
     return hashlib.sha256(password.encode()).hexdigest()
@@ -69,12 +114,12 @@ async def get_current_master(credentials: HTTPAuthorizationCredentials = Depends
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = token_cache.decode(credentials.credentials)
         master_id = payload.get("sub")
         if not master_id:
             raise HTTPException(status_code=401, detail="Invalid token")
         
-        master = await db.masters.find_one({"id": master_id}, {"_id": 0, "password_hash": 0})
+        master = await get_master_profile(db, master_id)
         if not master:
             raise HTTPException(status_code=401, detail="Master not found")
         
@@ -84,10 +129,70 @@ async def get_current_master(credentials: HTTPAuthorizationCredentials = Depends
     except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+async def reserve_booking_slot(master_id: str, booking_date: datetime, duration_minutes: int):
+    """Check availability and atomically reserve the slot for a new booking
+    
+    Returns (booking_id, booking_end). The reservation id is the booking id.
+    """
+    
+    booking_start = to_naive_utc(booking_date)
+    booking_end = booking_start + timedelta(minutes=duration_minutes)
+    
+    # Cheap in-process check first, then the atomic claim
+    busy = await availability_index.get(db, master_id)
+    if not busy.is_free(booking_start, booking_end):
+        raise HTTPException(status_code=409, detail="Time slot is not available")
+    
+    booking_id = str(uuid.uuid4())
+    try:
+        await reserve_slot(db, master_id, booking_start, booking_end, booking_id)
+    except SlotConflictError:
+        raise HTTPException(status_code=409, detail="Time slot is not available")
+    
+    return booking_id, booking_end
+
+def page_headers(next_cursor: Optional[str]) -> dict:
+    return {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+def select_fields(fields: Optional[str], model) -> Optional[List[str]]:
+    """Field names selected by a fields= query parameter (None for all fields)"""
+    
+    try:
+        return parse_fields(fields, model)
+    except InvalidFieldsError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def read_page(
+    collection,
+    query: dict,
+    sort_field: str,
+    direction: int,
+    limit: int,
+    cursor: Optional[str],
+    fields: Optional[List[str]] = None
+):
+    """One keyset page for a list endpoint and its headers (next page cursor in X-Next-Cursor)"""
+    
+    try:
+        docs, next_cursor = await fetch_page(
+            collection, query, sort_field, direction, limit, cursor,
+            projection(fields, sort_field)
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return docs, page_headers(next_cursor)
+
 # Create FastAPI app
 app = FastAPI(title="Slotta API", version="1.0.0")
 api_router = APIRouter(prefix="/api")
 
+def duplicate_master_error(e: DuplicateKeyError) -> HTTPException:
+    """400 for a master insert that lost a race on the unique email or booking slug"""
+    
+    if 'email' in (e.details or {}).get('keyPattern', {}):
+        return HTTPException(status_code=400, detail="Email already registered")
+    return HTTPException(status_code=400, detail="Booking slug already taken")
+
 # ============================================================================
 # AUTHENTICATION ENDPOINTS
 # ============================================================================
@@ -112,7 +217,11 @@ async def register_master(master_input: MasterCreate):
     master_data['password_hash'] = hash_password(password)
     
     master = Master(**master_data)
-    await db.masters.insert_one(master.model_dump())
+    try:
+        await db.masters.insert_one(master.model_dump())
+    except DuplicateKeyError as e:
+        # Registered concurrently (masters.email and booking_slug are unique)
+        raise duplicate_master_error(e)
     
     # Generate token
     token = create_token(master.id, master.email)
@@ -168,13 +277,21 @@ async def get_current_user(current_master: dict = Depends(get_current_master)):
 async def create_master(master_input: MasterCreate):
     """Create a new master (beauty professional)"""
     
+    # Check if email already exists
+    existing_email = await db.masters.find_one({"email": master_input.email})
+    if existing_email:
+        raise HTTPException(status_code=400, detail="Email already registered")
+    
     # Check if slug is unique
     existing = await db.masters.find_one({"booking_slug": master_input.booking_slug})
     if existing:
         raise HTTPException(status_code=400, detail="Booking slug already taken")
     
     master = Master(**master_input.model_dump())
-    await db.masters.insert_one(master.model_dump())
+    try:
+        await db.masters.insert_one(master.model_dump())
+    except DuplicateKeyError as e:
+        raise duplicate_master_error(e)
     
     logger.info(f"✅ Master created: {master.name} ({master.booking_slug})")
     return master
@@ -183,7 +300,7 @@ async def create_master(master_input: MasterCreate):
 async def get_master_by_slug(booking_slug: str):
     """Get master by booking slug"""
     
-    master = await db.masters.find_one({"booking_slug": booking_slug}, {"_id": 0})
+    master = await doc_cache.get_master_by_slug(db, booking_slug)
     if not master:
         raise HTTPException(status_code=404, detail="Master not found")
     
@@ -193,7 +310,7 @@ async def get_master_by_slug(booking_slug: str):
 async def get_master(master_id: str):
     """Get master by ID"""
     
-    master = await db.masters.find_one({"id": master_id}, {"_id": 0})
+    master = await doc_cache.get_master(db, master_id)
     if not master:
         raise HTTPException(status_code=404, detail="Master not found")
     
@@ -219,56 +336,77 @@ async def create_service(service_input: ServiceCreate):
     )
     
     await db.services.insert_one(service.model_dump())
+    doc_cache.invalidate_service(service.id, service.master_id)
     
     logger.info(f"✅ Service created: {service.name} - €{service.price} (Slotta: €{service.base_slotta})")
     return service
 
 @api_router.get("/services/master/{master_id}", response_model=List[Service])
-async def get_master_services(master_id: str, active_only: bool = True):
-    """Get all services for a master"""
+async def get_master_services(
+    master_id: str,
+    active_only: bool = True,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get a page of services for a master, oldest first (next page cursor in X-Next-Cursor)"""
+    
+    selected = select_fields(fields, Service)
+    variant = (active_only, limit, cursor)
+    page = doc_cache.get_service_list(master_id, variant)
+    if page is None:
+        query = {"master_id": master_id}
+        if active_only:
+            query["active"] = True
+        try:
+            page = await fetch_page(db.services, query, "created_at", 1, limit, cursor)
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        doc_cache.set_service_list(master_id, variant, page)
     
-    query = {"master_id": master_id}
-    if active_only:
-        query["active"] = True
+    services, next_cursor = page
+    return trusted_response(services, Service, page_headers(next_cursor), selected)
+
+@api_router.post("/services/batch-get", response_model=List[Service])
+async def batch_get_services(request: BatchGetRequest, fields: Optional[str] = None):
+    """Get services by ID in one query, in the order given (unknown IDs are skipped)"""
     
-    services = await db.services.find(query, {"_id": 0}).to_list(100)
-    return services
+    selected = select_fields(fields, Service)
+    services = await batch_get(db.services, request.ids, selected)
+    return trusted_response(services, Service, fields=selected)
 
 @api_router.get("/services/{service_id}", response_model=Service)
-async def get_service(service_id: str):
+async def get_service(service_id: str, fields: Optional[str] = None):
     """Get service by ID"""
     
-    service = await db.services.find_one({"id": service_id}, {"_id": 0})
+    selected = select_fields(fields, Service)
+    service = await doc_cache.get_service(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
-    return service
+    return trusted_document(service, Service, selected)
 
 @api_router.put("/services/{service_id}", response_model=Service)
 async def update_service(service_id: str, service_update: ServiceCreate):
     """Update a service"""
     
-    # Check if service exists
-    existing = await db.services.find_one({"id": service_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Service not found")
-    
     # Calculate new base Slotta
     base_slotta = SlottaEngine.calculate_base_slotta(
         service_update.price,
         service_update.duration_minutes
     )
     
-    # Update service
+    # Update service, getting the old version back for its previous master
     update_data = service_update.model_dump()
     update_data['base_slotta'] = base_slotta
     
-    await db.services.update_one(
-        {"id": service_id},
-        {"$set": update_data}
-    )
+    existing = await set_fields(db.services, service_id, update_data, ReturnDocument.BEFORE)
+    if not existing:
+        raise HTTPException(status_code=404, detail="Service not found")
+    doc_cache.invalidate_service(service_id, existing['master_id'])
+    doc_cache.invalidate_service(service_id, update_data['master_id'])
     
-    updated_service = await db.services.find_one({"id": service_id}, {"_id": 0})
+    updated_service = {**existing, **update_data}
     
     logger.info(f"✅ Service updated: {service_id}")
     return updated_service
@@ -277,16 +415,11 @@ async def update_service(service_id: str, service_update: ServiceCreate):
 async def delete_service(service_id: str):
     """Delete a service"""
     
-    # Check if service exists
-    existing = await db.services.find_one({"id": service_id}, {"_id": 0})
+    # Soft delete by setting active = false
+    existing = await set_fields(db.services, service_id, {"active": False})
     if not existing:
         raise HTTPException(status_code=404, detail="Service not found")
-    
-    # Soft delete by setting active = false
-    await db.services.update_one(
-        {"id": service_id},
-        {"$set": {"active": False}}
-    )
+    doc_cache.invalidate_service(service_id, existing['master_id'])
     
     logger.info(f"✅ Service deleted: {service_id}")
     return {"message": "Service deleted successfully"}
@@ -295,7 +428,7 @@ async def delete_service(service_id: str):
 async def get_service(service_id: str):
     """Get a service by ID"""
     
-    service = await db.services.find_one({"id": service_id}, {"_id": 0})
+    service = await doc_cache.get_service(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     
@@ -305,19 +438,11 @@ async def get_service(service_id: str):
 async def update_master(master_id: str, master_data: dict):
     """Update master profile"""
     
-    # Check if master exists
-    existing = await db.masters.find_one({"id": master_id}, {"_id": 0})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Master not found")
-    
-    # Update master
     master_data['updated_at'] = datetime.utcnow()
-    await db.masters.update_one(
-        {"id": master_id},
-        {"$set": master_data}
-    )
-    
-    updated_master = await db.masters.find_one({"id": master_id}, {"_id": 0})
+    updated_master = await set_fields(db.masters, master_id, master_data)
+    if not updated_master:
+        raise HTTPException(status_code=404, detail="Master not found")
+    doc_cache.invalidate_master(master_id)
     
     logger.info(f"✅ Master updated: {master_id}")
     return updated_master
@@ -338,20 +463,34 @@ async def create_client(client_input: ClientCreate):
         return Client(**existing)
     
     client = Client(**client_input.model_dump())
-    await db.clients.insert_one(client.model_dump())
+    try:
+        await db.clients.insert_one(client.model_dump())
+    except DuplicateKeyError:
+        # Created by a concurrent request (clients.email is unique)
+        existing = await db.clients.find_one({"email": client_input.email}, {"_id": 0})
+        return Client(**existing)
     
     logger.info(f"✅ Client created: {client.name} ({client.email})")
     return client
 
+@api_router.post("/clients/batch-get", response_model=List[Client])
+async def batch_get_clients(request: BatchGetRequest, fields: Optional[str] = None):
+    """Get clients by ID in one query, in the order given (unknown IDs are skipped)"""
+    
+    selected = select_fields(fields, Client)
+    clients = await batch_get(db.clients, request.ids, selected)
+    return trusted_response(clients, Client, fields=selected)
+
 @api_router.get("/clients/{client_id}", response_model=Client)
-async def get_client(client_id: str):
+async def get_client(client_id: str, fields: Optional[str] = None):
     """Get client by ID"""
     
-    client = await db.clients.find_one({"id": client_id}, {"_id": 0})
+    selected = select_fields(fields, Client)
+    client = await db.clients.find_one({"id": client_id}, projection(selected))
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    return client
+    return trusted_document(client, Client, selected)
 
 @api_router.get("/clients/email/{email}", response_model=Client)
 async def get_client_by_email(email: str):
@@ -363,20 +502,25 @@ async def get_client_by_email(email: str):
     
     return client
 
-@api_router.get("/clients/master/{master_id}", response_model=List[Client])
-async def get_master_clients(master_id: str):
-    """Get all clients who have booked with this master"""
-    
-    # Find all bookings for this master
-    bookings = await db.bookings.find({"master_id": master_id}, {"client_id": 1}).to_list(10000)
-    client_ids = list(set(b['client_id'] for b in bookings))
+@api_router.get("/clients/master/{master_id}", response_model=List[MasterClient])
+async def get_master_clients(
+    master_id: str,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get a page of clients who have booked with this master, most recent booking first
     
-    if not client_ids:
-        return []
+    Each client carries its bookings, visits and no-shows with this master.
+    The next page cursor is in X-Next-Cursor.
+    """
     
-    # Get all clients
-    clients = await db.clients.find({"id": {"$in": client_ids}}, {"_id": 0}).to_list(1000)
-    return clients
+    selected = select_fields(fields, MasterClient)
+    try:
+        clients, next_cursor = await master_clients_page(db, master_id, limit, cursor, selected)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return trusted_response(clients, MasterClient, page_headers(next_cursor), selected)
 
 # ============================================================================
 # BOOKING ENDPOINTS  
@@ -386,59 +530,77 @@ async def get_master_clients(master_id: str):
 async def create_booking(booking_input: BookingCreate):
     """Create a new booking"""
     
-    # Get service details
-    service = await db.services.find_one({"id": booking_input.service_id}, {"_id": 0})
+    # Get service and client details (batched with concurrent requests' lookups)
+    service, client = await asyncio.gather(
+        doc_cache.get_service(db, booking_input.service_id),
+        doc_cache.get_client(db, booking_input.client_id)
+    )
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    
-    # Get client details
-    client = await db.clients.find_one({"id": booking_input.client_id}, {"_id": 0})
     if not client:
         raise HTTPException(status_code=404, detail="Client not found")
     
-    # Calculate Slotta
-    slotta_amount = SlottaEngine.calculate_slotta(
-        price=service['price'],
-        duration_minutes=service['duration_minutes'],
-        client_reliability=client['reliability'],
-        no_shows=client['no_shows'],
-        cancellations=client['cancellations']
-    )
-    
-    # Calculate risk score
-    risk_score = SlottaEngine.calculate_risk_score(
-        total_bookings=client['total_bookings'],
-        completed_bookings=client['completed_bookings'],
-        no_shows=client['no_shows'],
-        cancellations=client['cancellations']
-    )
-    
-    # Calculate reschedule deadline (24 hours before)
-    reschedule_deadline = booking_input.booking_date - timedelta(hours=24)
-    
-    # Create booking
-    booking = Booking(
-        **booking_input.model_dump(),
-        duration_minutes=service['duration_minutes'],
-        service_price=service['price'],
-        slotta_amount=slotta_amount,
-        risk_score=risk_score,
-        reschedule_deadline=reschedule_deadline
+    # Reserve the slot
+    booking_id, booking_end = await reserve_booking_slot(
+        booking_input.master_id, booking_input.booking_date, service['duration_minutes']
     )
     
-    await db.bookings.insert_one(booking.model_dump())
+    # Until the booking is stored, any failure frees the slot
+    stored = False
+    try:
+        # Calculate Slotta
+        slotta_amount = SlottaEngine.calculate_slotta(
+            price=service['price'],
+            duration_minutes=service['duration_minutes'],
+            client_reliability=client['reliability'],
+            no_shows=client['no_shows'],
+            cancellations=client['cancellations']
+        )
+        
+        # Calculate risk score
+        risk_score = SlottaEngine.calculate_risk_score(
+            total_bookings=client['total_bookings'],
+            completed_bookings=client['completed_bookings'],
+            no_shows=client['no_shows'],
+            cancellations=client['cancellations']
+        )
+        
+        # Calculate reschedule deadline (24 hours before)
+        reschedule_deadline = booking_input.booking_date - timedelta(hours=24)
+        
+        # Create booking
+        booking = Booking(
+            **booking_input.model_dump(),
+            id=booking_id,
+            duration_minutes=service['duration_minutes'],
+            service_price=service['price'],
+            slotta_amount=slotta_amount,
+            risk_score=risk_score,
+            reschedule_deadline=reschedule_deadline
+        )
+        
+        await db.bookings.insert_one(booking.model_dump())
+        stored = True
+    finally:
+        if not stored:
+            await release_reservation(db, booking_id)
+    await confirm_reservation(db, booking_id, booking_end)
+    availability_index.invalidate(booking.master_id)
+    await record_booking_created(db, booking.model_dump())
     
     # Update client stats
     await db.clients.update_one(
         {"id": booking_input.client_id},
         {"$inc": {"total_bookings": 1}}
     )
+    doc_cache.forget_client(booking_input.client_id)
     
     # Get master for notifications
-    master = await db.masters.find_one({"id": booking_input.master_id}, {"_id": 0})
+    master = await doc_cache.get_master(db, booking_input.master_id)
     
-    # Send notifications
-    await email_service.send_booking_confirmation(
+    # Queue notifications (sent by the outbox workers)
+    await notification_outbox.enqueue(
+        db, "email.booking_confirmation",
         to_email=client['email'],
         client_name=client['name'],
         master_name=master['name'],
@@ -448,7 +610,8 @@ async def create_booking(booking_input: BookingCreate):
         slotta_amount=slotta_amount
     )
     
-    await email_service.send_master_new_booking(
+    await notification_outbox.enqueue(
+        db, "email.master_new_booking",
         to_email=master['email'],
         master_name=master['name'],
         client_name=client['name'],
@@ -459,7 +622,8 @@ async def create_booking(booking_input: BookingCreate):
     
     # Telegram notification if enabled
     if master.get('telegram_chat_id'):
-        await telegram_service.notify_new_booking(
+        await notification_outbox.enqueue(
+            db, "telegram.new_booking",
             chat_id=master['telegram_chat_id'],
             client_name=client['name'],
             service_name=service['name'],
@@ -470,113 +634,155 @@ async def create_booking(booking_input: BookingCreate):
     logger.info(f"✅ Booking created: {client['name']} → {master['name']} (Slotta: €{slotta_amount})")
     return booking
 
+def payment_idempotency_key(booking_input: BookingCreateWithPayment, amount: float, cancelled: int) -> str:
+    """Stripe idempotency key for a booking, the same for every retry of it
+    
+    Built from the booking inputs, so a client retry after a lost response
+    gets back the hold it already placed. cancelled (the slot's cancelled
+    holds so far) changes once a hold is cancelled, so rebooking the slot
+    places a new hold instead of returning the cancelled one.
+    """
+    
+    parts = [
+        str(cancelled),
+        booking_input.master_id,
+        booking_input.service_id,
+        to_naive_utc(booking_input.booking_date).isoformat(),
+        booking_input.client_email.lower(),
+        booking_input.payment_method_id,
+        f"{amount:.2f}"
+    ]
+    return "slotta-hold-" + hashlib.sha256("|".join(parts).encode()).hexdigest()[:32]
+
+async def release_hold(master_id: str, booking_date: datetime, payment_intent_id: str):
+    """Cancel a booking's Stripe hold; the slot's next booking gets a new idempotency key"""
+    
+    await count_cancelled_hold(db, master_id, to_naive_utc(booking_date))
+    await stripe_service.cancel_payment(payment_intent_id)
+
 @api_router.post("/bookings/with-payment")
 async def create_booking_with_payment(booking_input: BookingCreateWithPayment):
     """Create booking with Stripe payment authorization (public booking flow)"""
     
-    # Get service
-    service = await db.services.find_one({"id": booking_input.service_id}, {"_id": 0})
+    # Get service and master (batched with concurrent requests' lookups)
+    service, master = await asyncio.gather(
+        doc_cache.get_service(db, booking_input.service_id),
+        doc_cache.get_master(db, booking_input.master_id)
+    )
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    
-    # Get master
-    master = await db.masters.find_one({"id": booking_input.master_id}, {"_id": 0})
     if not master:
         raise HTTPException(status_code=404, detail="Master not found")
     
-    # Get or create client
-    client = await db.clients.find_one({"email": booking_input.client_email}, {"_id": 0})
-    if not client:
-        # Create new client
-        new_client = Client(
-            email=booking_input.client_email,
-            name=booking_input.client_name,
-            phone=booking_input.client_phone,
-            reliability=ClientReliability.NEW
-        )
-        await db.clients.insert_one(new_client.model_dump())
-        client = new_client.model_dump()
-        logger.info(f"✅ New client created: {client['name']} ({client['email']})")
-    
-    # Calculate Slotta amount
-    slotta_amount = SlottaEngine.calculate_slotta(
-        price=service['price'],
-        duration_minutes=service['duration_minutes'],
-        client_reliability=client.get('reliability', 'new'),
-        no_shows=client.get('no_shows', 0),
-        cancellations=client.get('cancellations', 0)
-    )
-    
-    # Calculate risk score
-    risk_score = SlottaEngine.calculate_risk_score(
-        total_bookings=client.get('total_bookings', 0),
-        completed_bookings=client.get('completed_bookings', 0),
-        no_shows=client.get('no_shows', 0),
-        cancellations=client.get('cancellations', 0)
-    )
-    
-    # Create Stripe payment intent with hold
-    payment_intent = await stripe_service.create_payment_intent(
-        amount=slotta_amount,
-        customer_email=booking_input.client_email,
-        metadata={
-            'master_id': booking_input.master_id,
-            'service_id': booking_input.service_id,
-            'client_email': booking_input.client_email,
-            'booking_type': 'slotta_hold'
-        }
+    # Reserve the slot before touching Stripe so conflicting requests fail fast
+    booking_id, booking_end = await reserve_booking_slot(
+        booking_input.master_id, booking_input.booking_date, service['duration_minutes']
     )
     
-    if not payment_intent:
-        raise HTTPException(status_code=500, detail="Failed to create payment authorization")
-    
-    # Confirm the payment intent with the payment method
-    if stripe_service.enabled:
-        import stripe
+    # Until the booking is stored, any failure frees the slot and the hold
+    stored = False
+    payment_intent = None
+    try:
+        # Get or create client
+        client = await db.clients.find_one({"email": booking_input.client_email}, {"_id": 0})
+        if not client:
+            # Create new client
+            new_client = Client(
+                email=booking_input.client_email,
+                name=booking_input.client_name,
+                phone=booking_input.client_phone,
+                reliability=ClientReliability.NEW
+            )
+            try:
+                await db.clients.insert_one(new_client.model_dump())
+                client = new_client.model_dump()
+                logger.info(f"✅ New client created: {client['name']} ({client['email']})")
+            except DuplicateKeyError:
+                # Created by a concurrent booking (clients.email is unique)
+                client = await db.clients.find_one({"email": booking_input.client_email}, {"_id": 0})
+        
+        # Calculate Slotta amount
+        slotta_amount = SlottaEngine.calculate_slotta(
+            price=service['price'],
+            duration_minutes=service['duration_minutes'],
+            client_reliability=client.get('reliability', 'new'),
+            no_shows=client.get('no_shows', 0),
+            cancellations=client.get('cancellations', 0)
+        )
+        
+        # Calculate risk score
+        risk_score = SlottaEngine.calculate_risk_score(
+            total_bookings=client.get('total_bookings', 0),
+            completed_bookings=client.get('completed_bookings', 0),
+            no_shows=client.get('no_shows', 0),
+            cancellations=client.get('cancellations', 0)
+        )
+        
+        # Create and confirm the Stripe hold in one round trip
+        cancelled = await cancelled_holds(db, booking_input.master_id, to_naive_utc(booking_input.booking_date))
         try:
-            stripe.PaymentIntent.confirm(
-                payment_intent['id'],
-                payment_method=booking_input.payment_method_id
+            payment_intent = await stripe_service.authorize_payment(
+                amount=slotta_amount,
+                customer_email=booking_input.client_email,
+                payment_method_id=booking_input.payment_method_id,
+                metadata={
+                    'master_id': booking_input.master_id,
+                    'service_id': booking_input.service_id,
+                    'client_email': booking_input.client_email,
+                    'booking_type': 'slotta_hold'
+                },
+                idempotency_key=payment_idempotency_key(booking_input, slotta_amount, cancelled)
             )
-            logger.info(f"✅ Payment authorized: {payment_intent['id']}")
-        except Exception as e:
-            logger.error(f"❌ Payment authorization failed: {e}")
+        except PaymentAuthorizationError as e:
             raise HTTPException(status_code=400, detail=f"Payment authorization failed: {str(e)}")
-    
-    # Calculate reschedule deadline
-    reschedule_deadline = booking_input.booking_date - timedelta(hours=24)
-    
-    # Create booking
-    booking = Booking(
-        master_id=booking_input.master_id,
-        client_id=client['id'],
-        service_id=booking_input.service_id,
-        booking_date=booking_input.booking_date,
-        duration_minutes=service['duration_minutes'],
-        service_price=service['price'],
-        slotta_amount=slotta_amount,
-        risk_score=risk_score,
-        reschedule_deadline=reschedule_deadline,
-        stripe_payment_intent_id=payment_intent['id'],
-        payment_authorized=True,
-        status=BookingStatus.CONFIRMED,
-        notes=booking_input.notes
-    )
-    
-    await db.bookings.insert_one(booking.model_dump())
+        
+        # Calculate reschedule deadline
+        reschedule_deadline = booking_input.booking_date - timedelta(hours=24)
+        
+        # Create booking
+        booking = Booking(
+            id=booking_id,
+            master_id=booking_input.master_id,
+            client_id=client['id'],
+            service_id=booking_input.service_id,
+            booking_date=booking_input.booking_date,
+            duration_minutes=service['duration_minutes'],
+            service_price=service['price'],
+            slotta_amount=slotta_amount,
+            risk_score=risk_score,
+            reschedule_deadline=reschedule_deadline,
+            stripe_payment_intent_id=payment_intent['id'],
+            payment_authorized=True,
+            status=BookingStatus.CONFIRMED,
+            notes=booking_input.notes
+        )
+        
+        await db.bookings.insert_one(booking.model_dump())
+        stored = True
+    finally:
+        if not stored:
+            await release_reservation(db, booking_id)
+            if payment_intent:
+                await release_hold(booking_input.master_id, booking_input.booking_date, payment_intent['id'])
+    await confirm_reservation(db, booking_id, booking_end)
+    availability_index.invalidate(booking.master_id)
+    await record_booking_created(db, booking.model_dump())
+    await record_hold_change(db, booking.master_id, None, booking.status, booking.slotta_amount)
     
     # Update client stats
     await db.clients.update_one(
         {"id": client['id']},
         {"$inc": {"total_bookings": 1}}
     )
+    doc_cache.forget_client(client['id'])
     
-    # Send notifications
+    # Queue notifications (sent by the outbox workers)
     booking_date_str = booking_input.booking_date.strftime("%A, %B %d, %Y")
     booking_time_str = booking_input.booking_date.strftime("%I:%M %p")
     
     # Email to client
-    await email_service.send_booking_confirmation(
+    await notification_outbox.enqueue(
+        db, "email.booking_confirmation",
         to_email=booking_input.client_email,
         client_name=booking_input.client_name,
         master_name=master['name'],
@@ -587,7 +793,8 @@ async def create_booking_with_payment(booking_input: BookingCreateWithPayment):
     )
     
     # Email to master
-    await email_service.send_master_new_booking(
+    await notification_outbox.enqueue(
+        db, "email.master_new_booking",
         to_email=master['email'],
         master_name=master['name'],
         client_name=booking_input.client_name,
@@ -598,7 +805,8 @@ async def create_booking_with_payment(booking_input: BookingCreateWithPayment):
     
     # Telegram notification if enabled
     if master.get('telegram_chat_id'):
-        await telegram_service.send_new_booking_alert(
+        await notification_outbox.enqueue(
+            db, "telegram.new_booking_alert",
             chat_id=master['telegram_chat_id'],
             client_name=booking_input.client_name,
             service_name=service['name'],
@@ -610,7 +818,8 @@ async def create_booking_with_payment(booking_input: BookingCreateWithPayment):
     # Create Google Calendar event if connected
     if master.get('google_calendar_token'):
         end_time = booking_input.booking_date + timedelta(minutes=service['duration_minutes'])
-        await google_calendar_service.create_event(
+        await notification_outbox.enqueue(
+            db, "calendar.create_event",
             access_token=master['google_calendar_token'],
             summary=f"{service['name']} - {booking_input.client_name}",
             start_time=booking_input.booking_date,
@@ -628,55 +837,94 @@ async def create_booking_with_payment(booking_input: BookingCreateWithPayment):
         "message": "Booking confirmed! Payment hold authorized."
     }
 
+@api_router.post("/bookings/batch-get", response_model=List[Booking])
+async def batch_get_bookings(request: BatchGetRequest, fields: Optional[str] = None):
+    """Get bookings by ID in one query, in the order given (unknown IDs are skipped)"""
+    
+    selected = select_fields(fields, Booking)
+    bookings = await batch_get(db.bookings, request.ids, selected)
+    return trusted_response(bookings, Booking, fields=selected)
+
 @api_router.get("/bookings/{booking_id}", response_model=Booking)
-async def get_booking(booking_id: str):
+async def get_booking(booking_id: str, fields: Optional[str] = None):
     """Get booking by ID"""
     
-    booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
+    selected = select_fields(fields, Booking)
+    booking = await db.bookings.find_one({"id": booking_id}, projection(selected))
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    return booking
+    return trusted_document(booking, Booking, selected)
 
 @api_router.get("/bookings/master/{master_id}", response_model=List[Booking])
-async def get_master_bookings(master_id: str, status: Optional[BookingStatus] = None):
-    """Get all bookings for a master"""
+async def get_master_bookings(
+    master_id: str,
+    status: Optional[BookingStatus] = None,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get a page of bookings for a master, newest first (next page cursor in X-Next-Cursor)"""
     
+    selected = select_fields(fields, Booking)
     query = {"master_id": master_id}
     if status:
         query["status"] = status
     
-    bookings = await db.bookings.find(query, {"_id": 0}).sort("booking_date", -1).to_list(1000)
-    return bookings
+    bookings, headers = await read_page(db.bookings, query, "booking_date", -1, limit, cursor, selected)
+    return trusted_response(bookings, Booking, headers, selected)
 
 @api_router.get("/bookings/client/{client_id}", response_model=List[Booking])
-async def get_client_bookings(client_id: str):
-    """Get all bookings for a client"""
+async def get_client_bookings(
+    client_id: str,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
+    """Get a page of bookings for a client, newest first (next page cursor in X-Next-Cursor)"""
     
-    bookings = await db.bookings.find(
-        {"client_id": client_id},
-        {"_id": 0}
-    ).sort("booking_date", -1).to_list(1000)
-    return bookings
+    selected = select_fields(fields, Booking)
+    bookings, headers = await read_page(
+        db.bookings, {"client_id": client_id}, "booking_date", -1, limit, cursor, selected
+    )
+    return trusted_response(bookings, Booking, headers, selected)
 
 @api_router.get("/bookings/client/email/{email}")
-async def get_client_bookings_by_email(email: str):
-    """Get all bookings for a client by email"""
+async def get_client_bookings_by_email(
+    email: str,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Get a page of bookings for a client by email, newest first (next page cursor in X-Next-Cursor)
     
-    client = await db.clients.find_one({"email": email}, {"_id": 0})
+    The default page is the old 1000-booking list, which the client portal
+    reads without following the cursor.
+    """
+    
+    client = await db.clients.find_one({"email": email}, {"_id": 0, "id": 1})
     if not client:
         return []
     
-    bookings = await db.bookings.find(
-        {"client_id": client['id']},
-        {"_id": 0}
-    ).sort("booking_date", -1).to_list(1000)
+    bookings, headers = await read_page(db.bookings, {"client_id": client['id']}, "booking_date", -1, limit, cursor)
+    
+    # Enrich with service and master details: one $in query per collection
+    service_ids = list({b['service_id'] for b in bookings})
+    master_ids = list({b['master_id'] for b in bookings})
+    services = await db.services.find(
+        {"id": {"$in": service_ids}},
+        {"_id": 0, "id": 1, "name": 1, "price": 1}
+    ).to_list(None) if service_ids else []
+    masters = await db.masters.find(
+        {"id": {"$in": master_ids}},
+        {"_id": 0, "id": 1, "name": 1, "location": 1}
+    ).to_list(None) if master_ids else []
+    services_by_id = {s['id']: s for s in services}
+    masters_by_id = {m['id']: m for m in masters}
     
-    # Enrich with service and master details
     enriched = []
     for booking in bookings:
-        service = await db.services.find_one({"id": booking['service_id']}, {"_id": 0, "name": 1, "price": 1})
-        master = await db.masters.find_one({"id": booking['master_id']}, {"_id": 0, "name": 1, "location": 1})
+        service = services_by_id.get(booking['service_id'])
+        master = masters_by_id.get(booking['master_id'])
         enriched.append({
             **booking,
             "service_name": service['name'] if service else "Unknown",
@@ -685,7 +933,7 @@ async def get_client_bookings_by_email(email: str):
             "master_location": master.get('location') if master else None
         })
     
-    return enriched
+    return FastJSONResponse(enriched, headers=headers)
 
 @api_router.put("/bookings/{booking_id}/cancel")
 async def cancel_booking(booking_id: str):
@@ -704,53 +952,54 @@ async def cancel_booking(booking_id: str):
     
     # Release payment hold
     if booking.get('stripe_payment_intent_id'):
-        await stripe_service.cancel_payment(booking['stripe_payment_intent_id'])
+        await release_hold(booking['master_id'], booking['booking_date'], booking['stripe_payment_intent_id'])
     
     # Update booking status
-    await db.bookings.update_one(
-        {"id": booking_id},
+    result = await db.bookings.update_one(
+        {"id": booking_id, "status": booking['status']},
         {"$set": {"status": BookingStatus.CANCELLED, "updated_at": datetime.utcnow()}}
     )
+    if result.matched_count == 0:
+        raise HTTPException(status_code=409, detail="Booking was updated concurrently, please retry")
+    await record_status_change(db, booking, BookingStatus.CANCELLED)
+    await record_hold_change(db, booking['master_id'], booking['status'], BookingStatus.CANCELLED, booking.get('slotta_amount'))
+    await release_reservation(db, booking_id)
+    availability_index.invalidate(booking['master_id'])
     
     # Update client stats
     await db.clients.update_one(
         {"id": booking['client_id']},
         {"$inc": {"cancellations": 1}}
     )
+    doc_cache.forget_client(booking['client_id'])
     
     logger.info(f"✅ Booking cancelled: {booking_id}")
     return {"message": "Booking cancelled successfully", "payment_released": True}
 
+async def transition_error(booking_id: str, new_status: BookingStatus) -> HTTPException:
+    """Why transition_booking matched nothing: no such booking, or it is no longer open"""
+    
+    booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0, "status": 1})
+    if booking is None:
+        return HTTPException(status_code=404, detail="Booking not found")
+    return HTTPException(status_code=409, detail=f"Booking is {booking['status']} and cannot be marked {new_status.value}")
+
 @api_router.put("/bookings/{booking_id}/complete")
 async def mark_booking_complete(booking_id: str):
     """Mark booking as completed"""
     
-    booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
+    # Update booking status, getting the previous version back
+    booking = await transition_booking(db, booking_id, BookingStatus.COMPLETED)
     if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    # Update booking status
-    await db.bookings.update_one(
-        {"id": booking_id},
-        {"$set": {"status": BookingStatus.COMPLETED, "updated_at": datetime.utcnow()}}
-    )
+        raise await transition_error(booking_id, BookingStatus.COMPLETED)
+    await record_status_change(db, booking, BookingStatus.COMPLETED)
+    await record_hold_change(db, booking['master_id'], booking['status'], BookingStatus.COMPLETED, booking.get('slotta_amount'))
+    availability_index.invalidate(booking['master_id'])
     
-    # Update client stats
-    await db.clients.update_one(
-        {"id": booking['client_id']},
-        {"$inc": {"completed_bookings": 1}}
-    )
-    
-    # Update client reliability
-    client = await db.clients.find_one({"id": booking['client_id']}, {"_id": 0})
-    new_reliability = SlottaEngine.determine_reliability(
-        total_bookings=client['total_bookings'],
-        no_shows=client['no_shows']
-    )
-    await db.clients.update_one(
-        {"id": booking['client_id']},
-        {"$set": {"reliability": new_reliability}}
-    )
+    # Update client stats and reliability
+    client = await update_client_stats(db, booking['client_id'], {"completed_bookings": 1})
+    if client:
+        doc_cache.remember_client(client)
     
     # Release payment hold if exists
     if booking.get('stripe_payment_intent_id'):
@@ -761,87 +1010,86 @@ async def mark_booking_complete(booking_id: str):
 
 @api_router.put("/bookings/{booking_id}/no-show")
 async def mark_booking_no_show(booking_id: str):
-    """Mark booking as no-show and capture Slotta"""
-    
-    booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    # Calculate split
-    split = SlottaEngine.calculate_no_show_split(booking['slotta_amount'])
-    
-    # Update booking status
-    await db.bookings.update_one(
-        {"id": booking_id},
-        {"$set": {"status": BookingStatus.NO_SHOW, "updated_at": datetime.utcnow()}}
-    )
-    
-    # Update client stats
-    await db.clients.update_one(
-        {"id": booking['client_id']},
-        {
-            "$inc": {
-                "no_shows": 1,
-                "wallet_balance": split['client_wallet_credit']
-            }
-        }
-    )
-    
-    # Update client reliability
-    client = await db.clients.find_one({"id": booking['client_id']}, {"_id": 0})
-    new_reliability = SlottaEngine.determine_reliability(
-        total_bookings=client['total_bookings'],
-        no_shows=client['no_shows'] + 1
-    )
-    await db.clients.update_one(
-        {"id": booking['client_id']},
-        {"$set": {"reliability": new_reliability}}
-    )
-    
-    # Capture payment if exists
-    if booking.get('stripe_payment_intent_id'):
-        await stripe_service.capture_payment(
-            booking['stripe_payment_intent_id'],
-            booking['slotta_amount']
-        )
-    
-    # Create transactions
-    master_transaction = Transaction(
-        booking_id=booking_id,
-        master_id=booking['master_id'],
-        type="wallet_credit",
-        amount=split['master_compensation'],
-        description=f"No-show compensation for booking {booking_id}"
-    )
-    await db.transactions.insert_one(master_transaction.model_dump())
-    
-    client_transaction = Transaction(
-        booking_id=booking_id,
-        client_id=booking['client_id'],
-        type="wallet_credit",
-        amount=split['client_wallet_credit'],
-        description="Wallet credit from no-show"
-    )
-    await db.transactions.insert_one(client_transaction.model_dump())
-    
-    # Send notifications
-    master = await db.masters.find_one({"id": booking['master_id']}, {"_id": 0})
-    client_doc = await db.clients.find_one({"id": booking['client_id']}, {"_id": 0})
-    
-    await email_service.send_no_show_alert(
-        to_email=master['email'],
-        master_name=master['name'],
-        client_name=client_doc['name'],
-        compensation=split['master_compensation'],
-        wallet_credit=split['client_wallet_credit']
-    )
-    
-    if master.get('telegram_chat_id'):
-        await telegram_service.notify_no_show(
-            chat_id=master['telegram_chat_id'],
-            client_name=client_doc['name'],
-            compensation=split['master_compensation']
+    """Mark booking as no-show and capture Slotta
+    
+    Every database write commits in one transaction, together with the
+    outbox jobs for the Stripe capture and the master's alerts. Those run
+    after the commit and are retried until they succeed.
+    """
+    
+    async def writes(session):
+        # Update booking status, getting the previous version back
+        booking = await transition_booking(db, booking_id, BookingStatus.NO_SHOW, session)
+        if not booking:
+            return None
+        
+        # Calculate split
+        split = SlottaEngine.calculate_no_show_split(booking['slotta_amount'])
+        
+        # Update client stats and reliability (from the incremented no_shows)
+        client = await update_client_stats(db, booking['client_id'], {
+            "no_shows": 1,
+            "wallet_balance": split['client_wallet_credit']
+        }, session)
+        
+        # Create both transactions in one insert and credit the master's balance
+        master_transaction = Transaction(
+            booking_id=booking_id,
+            master_id=booking['master_id'],
+            type="wallet_credit",
+            amount=split['master_compensation'],
+            description=f"No-show compensation for booking {booking_id}"
+        ).model_dump()
+        client_transaction = Transaction(
+            booking_id=booking_id,
+            client_id=booking['client_id'],
+            type="wallet_credit",
+            amount=split['client_wallet_credit'],
+            description="Wallet credit from no-show"
+        ).model_dump()
+        await insert_transactions(db, [master_transaction, client_transaction], session)
+        await record_hold_change(
+            db, booking['master_id'], booking['status'], BookingStatus.NO_SHOW, booking.get('slotta_amount'), session
         )
+        await record_status_change(db, booking, BookingStatus.NO_SHOW, session)
+        await record_transaction(db, master_transaction, session)
+        
+        # Post-commit work: capture payment and notify the master
+        jobs = []
+        if booking.get('stripe_payment_intent_id'):
+            jobs.append(("stripe.capture_payment", {
+                "payment_intent_id": booking['stripe_payment_intent_id'],
+                "amount": booking['slotta_amount'],
+                "idempotency_key": f"slotta-capture-{booking_id}"
+            }))
+        master = await doc_cache.get_master(db, booking['master_id'])
+        client_name = client['name'] if client else "Unknown"
+        if master:
+            jobs.append(("email.no_show_alert", {
+                "to_email": master['email'],
+                "master_name": master['name'],
+                "client_name": client_name,
+                "compensation": split['master_compensation'],
+                "wallet_credit": split['client_wallet_credit']
+            }))
+            if master.get('telegram_chat_id'):
+                jobs.append(("telegram.no_show", {
+                    "chat_id": master['telegram_chat_id'],
+                    "client_name": client_name,
+                    "compensation": split['master_compensation']
+                }))
+        await notification_outbox.enqueue_many(db, jobs, session)
+        return booking, client, split
+    
+    result = await run_transaction(db, writes)
+    if result is None:
+        raise await transition_error(booking_id, BookingStatus.NO_SHOW)
+    booking, client, split = result
+    
+    notification_outbox.wake()
+    availability_index.invalidate(booking['master_id'])
+    if client:
+        doc_cache.remember_client(client)
     
     logger.info(f"⚠️ No-show processed: {booking_id} - Master: €{split['master_compensation']}, Client: €{split['client_wallet_credit']}")
     return {
@@ -855,36 +1103,28 @@ async def mark_booking_no_show(booking_id: str):
 # ============================================================================
 
 @api_router.get("/analytics/master/{master_id}")
-async def get_master_analytics(master_id: str):
-    """Get analytics for a master"""
-    
-    # Get all bookings
-    bookings = await db.bookings.find({"master_id": master_id}, {"_id": 0}).to_list(10000)
-    
-    # Calculate stats
-    total_bookings = len(bookings)
-    completed = len([b for b in bookings if b['status'] == BookingStatus.COMPLETED])
-    no_shows = len([b for b in bookings if b['status'] == BookingStatus.NO_SHOW])
-    
-    total_slotta_protected = sum(b.get('slotta_amount', 0) for b in bookings)
-    
-    # Get transactions
-    transactions = await db.transactions.find(
-        {"master_id": master_id},
-        {"_id": 0}
-    ).to_list(10000)
-    
-    wallet_balance = sum(t['amount'] for t in transactions if t['type'] == 'wallet_credit')
+async def get_master_analytics(
+    master_id: str,
+    date_from: Optional[datetime] = Query(None, alias="from"),
+    date_to: Optional[datetime] = Query(None, alias="to"),
+    by_service: bool = False
+):
+    """Get analytics for a master, optionally for bookings in [from, to) and per service"""
+    
+    date_from = to_naive_utc(date_from) if date_from else None
+    date_to = to_naive_utc(date_to) if date_to else None
+    
+    # Whole days are served from the rollups; anything finer aggregates bookings
+    bounds = [d for d in (date_from, date_to) if d]
+    if not by_service and all(d.time() == datetime.min.time() for d in bounds):
+        return await stats_analytics(
+            db,
+            master_id,
+            day_from=date_from.date() if date_from else None,
+            day_to=date_to.date() if date_to else None
+        )
     
-    return {
-        "total_bookings": total_bookings,
-        "completed_bookings": completed,
-        "no_shows": no_shows,
-        "no_show_rate": (no_shows / total_bookings * 100) if total_bookings > 0 else 0,
-        "time_protected_eur": total_slotta_protected,
-        "wallet_balance": wallet_balance,
-        "avg_slotta": total_slotta_protected / total_bookings if total_bookings > 0 else 0
-    }
+    return await master_analytics(db, master_id, date_from=date_from, date_to=date_to, by_service=by_service)
 
 # ============================================================================
 # WALLET / TRANSACTIONS ENDPOINTS
@@ -894,42 +1134,43 @@ async def get_master_analytics(master_id: str):
 async def get_master_wallet(master_id: str):
     """Get wallet balance and transactions for a master"""
     
-    # Get all transactions for this master
+    # Running balances from the wallet ledger (one lookup by _id)
+    wallet = await get_wallet_balance(db, master_id)
+    
+    # Last 50 transactions
     transactions = await db.transactions.find(
         {"master_id": master_id},
         {"_id": 0}
-    ).sort("created_at", -1).to_list(1000)
-    
-    # Calculate balances
-    total_credits = sum(t['amount'] for t in transactions if t.get('type') in ['wallet_credit', 'payout_received'])
-    total_payouts = sum(t['amount'] for t in transactions if t.get('type') == 'payout')
-    wallet_balance = total_credits - total_payouts
-    
-    # Get pending amount from confirmed bookings
-    confirmed_bookings = await db.bookings.find(
-        {"master_id": master_id, "status": "confirmed"},
-        {"_id": 0, "slotta_amount": 1}
-    ).to_list(10000)
-    pending_amount = sum(b.get('slotta_amount', 0) for b in confirmed_bookings)
-    
-    # Calculate lifetime earnings
-    lifetime_earnings = total_credits
+    ).sort("created_at", -1).limit(50).to_list(50)
     
     return {
-        "wallet_balance": round(wallet_balance, 2),
-        "pending_payouts": round(pending_amount, 2),
-        "lifetime_earnings": round(lifetime_earnings, 2),
-        "transactions": transactions[:50]  # Last 50 transactions
+        "wallet_balance": round(wallet['balance'], 2),
+        "pending_payouts": round(wallet['pending_holds'], 2),
+        "lifetime_earnings": round(wallet['lifetime_credits'], 2),
+        "transactions": transactions
     }
 
 @api_router.get("/transactions/master/{master_id}")
-async def get_master_transactions(master_id: str, limit: int = 50, offset: int = 0):
-    """Get paginated transactions for a master"""
+async def get_master_transactions(
+    master_id: str,
+    limit: int = Query(50, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    offset: int = Query(0, ge=0)
+):
+    """Get a page of transactions for a master, newest first
     
-    transactions = await db.transactions.find(
-        {"master_id": master_id},
-        {"_id": 0}
-    ).sort("created_at", -1).skip(offset).limit(limit).to_list(limit)
+    Follow next_cursor for further pages. offset is still accepted for
+    older clients and is ignored when a cursor is given.
+    """
+    
+    if cursor:
+        offset = 0
+    try:
+        transactions, next_cursor = await fetch_page(
+            db.transactions, {"master_id": master_id}, "created_at", -1, limit, cursor, skip=offset
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
     total_count = await db.transactions.count_documents({"master_id": master_id})
     
@@ -937,9 +1178,37 @@ async def get_master_transactions(master_id: str, limit: int = 50, offset: int =
         "transactions": transactions,
         "total_count": total_count,
         "limit": limit,
-        "offset": offset
+        "offset": offset,
+        "next_cursor": next_cursor
     }
 
+# ============================================================================
+# EXPORT ENDPOINTS
+# ============================================================================
+
+def export_response(cursor, fmt: str, fields: List[str], filename: str) -> StreamingResponse:
+    """Stream a cursor as an NDJSON or CSV attachment"""
+    
+    return StreamingResponse(
+        stream_export(cursor, fmt, fields),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{fmt}"'}
+    )
+
+@api_router.get("/export/bookings/{master_id}")
+async def export_master_bookings(master_id: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Stream every booking of a master, oldest first"""
+    
+    cursor = db.bookings.find({"master_id": master_id}, {"_id": 0}).sort([("booking_date", 1), ("id", 1)])
+    return export_response(cursor, format, list(Booking.model_fields), f"bookings-{master_id}")
+
+@api_router.get("/export/transactions/{master_id}")
+async def export_master_transactions(master_id: str, format: str = Query("ndjson", pattern="^(ndjson|csv)$")):
+    """Stream every transaction of a master, oldest first"""
+    
+    cursor = db.transactions.find({"master_id": master_id}, {"_id": 0}).sort([("created_at", 1), ("id", 1)])
+    return export_response(cursor, format, list(Transaction.model_fields), f"transactions-{master_id}")
+
 # ============================================================================
 # GOOGLE CALENDAR OAUTH
 # ============================================================================
@@ -974,6 +1243,7 @@ async def google_oauth_callback(code: str, state: str = ""):
                 "updated_at": datetime.utcnow()
             }}
         )
+        doc_cache.invalidate_master(state)
         logger.info(f"✅ Google Calendar connected for master: {state}")
     
     return {
@@ -1011,6 +1281,7 @@ async def disconnect_google_calendar(master_id: str):
             "updated_at": datetime.utcnow()
         }}
     )
+    doc_cache.invalidate_master(master_id)
     
     logger.info(f"✅ Google Calendar disconnected for master: {master_id}")
     return {"success": True, "message": "Google Calendar disconnected"}
@@ -1019,7 +1290,7 @@ async def disconnect_google_calendar(master_id: str):
 async def import_google_events(master_id: str):
     """Import Google Calendar events as blocked time (two-way sync)"""
     
-    master = await db.masters.find_one({"id": master_id}, {"_id": 0})
+    master = await doc_cache.get_master(db, master_id)
     if not master:
         raise HTTPException(status_code=404, detail="Master not found")
     
@@ -1031,6 +1302,7 @@ async def import_google_events(master_id: str):
         master_id=master_id,
         db=db
     )
+    availability_index.invalidate(master_id)
     
     return {
         "success": True,
@@ -1043,70 +1315,52 @@ async def import_google_events(master_id: str):
 # ============================================================================
 
 @api_router.post("/admin/send-daily-summaries")
-async def send_daily_summaries():
+async def send_all_daily_summaries():
     """Send daily summary emails to all masters (called by cron/scheduler)"""
     
-    # Get all masters with email notifications enabled
-    masters = await db.masters.find(
-        {"settings.daily_summary_enabled": {"$ne": False}},
-        {"_id": 0}
-    ).to_list(10000)
+    counts = await send_daily_summaries(db, email_service.send_daily_summary)
+    return {
+        "success": True,
+        "sent_count": counts['sent'],
+        "skipped_count": counts['skipped'],
+        "failed_count": counts['failed']
+    }
+
+@api_router.post("/admin/reclassify-clients")
+async def reclassify_all_clients(chunk_size: int = 1000):
+    """Recompute risk score and reliability for all clients (after a policy change)"""
     
-    sent_count = 0
-    today = datetime.utcnow().date()
+    result = await reclassify_clients(db, chunk_size=chunk_size)
+    return {"success": True, **result}
+
+@api_router.post("/admin/reconcile-master-stats")
+async def reconcile_stats(master_id: Optional[str] = None, fix: bool = True):
+    """Recompute master_stats rollups from bookings and transactions and report drift"""
     
-    for master in masters:
-        # Get today's bookings
-        start_of_day = datetime.combine(today, datetime.min.time())
-        end_of_day = start_of_day + timedelta(days=1)
-        
-        bookings = await db.bookings.find({
-            "master_id": master['id'],
-            "booking_date": {"$gte": start_of_day, "$lt": end_of_day},
-            "status": {"$in": ["confirmed", "pending"]}
-        }, {"_id": 0}).sort("booking_date", 1).to_list(100)
-        
-        # Format bookings for email
-        upcoming = []
-        for b in bookings:
-            service = await db.services.find_one({"id": b['service_id']}, {"_id": 0, "name": 1})
-            client = await db.clients.find_one({"id": b['client_id']}, {"_id": 0, "name": 1})
-            upcoming.append({
-                "time": b['booking_date'].strftime("%H:%M"),
-                "client": client['name'] if client else "Client",
-                "service": service['name'] if service else "Service"
-            })
-        
-        # Get analytics
-        analytics = await db.bookings.aggregate([
-            {"$match": {"master_id": master['id'], "status": "confirmed"}},
-            {"$group": {"_id": None, "total_slotta": {"$sum": "$slotta_amount"}}}
-        ]).to_list(1)
-        
-        time_protected = analytics[0]['total_slotta'] if analytics else 0
-        
-        # Get pending payouts
-        wallet = await db.transactions.aggregate([
-            {"$match": {"master_id": master['id']}},
-            {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
-        ]).to_list(1)
-        
-        pending_payouts = wallet[0]['total'] if wallet else 0
-        
-        # Send email
-        success = await email_service.send_daily_summary(
-            to_email=master['email'],
-            master_name=master['name'],
-            upcoming_bookings=upcoming,
-            time_protected=time_protected,
-            pending_payouts=pending_payouts
-        )
-        
-        if success:
-            sent_count += 1
+    result = await reconcile_master_stats(db, [master_id] if master_id else None, fix=fix)
+    return {"success": True, **result}
+
+@api_router.post("/admin/check-wallets")
+async def check_wallet_balances(master_id: Optional[str] = None, fix: bool = False):
+    """Compare wallet ledger balances with transactions and confirmed bookings"""
     
-    logger.info(f"✅ Daily summaries sent to {sent_count} masters")
-    return {"success": True, "sent_count": sent_count}
+    result = await check_wallets(db, [master_id] if master_id else None, fix=fix)
+    return {"success": True, **result}
+
+@api_router.get("/admin/http-pools")
+async def get_http_pool_stats():
+    """Connection pool stats for the shared upstream HTTP clients"""
+    return http_clients.stats()
+
+@api_router.get("/admin/cache-stats")
+async def get_cache_stats():
+    """Hit/miss counters for the document and auth token caches"""
+    return {**doc_cache.stats(), "auth_tokens": token_cache.stats()}
+
+@api_router.get("/admin/index-report")
+async def get_index_report():
+    """Missing, undeclared and unused MongoDB indexes per collection"""
+    return await index_report(db)
 
 # ============================================================================
 # HEALTH CHECK
@@ -1140,40 +1394,19 @@ async def send_message_to_client(
     """Send message to client via email/Telegram"""
     
     # Get master and client
-    master = await db.masters.find_one({"id": master_id}, {"_id": 0})
-    client = await db.clients.find_one({"id": client_id}, {"_id": 0})
+    master = await doc_cache.get_master(db, master_id)
+    client = await doc_cache.get_client(db, client_id)
     
     if not master or not client:
         raise HTTPException(status_code=404, detail="Master or client not found")
     
     # Send via email
-    try:
-        from sendgrid import SendGridAPIClient
-        from sendgrid.helpers.mail import Mail
-        
-        email_message = Mail(
-            from_email=os.getenv('FROM_EMAIL', 'noreply@slotta.app'),
-            to_emails=client['email'],
-            subject=f"Message from {master['name']}",
-            html_content=f'''
-            <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
-                <h2 style="color: #8b5cf6;">Message from {master['name']}</h2>
-                <p>Hi {client['name']},</p>
-                <div style="background: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0;">
-                    {message}
-                </div>
-                <p>Reply to this email to contact {master['name']} directly.</p>
-                <p style="color: #6b7280; font-size: 12px;">Slotta - Smart scheduling for professionals.</p>
-            </div>
-            ''')
-        
-        sg = SendGridAPIClient(os.getenv('SENDGRID_API_KEY'))
-        response = sg.send(email_message)
-        
-        logger.info(f"✅ Message sent to {client['email']}")
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to send email: {e}")
+    await email_service.send_client_message(
+        to_email=client['email'],
+        master_name=master['name'],
+        client_name=client['name'],
+        message=message
+    )
     
     # Store message in database
     message_doc = {
@@ -1211,33 +1444,70 @@ async def create_calendar_block(
     }
     
     await db.calendar_blocks.insert_one(block)
+    availability_index.invalidate(master_id)
     
     logger.info(f"✅ Calendar blocked: {master_id} from {start_datetime} to {end_datetime}")
     return {"message": "Time blocked successfully", "block_id": block['id']}
 
 @api_router.get("/calendar/blocks/master/{master_id}")
-async def get_master_calendar_blocks(master_id: str):
-    """Get all calendar blocks for a master"""
-    
-    blocks = await db.calendar_blocks.find(
-        {"master_id": master_id},
-        {"_id": 0}
-    ).sort("start_datetime", 1).to_list(1000)
+async def get_master_calendar_blocks(
+    master_id: str,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None
+):
+    """Get a page of calendar blocks for a master by start time (next page cursor in X-Next-Cursor)"""
     
-    return blocks
+    blocks, headers = await read_page(db.calendar_blocks, {"master_id": master_id}, "start_datetime", 1, limit, cursor)
+    return FastJSONResponse(blocks, headers=headers)
 
 @api_router.delete("/calendar/blocks/{block_id}")
 async def delete_calendar_block(block_id: str):
     """Delete a calendar block"""
     
-    result = await db.calendar_blocks.delete_one({"id": block_id})
+    block = await db.calendar_blocks.find_one_and_delete({"id": block_id}, {"_id": 0, "master_id": 1})
     
-    if result.deleted_count == 0:
+    if not block:
         raise HTTPException(status_code=404, detail="Block not found")
+    availability_index.invalidate(block['master_id'])
     
     logger.info(f"✅ Calendar block deleted: {block_id}")
     return {"message": "Block deleted successfully"}
 
+# ============================================================================
+# AVAILABILITY ENDPOINTS
+# ============================================================================
+
+@api_router.get("/availability/{master_id}")
+async def get_availability(
+    master_id: str,
+    service_id: str,
+    range_start: datetime = Query(..., alias="from"),
+    range_end: datetime = Query(..., alias="to")
+):
+    """Get free start times for a service between from and to"""
+    
+    range_start = to_naive_utc(range_start)
+    range_end = to_naive_utc(range_end)
+    if range_end <= range_start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if range_end - range_start > timedelta(days=31):
+        raise HTTPException(status_code=400, detail="Range cannot exceed 31 days")
+    
+    service = await doc_cache.get_service(db, service_id)
+    if not service or service['master_id'] != master_id:
+        raise HTTPException(status_code=404, detail="Service not found")
+    
+    busy = await availability_index.get(db, master_id)
+    slots = busy.free_slots(range_start, range_end, service['duration_minutes'])
+    
+    return {
+        "master_id": master_id,
+        "service_id": service_id,
+        "duration_minutes": service['duration_minutes'],
+        "step_minutes": SLOT_STEP_MINUTES,
+        "slots": slots
+    }
+
 
 @api_router.get("/")
 async def root():
@@ -1249,6 +1519,7 @@ async def root():
 
 # Include router
 app.include_router(api_router)
+app.add_middleware(RequestScopeMiddleware)
 
 # Add CORS
 app.add_middleware(
@@ -1257,11 +1528,15 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("🚀 Slotta API starting...")
+    await http_clients.start()
+    await ensure_indexes(db)
+    await notification_outbox.start(db)
     logger.info(f"📧 Email service: {'✅ Enabled' if email_service.enabled else '❌ Disabled (add SENDGRID_API_KEY)'}")
     logger.info(f"🤖 Telegram bot: {'✅ Enabled' if telegram_service.enabled else '❌ Disabled (add TELEGRAM_BOT_TOKEN)'}")
     logger.info(f"💳 Stripe: {'✅ Enabled' if stripe_service.enabled else '❌ Disabled (add STRIPE_SECRET_KEY)'}")
@@ -1269,5 +1544,8 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await notification_outbox.stop()
+    await http_clients.aclose()
+    stripe_service.shutdown()
     client.close()
     logger.info("👋 Slotta API shutting down...")
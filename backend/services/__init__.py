@@ -1,12 +1,15 @@
 # Services __init__.py
 from .email_service import email_service
 from .telegram_service import telegram_service
-from .stripe_service import stripe_service
+from .stripe_service import stripe_service, PaymentAuthorizationError
 from .google_calendar_service import google_calendar_service
+from .http_clients import http_clients
 
 __all__ = [
     'email_service',
     'telegram_service',
     'stripe_service',
-    'google_calendar_service'
+    'PaymentAuthorizationError',
+    'google_calendar_service',
+    'http_clients'
 ]
@@ -2,6 +2,9 @@
 
 Supports: SendGrid (recommended for ease of setup)
 
+Mail is posted straight to the SendGrid v3 API over the shared, pooled
+'sendgrid' HTTP client, so sending never blocks the event loop.
+
 To enable:
 1. Sign up at https://sendgrid.com (free tier: 100 emails/day)
 2. Create API key: Settings > API Keys > Create API Key
@@ -13,6 +16,8 @@ import os
 import logging
 from typing import Optional
 
+from .http_clients import http_clients
+
 logger = logging.getLogger(__name__)
 
 class EmailService:
@@ -20,12 +25,32 @@ class EmailService:
     def __init__(self):
         self.api_key = os.getenv('SENDGRID_API_KEY')
         self.from_email = os.getenv('FROM_EMAIL', 'noreply@slotta.com')
+        # Master-to-client messages have their own default sender
+        self.message_from_email = os.getenv('FROM_EMAIL', 'noreply@slotta.app')
+        self.api_url = os.getenv('SENDGRID_API_URL', 'https://api.sendgrid.com/v3/mail/send')
+        self.timeout = float(os.getenv('SENDGRID_TIMEOUT_SECONDS', '10'))
         self.enabled = bool(self.api_key)
         
         if not self.enabled:
             logger.warning("⚠️  Email service disabled: SENDGRID_API_KEY not found in .env")
             logger.info("📧 To enable emails: Get free API key from https://sendgrid.com")
     
+    async def _send(self, to_email: str, subject: str, html_content: str, from_email: Optional[str] = None):
+        """POST a single HTML email to the SendGrid v3 mail endpoint"""
+        
+        response = await http_clients.get('sendgrid').post(
+            self.api_url,
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            timeout=self.timeout,
+            json={
+                'personalizations': [{'to': [{'email': to_email}]}],
+                'from': {'email': from_email or self.from_email},
+                'subject': subject,
+                'content': [{'type': 'text/html', 'value': html_content}]
+            }
+        )
+        response.raise_for_status()
+    
     async def send_booking_confirmation(
         self,
         to_email: str,
@@ -43,12 +68,8 @@ class EmailService:
             return True
         
         try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail
-            
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=to_email,
+            await self._send(
+                to_email=to_email,
                 subject=f'Booking Confirmed with {master_name}',
                 html_content=f'''
                 <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
@@ -67,9 +88,6 @@ class EmailService:
                 </div>
                 ''')
             
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-            
             logger.info(f"✅ Booking confirmation sent to {to_email}")
             return True
             
@@ -93,12 +111,8 @@ class EmailService:
             return True
         
         try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail
-            
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=to_email,
+            await self._send(
+                to_email=to_email,
                 subject=f'New Booking: {client_name}',
                 html_content=f'''
                 <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
@@ -115,9 +129,6 @@ class EmailService:
                 </div>
                 ''')
             
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-            
             logger.info(f"✅ New booking notification sent to {to_email}")
             return True
             
@@ -140,12 +151,8 @@ class EmailService:
             return True
         
         try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail
-            
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=to_email,
+            await self._send(
+                to_email=to_email,
                 subject=f'No-Show: {client_name}',
                 html_content=f'''
                 <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
@@ -160,9 +167,6 @@ class EmailService:
                 </div>
                 ''')
             
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-            
             logger.info(f"✅ No-show alert sent to {to_email}")
             return True
             
@@ -185,9 +189,6 @@ class EmailService:
             return True
         
         try:
-            from sendgrid import SendGridAPIClient
-            from sendgrid.helpers.mail import Mail
-            
             # Build bookings list HTML
             bookings_html = ""
             if upcoming_bookings:
@@ -200,9 +201,8 @@ class EmailService:
             else:
                 bookings_html = "<p style='color: #6b7280;'>No bookings today</p>"
             
-            message = Mail(
-                from_email=self.from_email,
-                to_emails=to_email,
+            await self._send(
+                to_email=to_email,
                 subject=f'☀️ Good morning, {master_name}! Your daily summary',
                 html_content=f'''
                 <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
@@ -240,9 +240,6 @@ class EmailService:
                 </div>
                 ''')
             
-            sg = SendGridAPIClient(self.api_key)
-            response = sg.send(message)
-            
             logger.info(f"✅ Daily summary sent to {to_email}")
             return True
             
@@ -250,5 +247,42 @@ class EmailService:
             logger.error(f"❌ Failed to send daily summary: {e}")
             return False
 
+    async def send_client_message(
+        self,
+        to_email: str,
+        master_name: str,
+        client_name: str,
+        message: str
+    ) -> bool:
+        """Send a direct message from a master to a client"""
+        
+        if not self.enabled:
+            logger.info(f"[MOCK] Would send message from {master_name} to {to_email}")
+            return True
+        
+        try:
+            await self._send(
+                to_email=to_email,
+                from_email=self.message_from_email,
+                subject=f"Message from {master_name}",
+                html_content=f'''
+                <div style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                    <h2 style="color: #8b5cf6;">Message from {master_name}</h2>
+                    <p>Hi {client_name},</p>
+                    <div style="background: #f3f4f6; padding: 20px; border-radius: 8px; margin: 20px 0;">
+                        {message}
+                    </div>
+                    <p>Reply to this email to contact {master_name} directly.</p>
+                    <p style="color: #6b7280; font-size: 12px;">Slotta - Smart scheduling for professionals.</p>
+                </div>
+                ''')
+            
+            logger.info(f"✅ Message sent to {to_email}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"❌ Failed to send email: {e}")
+            return False
+
 # Global instance
 email_service = EmailService()
@@ -21,6 +21,8 @@ from typing import Optional, Dict, List
 from datetime import datetime, timedelta
 from urllib.parse import urlencode
 
+from .http_clients import http_clients
+
 logger = logging.getLogger(__name__)
 
 class GoogleCalendarService:
@@ -62,24 +64,21 @@ class GoogleCalendarService:
             return {"access_token": "mock_token", "refresh_token": "mock_refresh"}
         
         try:
-            import httpx
+            response = await http_clients.get('google').post(
+                "https://oauth2.googleapis.com/token",
+                data={
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                    'code': code,
+                    'grant_type': 'authorization_code',
+                    'redirect_uri': self.redirect_uri
+                }
+            )
+            response.raise_for_status()
+            tokens = response.json()
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth2.googleapis.com/token",
-                    data={
-                        'client_id': self.client_id,
-                        'client_secret': self.client_secret,
-                        'code': code,
-                        'grant_type': 'authorization_code',
-                        'redirect_uri': self.redirect_uri
-                    }
-                )
-                response.raise_for_status()
-                tokens = response.json()
-                
-                logger.info("✅ Google OAuth tokens obtained")
-                return tokens
+            logger.info("✅ Google OAuth tokens obtained")
+            return tokens
                 
         except Exception as e:
             logger.error(f"❌ Failed to exchange OAuth code: {e}")
@@ -92,21 +91,18 @@ class GoogleCalendarService:
             return "mock_refreshed_token"
         
         try:
-            import httpx
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    "https://oauth2.googleapis.com/token",
-                    data={
-                        'client_id': self.client_id,
-                        'client_secret': self.client_secret,
-                        'refresh_token': refresh_token,
-                        'grant_type': 'refresh_token'
-                    }
-                )
-                response.raise_for_status()
-                tokens = response.json()
-                return tokens.get('access_token')
+            response = await http_clients.get('google').post(
+                "https://oauth2.googleapis.com/token",
+                data={
+                    'client_id': self.client_id,
+                    'client_secret': self.client_secret,
+                    'refresh_token': refresh_token,
+                    'grant_type': 'refresh_token'
+                }
+            )
+            response.raise_for_status()
+            tokens = response.json()
+            return tokens.get('access_token')
                 
         except Exception as e:
             logger.error(f"❌ Failed to refresh token: {e}")
@@ -127,8 +123,6 @@ class GoogleCalendarService:
             return "mock_event_id_123"
         
         try:
-            import httpx
-            
             url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
             
             event_data = {
@@ -151,17 +145,16 @@ class GoogleCalendarService:
                 }
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json=event_data,
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
-                response.raise_for_status()
-                
-                event = response.json()
-                logger.info(f"✅ Calendar event created: {event['id']}")
-                return event['id']
+            response = await http_clients.get('google').post(
+                url,
+                json=event_data,
+                headers={'Authorization': f'Bearer {access_token}'}
+            )
+            response.raise_for_status()
+            
+            event = response.json()
+            logger.info(f"✅ Calendar event created: {event['id']}")
+            return event['id']
             
         except Exception as e:
             logger.error(f"❌ Failed to create calendar event: {e}")
@@ -179,16 +172,13 @@ class GoogleCalendarService:
             return True
         
         try:
-            import httpx
-            
             url = f"https://www.googleapis.com/calendar/v3/calendars/primary/events/{event_id}"
             
-            async with httpx.AsyncClient() as client:
-                response = await client.delete(
-                    url,
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
-                response.raise_for_status()
+            response = await http_clients.get('google').delete(
+                url,
+                headers={'Authorization': f'Bearer {access_token}'}
+            )
+            response.raise_for_status()
             
             logger.info(f"✅ Calendar event deleted: {event_id}")
             return True
@@ -210,8 +200,6 @@ class GoogleCalendarService:
             return []
         
         try:
-            import httpx
-            
             url = "https://www.googleapis.com/calendar/v3/calendars/primary/events"
             params = {
                 'timeMin': time_min.isoformat() + 'Z',
@@ -221,19 +209,18 @@ class GoogleCalendarService:
                 'maxResults': 250
             }
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    url,
-                    params=params,
-                    headers={'Authorization': f'Bearer {access_token}'}
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                events = data.get('items', [])
-                
-                logger.info(f"✅ Fetched {len(events)} calendar events")
-                return events
+            response = await http_clients.get('google').get(
+                url,
+                params=params,
+                headers={'Authorization': f'Bearer {access_token}'}
+            )
+            response.raise_for_status()
+            
+            data = response.json()
+            events = data.get('items', [])
+            
+            logger.info(f"✅ Fetched {len(events)} calendar events")
+            return events
             
         except Exception as e:
             logger.error(f"❌ Failed to fetch calendar events: {e}")
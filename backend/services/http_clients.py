@@ -0,0 +1,91 @@
+"""Shared HTTP Clients
+
+One pooled httpx.AsyncClient per upstream API (SendGrid, Telegram,
+Google), opened at app startup and closed at shutdown. Reusing clients
+keeps TCP+TLS connections alive between calls instead of paying a new
+handshake for every notification or calendar request.
+
+Pool sizes are per upstream and configurable via:
+- HTTP_MAX_CONNECTIONS (default 20)
+- HTTP_MAX_KEEPALIVE_CONNECTIONS (default 10)
+- HTTP_KEEPALIVE_EXPIRY_SECONDS (default 30)
+- HTTP_TIMEOUT_SECONDS (default 15)
+"""
+
+import os
+import logging
+from typing import Dict
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+UPSTREAMS = ('sendgrid', 'telegram', 'google')
+
+
+class HttpClientRegistry:
+
+    def __init__(self):
+        self.limits = httpx.Limits(
+            max_connections=int(os.getenv('HTTP_MAX_CONNECTIONS', '20')),
+            max_keepalive_connections=int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '10')),
+            keepalive_expiry=float(os.getenv('HTTP_KEEPALIVE_EXPIRY_SECONDS', '30'))
+        )
+        self.timeout = float(os.getenv('HTTP_TIMEOUT_SECONDS', '15'))
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+
+    def get(self, name: str) -> httpx.AsyncClient:
+        """Pooled client for an upstream (created on first use if not started)"""
+
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._create(name)
+        return client
+
+    def _create(self, name: str) -> httpx.AsyncClient:
+        async def count_request(request):
+            self._requests[name] = self._requests.get(name, 0) + 1
+
+        client = httpx.AsyncClient(
+            limits=self.limits,
+            timeout=self.timeout,
+            event_hooks={'request': [count_request]}
+        )
+        self._clients[name] = client
+        return client
+
+    async def start(self):
+        """Open a client per upstream (call from the app startup event)"""
+
+        for name in UPSTREAMS:
+            self.get(name)
+        logger.info(f"🌐 HTTP client pools opened: {', '.join(UPSTREAMS)}")
+
+    async def aclose(self):
+        """Close every pool (call from the app shutdown event)"""
+
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
+
+    def stats(self) -> Dict[str, dict]:
+        """Requests sent and pooled connections per upstream"""
+
+        stats = {}
+        for name, client in self._clients.items():
+            # httpx does not expose its pool; read the httpcore pool if present
+            pool = getattr(getattr(client, '_transport', None), '_pool', None)
+            connections = list(getattr(pool, 'connections', []))
+            stats[name] = {
+                "requests": self._requests.get(name, 0),
+                "open_connections": len(connections),
+                "idle_connections": sum(1 for c in connections if c.is_idle()),
+                "max_connections": self.limits.max_connections,
+                "max_keepalive_connections": self.limits.max_keepalive_connections
+            }
+        return stats
+
+
+# Global instance
+http_clients = HttpClientRegistry()
@@ -13,28 +13,77 @@ To enable:
    - STRIPE_SECRET_KEY=sk_test_...
    - STRIPE_PUBLISHABLE_KEY=pk_test_...
 4. Enable Connect: https://dashboard.stripe.com/connect/overview
+
+The stripe SDK is synchronous, so every call runs on a bounded thread
+pool (STRIPE_MAX_CONCURRENCY workers) instead of blocking the event loop.
+The SDK's HTTP client enforces STRIPE_TIMEOUT_SECONDS per request and
+retries STRIPE_MAX_NETWORK_RETRIES times with the same idempotency key;
+the pool call only has a backstop timeout that runs out after all of
+those attempts, so a call reported as timed out is no longer running.
+Set STRIPE_API_BASE to point the SDK at a local stripe-mock.
 """
 
 import os
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import Optional, Dict
 
 logger = logging.getLogger(__name__)
 
+# Longest sleep the SDK takes between network retries
+RETRY_DELAY_SECONDS = 5
+
+class PaymentAuthorizationError(Exception):
+    """Raised when Stripe refuses to authorize a payment hold"""
+
 class StripeService:
     
     def __init__(self):
         self.secret_key = os.getenv('STRIPE_SECRET_KEY')
+        self.api_base = os.getenv('STRIPE_API_BASE')
+        self.max_concurrency = int(os.getenv('STRIPE_MAX_CONCURRENCY', '8'))
+        self.timeout = float(os.getenv('STRIPE_TIMEOUT_SECONDS', '20'))
+        self.max_network_retries = int(os.getenv('STRIPE_MAX_NETWORK_RETRIES', '2'))
+        self.call_timeout = (self.timeout + RETRY_DELAY_SECONDS) * (self.max_network_retries + 1)
         self.enabled = bool(self.secret_key)
+        self._executor = None
         
         if self.enabled:
             import stripe
             stripe.api_key = self.secret_key
+            if self.api_base:
+                stripe.api_base = self.api_base
+            stripe.default_http_client = stripe.new_default_http_client(timeout=self.timeout)
+            stripe.max_network_retries = self.max_network_retries
             logger.info("✅ Stripe enabled")
         else:
             logger.warning("⚠️  Stripe disabled: STRIPE_SECRET_KEY not found in .env")
             logger.info("💳 To enable Stripe: Get test keys from https://dashboard.stripe.com/test/apikeys")
     
+    async def _call(self, fn, *args, **kwargs):
+        """Run a blocking SDK call on the Stripe thread pool (backstop timeout after the SDK's own)"""
+        
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency,
+                thread_name_prefix='stripe'
+            )
+        
+        loop = asyncio.get_running_loop()
+        return await asyncio.wait_for(
+            loop.run_in_executor(self._executor, partial(fn, *args, **kwargs)),
+            self.call_timeout
+        )
+    
+    def shutdown(self):
+        """Stop the thread pool (app shutdown)"""
+        
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+    
     async def create_payment_intent(
         self,
         amount: float,
@@ -54,7 +103,8 @@ class StripeService:
         try:
             import stripe
             
-            intent = stripe.PaymentIntent.create(
+            intent = await self._call(
+                stripe.PaymentIntent.create,
                 amount=int(amount * 100),  # Convert to cents
                 currency='eur',
                 capture_method='manual',  # CRITICAL: Hold, don't charge
@@ -73,12 +123,70 @@ class StripeService:
             logger.error(f"❌ Failed to create payment intent: {e}")
             return None
     
+    async def authorize_payment(
+        self,
+        amount: float,
+        customer_email: str,
+        payment_method_id: str,
+        metadata: dict,
+        idempotency_key: Optional[str] = None
+    ) -> Dict:
+        """Create and confirm a payment intent hold in a single round trip
+        
+        Pass an idempotency key derived from the booking so a retried
+        request returns the original intent instead of placing a second
+        hold. Raises PaymentAuthorizationError if the hold is refused.
+        """
+        
+        if not self.enabled:
+            logger.info(f"[MOCK] Would authorize hold of €{amount}")
+            return {
+                'id': 'pi_mock_123456',
+                'client_secret': 'pi_mock_123456_secret_mock',
+                'status': 'requires_capture'
+            }
+        
+        try:
+            import stripe
+            
+            intent = await self._call(
+                stripe.PaymentIntent.create,
+                amount=int(round(amount * 100)),  # Convert to cents
+                currency='eur',
+                capture_method='manual',  # CRITICAL: Hold, don't charge
+                receipt_email=customer_email,
+                metadata=metadata,
+                payment_method=payment_method_id,
+                confirm=True,
+                automatic_payment_methods={'enabled': True, 'allow_redirects': 'never'},
+                idempotency_key=idempotency_key
+            )
+        except Exception as e:
+            logger.error(f"❌ Payment authorization failed: {e}")
+            raise PaymentAuthorizationError(str(e) or type(e).__name__)
+        
+        if intent.status != 'requires_capture':
+            logger.error(f"❌ Payment authorization incomplete: {intent.id} is {intent.status}")
+            raise PaymentAuthorizationError(f"Payment hold not authorized (status: {intent.status})")
+        
+        logger.info(f"✅ Payment authorized: {intent.id}")
+        return {
+            'id': intent.id,
+            'client_secret': intent.client_secret,
+            'status': intent.status
+        }
+    
     async def capture_payment(
         self,
         payment_intent_id: str,
-        amount: Optional[float] = None
+        amount: Optional[float] = None,
+        idempotency_key: Optional[str] = None
     ) -> bool:
-        """Capture a held payment (on no-show)"""
+        """Capture a held payment (on no-show)
+        
+        With an idempotency key a retried capture returns the first
+        result instead of failing on an already captured intent.
+        """
         
         if not self.enabled:
             logger.info(f"[MOCK] Would capture payment {payment_intent_id}")
@@ -89,10 +197,12 @@ class StripeService:
             
             capture_args = {}
             if amount:
-                capture_args['amount_to_capture'] = int(amount * 100)
+                capture_args['amount_to_capture'] = int(round(amount * 100))
             
-            intent = stripe.PaymentIntent.capture(
+            intent = await self._call(
+                stripe.PaymentIntent.capture,
                 payment_intent_id,
+                idempotency_key=idempotency_key,
                 **capture_args
             )
             
@@ -116,7 +226,7 @@ class StripeService:
         try:
             import stripe
             
-            intent = stripe.PaymentIntent.cancel(payment_intent_id)
+            intent = await self._call(stripe.PaymentIntent.cancel, payment_intent_id)
             
             logger.info(f"✅ Payment cancelled (hold released): {payment_intent_id}")
             return True
@@ -139,7 +249,8 @@ class StripeService:
         try:
             import stripe
             
-            payout = stripe.Payout.create(
+            payout = await self._call(
+                stripe.Payout.create,
                 amount=int(amount * 100),
                 currency='eur',
                 stripe_account=connected_account_id
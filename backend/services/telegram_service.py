@@ -12,6 +12,8 @@ import os
 import logging
 from typing import Optional
 
+from .http_clients import http_clients
+
 logger = logging.getLogger(__name__)
 
 class TelegramService:
@@ -36,20 +38,17 @@ class TelegramService:
             return True
         
         try:
-            import httpx
-            
             url = f"https://api.telegram.org/bot{self.bot_token}/sendMessage"
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    url,
-                    json={
-                        "chat_id": chat_id,
-                        "text": message,
-                        "parse_mode": "Markdown"
-                    }
-                )
-                response.raise_for_status()
+            response = await http_clients.get('telegram').post(
+                url,
+                json={
+                    "chat_id": chat_id,
+                    "text": message,
+                    "parse_mode": "Markdown"
+                }
+            )
+            response.raise_for_status()
             
             logger.info(f"✅ Telegram message sent to {chat_id}")
             return True
@@ -76,6 +75,31 @@ class TelegramService:
 📅 Date: {booking_date}
 🕐 Time: {booking_time}
 
+✨ Slotta is protecting your time!
+        """
+        
+        return await self.send_message(chat_id, message)
+    
+    async def send_new_booking_alert(
+        self,
+        chat_id: str,
+        client_name: str,
+        service_name: str,
+        booking_date: str,
+        booking_time: str,
+        slotta_amount: float
+    ) -> bool:
+        """Send new booking notification with the authorized hold amount"""
+        
+        message = f"""
+🆕 *New Booking!*
+
+👤 Client: {client_name}
+💼 Service: {service_name}
+📅 Date: {booking_date}
+🕐 Time: {booking_time}
+🔒 Slotta hold: €{slotta_amount}
+
 ✨ Slotta is protecting your time!
         """
         
@@ -0,0 +1,135 @@
+"""Slot Reservations
+
+Prevents double-booking under concurrent requests. A booking first claims
+one lease document per time bucket it covers in the slot_reservations
+collection. Bucket documents use "<master_id>:<bucket start>" as _id, so
+the unique _id index makes the claim atomic: of N concurrent requests for
+overlapping slots exactly one insert_many succeeds.
+
+Leases carry a short expires_at (TTL index) so a request that dies
+mid-flight frees its slot. Once the booking is stored the lease is
+extended to the booking end, after which MongoDB removes it.
+
+slot_holds counts the payment holds cancelled for each slot. The count is
+part of the Stripe idempotency key of a booking, so retrying a booking
+returns its hold while rebooking a slot after a cancelled hold places a
+new one. Counters expire once Stripe has forgotten the keys (24 hours).
+"""
+
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import List
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+RESERVATION_BUCKET_MINUTES = int(os.getenv('RESERVATION_BUCKET_MINUTES', '15'))
+LEASE_TTL_SECONDS = int(os.getenv('RESERVATION_LEASE_TTL_SECONDS', '600'))
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
+
+
+class SlotConflictError(Exception):
+    """Raised when another booking already holds part of the slot"""
+
+
+def bucket_starts(start: datetime, end: datetime) -> List[datetime]:
+    """Bucket start times covering [start, end)"""
+
+    step = timedelta(minutes=RESERVATION_BUCKET_MINUTES)
+    midnight = start.replace(hour=0, minute=0, second=0, microsecond=0)
+    bucket = start - (start - midnight) % step
+
+    buckets = []
+    while bucket < end:
+        buckets.append(bucket)
+        bucket += step
+    return buckets
+
+
+def bucket_id(master_id: str, bucket: datetime) -> str:
+    return f"{master_id}:{bucket.strftime('%Y-%m-%dT%H:%M')}"
+
+
+async def reserve_slot(
+    db,
+    master_id: str,
+    start: datetime,
+    end: datetime,
+    reservation_id: str
+) -> None:
+    """Atomically lease every bucket of [start, end) or raise SlotConflictError"""
+
+    buckets = bucket_starts(start, end)
+    ids = [bucket_id(master_id, b) for b in buckets]
+
+    for attempt in range(2):
+        now = datetime.utcnow()
+        docs = [
+            {
+                "_id": _id,
+                "master_id": master_id,
+                "bucket": b,
+                "reservation_id": reservation_id,
+                "expires_at": now + timedelta(seconds=LEASE_TTL_SECONDS)
+            }
+            for _id, b in zip(ids, buckets)
+        ]
+        try:
+            await db.slot_reservations.insert_many(docs, ordered=True)
+            return
+        except BulkWriteError:
+            # Undo the buckets we did get before the conflicting one
+            await db.slot_reservations.delete_many({"reservation_id": reservation_id})
+
+        if attempt == 0:
+            # The TTL monitor only runs once a minute - reclaim leases that
+            # have already expired and try once more
+            reclaimed = await db.slot_reservations.delete_many(
+                {"_id": {"$in": ids}, "expires_at": {"$lt": now}}
+            )
+            if reclaimed.deleted_count:
+                continue
+        break
+
+    raise SlotConflictError(f"Slot {start.isoformat()} is already reserved for master {master_id}")
+
+
+async def confirm_reservation(db, reservation_id: str, end: datetime) -> None:
+    """Keep the lease for the lifetime of the stored booking"""
+
+    await db.slot_reservations.update_many(
+        {"reservation_id": reservation_id},
+        {"$set": {"expires_at": end}}
+    )
+
+
+async def release_reservation(db, reservation_id: str) -> None:
+    """Free the slot (failed booking or cancellation)"""
+
+    await db.slot_reservations.delete_many({"reservation_id": reservation_id})
+
+
+def hold_id(master_id: str, start: datetime) -> str:
+    return f"{master_id}:{start.isoformat()}"
+
+
+async def cancelled_holds(db, master_id: str, start: datetime) -> int:
+    """Number of payment holds cancelled for bookings of this slot"""
+
+    doc = await db.slot_holds.find_one({"_id": hold_id(master_id, start)}, {"cancelled": 1})
+    return doc['cancelled'] if doc else 0
+
+
+async def count_cancelled_hold(db, master_id: str, start: datetime) -> None:
+    """Record a cancelled hold so the next booking of the slot gets a new one"""
+
+    await db.slot_holds.update_one(
+        {"_id": hold_id(master_id, start)},
+        {
+            "$inc": {"cancelled": 1},
+            "$set": {"expires_at": datetime.utcnow() + IDEMPOTENCY_KEY_TTL}
+        },
+        upsert=True
+    )
@@ -8,7 +8,10 @@ This module calculates the fair Slotta amount based on:
 """
 
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
 
 class SlottaEngine:
     
@@ -92,6 +95,91 @@ class SlottaEngine:
         # Round to 2 decimals
         return round(final_amount, 2)
     
+    @classmethod
+    def calculate_slotta_batch(
+        cls,
+        price: Union[np.ndarray, pd.DataFrame],
+        duration_minutes=None,
+        client_reliability=None,
+        no_shows=None,
+        cancellations=None,
+        is_peak_slot=None,
+        booking_lead_time_hours=None
+    ) -> Union[np.ndarray, pd.Series]:
+        """Vectorized calculate_slotta over arrays (or a DataFrame)
+        
+        Accepts either one array per calculate_slotta argument or a single
+        DataFrame whose columns use the same names. Missing columns fall back
+        to the scalar defaults. Returns an ndarray (a Series for DataFrame
+        input) matching calculate_slotta element for element.
+        """
+        
+        index = None
+        if isinstance(price, pd.DataFrame):
+            frame = price
+            index = frame.index
+            price = frame['price']
+            duration_minutes = frame['duration_minutes']
+            client_reliability = frame.get('client_reliability')
+            cancellations = frame.get('cancellations')
+            is_peak_slot = frame.get('is_peak_slot')
+        
+        price = np.asarray(price, dtype=np.float64)
+        duration = np.asarray(duration_minutes)
+        size = price.shape
+        
+        if client_reliability is None:
+            client_reliability = np.full(size, 'new', dtype=object)
+        reliability = np.asarray(client_reliability, dtype=object)
+        cancellations = np.zeros(size) if cancellations is None else np.asarray(cancellations)
+        is_peak_slot = np.zeros(size, dtype=bool) if is_peak_slot is None else np.asarray(is_peak_slot, dtype=bool)
+        # no_shows and booking_lead_time_hours (arguments or columns) are
+        # accepted for parity with calculate_slotta, which does not use them
+        # in the amount either
+        
+        # Base percentage by duration
+        percentage = np.where(
+            duration < 60,
+            cls.BASE_PERCENTAGES['short'],
+            np.where(duration <= 180, cls.BASE_PERCENTAGES['medium'], cls.BASE_PERCENTAGES['long'])
+        )
+        base = price * percentage
+        
+        # Modifiers, summed in the same order as calculate_slotta so the
+        # floating point result is bit-identical
+        total_modifier = np.zeros(size) + np.select(
+            [reliability == 'reliable', reliability == 'new', reliability == 'needs-protection'],
+            [cls.MODIFIER_RELIABLE, cls.MODIFIER_NEW_CLIENT, cls.MODIFIER_NEEDS_PROTECTION],
+            0.0
+        )
+        total_modifier = total_modifier + np.where(cancellations >= 2, cls.MODIFIER_CANCELLATION_HISTORY, 0.0)
+        total_modifier = total_modifier + np.where(is_peak_slot, cls.MODIFIER_PEAK_SLOT, 0.0)
+        
+        final_amount = base * (1 + total_modifier)
+        
+        # Apply limits
+        final_amount = np.minimum(final_amount, price * cls.MAX_PERCENTAGE)
+        final_amount = np.where(duration >= 180, np.maximum(final_amount, cls.MIN_AMOUNT), final_amount)
+        
+        amounts = cls._round_cents(final_amount)
+        return pd.Series(amounts, index=index) if index is not None else amounts
+    
+    @staticmethod
+    def _round_cents(values: np.ndarray) -> np.ndarray:
+        """Round to 2 decimals exactly like the builtin round()
+        
+        np.round scales by 100 before rounding, which can land on an exact
+        .5 that the builtin (correctly rounded) would not. Those ties are
+        rare, so they are re-rounded in Python.
+        """
+        
+        scaled = values * 100
+        rounded = np.round(values, 2)
+        ties = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+        for i in np.flatnonzero(ties):
+            rounded.flat[i] = round(float(values.flat[i]), 2)
+        return rounded
+    
     @classmethod
     def calculate_no_show_split(cls, slotta_amount: float) -> dict:
         """Calculate how Slotta is split on no-show
@@ -139,6 +227,33 @@ class SlottaEngine:
         # Cap at 100
         return int(min(risk_score, 100))
     
+    @classmethod
+    def calculate_risk_score_batch(
+        cls,
+        total_bookings,
+        no_shows,
+        cancellations,
+        booking_lead_time_hours=None
+    ) -> np.ndarray:
+        """Vectorized calculate_risk_score (NaN lead times count as None)"""
+        
+        total = np.asarray(total_bookings, dtype=np.int64)
+        no_shows = np.asarray(no_shows, dtype=np.int64)
+        cancellations = np.asarray(cancellations, dtype=np.int64)
+        has_history = total > 0
+        safe_total = np.where(has_history, total, 1)
+        
+        risk_score = no_shows / safe_total * 60
+        risk_score = risk_score + cancellations / safe_total * 20
+        
+        if booking_lead_time_hours is not None:
+            lead = np.asarray(booking_lead_time_hours, dtype=np.float64)
+            short_lead = ~np.isnan(lead) & (lead != 0) & (lead < 24)
+            risk_score = np.where(short_lead, risk_score + 20 * (1 - lead / 24), risk_score)
+        
+        risk_score = np.minimum(risk_score, 100).astype(np.int64)
+        return np.where(has_history, risk_score, 50)
+    
     @classmethod
     def determine_reliability(
         cls,
@@ -157,3 +272,40 @@ class SlottaEngine:
             return 'reliable'
         
         return 'new'
+    
+    @classmethod
+    def determine_reliability_batch(
+        cls,
+        total_bookings,
+        no_shows
+    ) -> np.ndarray:
+        """Vectorized determine_reliability"""
+        
+        total = np.asarray(total_bookings, dtype=np.int64)
+        no_shows = np.asarray(no_shows, dtype=np.int64)
+        
+        return np.select(
+            [total == 0, no_shows >= 2, (no_shows <= 1) & (total >= 3)],
+            ['new', 'needs-protection', 'reliable'],
+            'new'
+        ).astype(object)
+    
+    @classmethod
+    def reliability_expression(
+        cls,
+        total_bookings: str = "$total_bookings",
+        no_shows: str = "$no_shows"
+    ) -> dict:
+        """determine_reliability as an aggregation expression, for pipeline updates"""
+        
+        total = {"$ifNull": [total_bookings, 0]}
+        no_shows = {"$ifNull": [no_shows, 0]}
+        
+        return {"$switch": {
+            "branches": [
+                {"case": {"$eq": [total, 0]}, "then": 'new'},
+                {"case": {"$gte": [no_shows, 2]}, "then": 'needs-protection'},
+                {"case": {"$and": [{"$lte": [no_shows, 1]}, {"$gte": [total, 3]}]}, "then": 'reliable'}
+            ],
+            "default": 'new'
+        }}
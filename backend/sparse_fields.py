@@ -0,0 +1,49 @@
+"""Sparse Fieldsets
+
+Read routes accept fields=a,b,c to return only some of a model's fields.
+The selection is pushed down into the MongoDB projection, so unused
+fields are neither read from the server nor sent to the client. The id
+is always part of the selection.
+
+batch_get resolves many ids of one collection with a single $in query
+instead of one request per related document.
+"""
+
+from typing import List, Optional, Type
+
+from pydantic import BaseModel
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when fields names something the model does not have"""
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """Selected field names in model order (None selects every field)"""
+    
+    names = {name.strip() for name in (fields or "").split(',') if name.strip()}
+    if not names:
+        return None
+    
+    unknown = names - model.model_fields.keys()
+    if unknown:
+        raise InvalidFieldsError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    names.add('id')
+    return [name for name in model.model_fields if name in names]
+
+
+def projection(fields: Optional[List[str]], *required: str) -> dict:
+    """MongoDB projection for the selected fields plus required ones (e.g. a sort key)"""
+    
+    if fields is None:
+        return {"_id": 0}
+    return {"_id": 0, **{name: 1 for name in (*fields, *required)}}
+
+
+async def batch_get(collection, ids: List[str], fields: Optional[List[str]] = None) -> List[dict]:
+    """Documents with the given ids from one $in query, in the order of ids (unknown ids are skipped)"""
+    
+    unique = list(dict.fromkeys(ids))
+    docs = await collection.find({"id": {"$in": unique}}, projection(fields)).to_list(len(unique))
+    by_id = {doc['id']: doc for doc in docs}
+    return [by_id[doc_id] for doc_id in unique if doc_id in by_id]
@@ -0,0 +1,78 @@
+"""State Transitions
+
+Single round trip writes for handlers that used to read a document,
+update it and read it again. Each helper is one find_one_and_update:
+
+- set_fields: $set on a document by id, returning it before or after
+- transition_booking: move an open (pending or confirmed) booking to a
+  final status, returning the booking as it was (the stats and wallet
+  updates need the old status)
+- update_client_stats: bump a client's counters and recompute its
+  reliability from the new values with a pipeline update, returning the
+  updated client
+
+The reliability rules come from SlottaEngine.reliability_expression, the
+server-side form of SlottaEngine.determine_reliability. Every helper
+takes an optional session to run inside mongo_transactions.run_transaction.
+"""
+
+from datetime import datetime
+from typing import Dict, Optional
+
+from pymongo import ReturnDocument
+
+from slotta_engine import SlottaEngine
+
+# Statuses a booking can still be completed or marked a no-show from
+OPEN_STATUSES = ["pending", "confirmed"]
+
+
+async def set_fields(
+    collection,
+    doc_id: str,
+    fields: dict,
+    return_document: bool = ReturnDocument.AFTER
+) -> Optional[dict]:
+    """$set fields on the document with this id; the document after (or before) the write, None if missing"""
+    
+    return await collection.find_one_and_update(
+        {"id": doc_id},
+        {"$set": fields},
+        projection={"_id": 0},
+        return_document=return_document
+    )
+
+
+async def transition_booking(db, booking_id: str, new_status, session=None) -> Optional[dict]:
+    """Set an open booking's status; the booking before the write, None if missing or not open"""
+    
+    return await db.bookings.find_one_and_update(
+        {"id": booking_id, "status": {"$in": OPEN_STATUSES}},
+        {"$set": {"status": new_status, "updated_at": datetime.utcnow()}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.BEFORE,
+        session=session
+    )
+
+
+async def update_client_stats(
+    db,
+    client_id: str,
+    increments: Dict[str, float],
+    session=None
+) -> Optional[dict]:
+    """Add increments to a client's counters and recompute its reliability; the updated client"""
+    
+    return await db.clients.find_one_and_update(
+        {"id": client_id},
+        [
+            {"$set": {
+                field: {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+                for field, amount in increments.items()
+            }},
+            {"$set": {"reliability": SlottaEngine.reliability_expression()}}
+        ],
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER,
+        session=session
+    )
@@ -0,0 +1,63 @@
+"""
+Shared fixtures for tests that run the API in-process against a local mongod.
+
+Set MONGO_URL to point at the server (defaults to mongodb://localhost:27017).
+Tests using mongo_db_name are skipped when no server is reachable.
+"""
+
+import os
+import uuid
+
+import pytest
+
+TEST_MONGO_URL = os.environ.setdefault('MONGO_URL', 'mongodb://localhost:27017')
+os.environ.setdefault('DB_NAME', 'slotta_test')
+
+
+@pytest.fixture
+def mongo_db_name():
+    """Name of a fresh database on the local mongod, dropped afterwards"""
+    from pymongo import MongoClient
+    from pymongo.errors import PyMongoError
+    
+    sync_client = MongoClient(TEST_MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        sync_client.admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"No MongoDB server reachable at {TEST_MONGO_URL}")
+    
+    # Cached documents belong to the previous test's database
+    from doc_cache import doc_cache
+    from availability import availability_index
+    doc_cache.clear()
+    availability_index.clear()
+    
+    name = f"slotta_test_{uuid.uuid4().hex[:8]}"
+    yield name
+    sync_client.drop_database(name)
+    sync_client.close()
+
+
+@pytest.fixture
+def mongo_db(mongo_db_name, monkeypatch):
+    """Factory for a motor handle on the test database, also installed as server.db
+    
+    Call it inside the test's event loop (motor binds a client to the loop
+    it was created in). server.db is restored and the clients are closed
+    after the test.
+    """
+    from motor.motor_asyncio import AsyncIOMotorClient
+    import server
+    
+    clients = []
+
+    def connect(**client_options):
+        mongo = AsyncIOMotorClient(TEST_MONGO_URL, **client_options)
+        clients.append(mongo)
+        db = mongo[mongo_db_name]
+        monkeypatch.setattr(server, "db", db)
+        return db
+    
+    yield connect
+    for mongo in clients:
+        mongo.close()
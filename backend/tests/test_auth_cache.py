@@ -0,0 +1,87 @@
+"""
+Auth Cache Tests
+Tests for:
+- Decoded tokens are memoized until exp, then rejected as expired
+- Invalid tokens are rejected and never cached
+- /auth/me serves the cached profile and sees profile updates at once
+
+The API test runs in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+import time
+
+import httpx
+import jwt
+import pytest
+
+from auth_cache import TokenCache
+
+SECRET = "test-secret"
+
+
+def _token(lifetime: float, sub: str = "master-1") -> str:
+    return jwt.encode({"sub": sub, "exp": int(time.time() + lifetime)}, SECRET, algorithm="HS256")
+
+
+class TestTokenCache:
+    """JWT decode memoization"""
+
+    def test_memoized_until_exp(self, monkeypatch):
+        """Second decode is a cache hit; after exp the token is expired"""
+        cache = TokenCache(SECRET, "HS256")
+        token = _token(2)
+        decodes = []
+        real_decode = jwt.decode
+        monkeypatch.setattr(jwt, "decode", lambda *a, **kw: decodes.append(1) or real_decode(*a, **kw))
+        
+        assert cache.decode(token)['sub'] == "master-1"
+        assert cache.decode(token)['sub'] == "master-1"
+        assert len(decodes) == 1
+        
+        time.sleep(2.1)
+        with pytest.raises(jwt.ExpiredSignatureError):
+            cache.decode(token)
+        assert len(decodes) == 2
+        print("✅ Token memoized until exp")
+
+    def test_invalid_tokens_not_cached(self):
+        """Bad signatures raise every time"""
+        cache = TokenCache(SECRET, "HS256")
+        forged = jwt.encode({"sub": "master-1", "exp": int(time.time() + 60)}, "other", algorithm="HS256")
+        
+        for _ in range(2):
+            with pytest.raises(jwt.InvalidTokenError):
+                cache.decode(forged)
+        assert cache.stats()['size'] == 0
+        print("✅ Invalid tokens rejected")
+
+    def test_auth_me_uses_cache(self, mongo_db):
+        """Repeated /auth/me calls hit the caches; updates invalidate"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await db.masters.insert_one({
+                "id": "master-1", "email": "m@slotta.app", "name": "Anna", "booking_slug": "anna",
+                "password_hash": "secret"
+            })
+            headers = {"Authorization": f"Bearer {server.create_token('master-1', 'm@slotta.app')}"}
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                profiles = [(await http.get("/api/auth/me", headers=headers)).json() for _ in range(3)]
+                stats = (await http.get("/api/admin/cache-stats")).json()
+                await http.put("/api/masters/master-1", json={"name": "Anna B."})
+                renamed = (await http.get("/api/auth/me", headers=headers)).json()
+                forged = await http.get("/api/auth/me", headers={"Authorization": "Bearer nope"})
+            return profiles, stats, renamed, forged
+        
+        profiles, stats, renamed, forged = asyncio.run(run())
+        
+        assert all(p['name'] == "Anna" and 'password_hash' not in p for p in profiles)
+        assert stats['auth_tokens']['hits'] == 2
+        assert stats['masters']['hits'] == 2
+        assert renamed['name'] == "Anna B."
+        assert forged.status_code == 401
+        print(f"✅ /auth/me cached: {stats['auth_tokens']}")
@@ -0,0 +1,98 @@
+"""
+Slot Availability Tests
+Tests for:
+- Busy interval merging and overlap checks
+- Free start times around bookings and calendar blocks
+- Index invalidation on writes
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from availability import AvailabilityIndex, BusyIntervals
+
+DAY = datetime(2030, 5, 6)
+
+
+def at(hour, minute=0):
+    return DAY + timedelta(hours=hour, minutes=minute)
+
+
+class TestBusyIntervals:
+    """Sorted-array interval index"""
+
+    def test_overlapping_intervals_are_merged(self):
+        """Overlapping and touching intervals collapse into one"""
+        busy = BusyIntervals([(at(10), at(11)), (at(9), at(10)), (at(10, 30), at(12)), (at(14), at(15))], horizon=DAY)
+        assert busy.starts == [at(9), at(14)]
+        assert busy.ends == [at(12), at(15)]
+
+    def test_is_free(self):
+        """Half-open intervals: back-to-back bookings are allowed"""
+        busy = BusyIntervals([(at(10), at(11))], horizon=DAY)
+        assert busy.is_free(at(9), at(10))
+        assert busy.is_free(at(11), at(12))
+        assert not busy.is_free(at(9, 30), at(10, 30))
+        assert not busy.is_free(at(10, 15), at(10, 45))
+        assert not busy.is_free(at(9), at(12))
+
+    def test_free_slots_skip_busy_intervals(self):
+        """A 60 minute service fits only around the busy hour"""
+        busy = BusyIntervals([(at(10), at(11))], horizon=DAY)
+        slots = busy.free_slots(at(8, 50), at(12), duration_minutes=60, step_minutes=30)
+        assert slots == [at(9), at(11)]
+        print(f"✅ Free slots: {[s.strftime('%H:%M') for s in slots]}")
+
+    def test_free_slots_align_after_busy_end(self):
+        """Slots resume on the step grid after an interval ending off-grid"""
+        busy = BusyIntervals([(at(9), at(9, 40))], horizon=DAY)
+        slots = busy.free_slots(at(9), at(11), duration_minutes=45, step_minutes=15)
+        assert slots == [at(9, 45), at(10), at(10, 15)]
+
+    def test_free_slots_respect_horizon(self):
+        """Nothing is offered before the index horizon"""
+        busy = BusyIntervals([], horizon=at(10))
+        assert busy.free_slots(at(8), at(11), duration_minutes=30, step_minutes=30) == [at(10), at(10, 30)]
+
+
+class _FakeCursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def to_list(self, length):
+        return self.docs
+
+
+class _FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find(self, query, projection):
+        self.finds += 1
+        return _FakeCursor(self.docs)
+
+
+class _FakeDB:
+    def __init__(self):
+        self.bookings = _FakeCollection([])
+        self.calendar_blocks = _FakeCollection([])
+
+
+class TestAvailabilityIndex:
+    """Per-master caching and invalidation"""
+
+    def test_index_is_cached_until_invalidated(self):
+        """Reads reuse the index; a write forces a rebuild"""
+        db = _FakeDB()
+        index = AvailabilityIndex(ttl_seconds=3600)
+
+        async def run():
+            await index.get(db, "m1")
+            await index.get(db, "m1")
+            assert db.bookings.finds == 1
+            index.invalidate("m1")
+            await index.get(db, "m1")
+            assert db.bookings.finds == 2
+
+        asyncio.run(run())
@@ -0,0 +1,132 @@
+"""
+Batch Loader Tests
+Tests for:
+- Loads in the same event loop tick share one $in query
+- Identical loads while a fetch is in flight join it (single-flight);
+  forget() makes later loads fetch again
+- Every caller gets its own copy; errors reach every waiter
+- Concurrent cold /masters/{booking_slug} requests cost one Mongo query
+
+The API test runs in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+
+import httpx
+
+from batch_loader import BatchLoader
+
+
+class FakeDb(dict):
+    """Collections by name"""
+
+
+class SlowCollection:
+    """find with an $in filter that takes a while, recording each batch of keys"""
+
+    def __init__(self, docs, delay=0.01, error=None):
+        self.docs = docs
+        self.delay = delay
+        self.error = error
+        self.batches = []
+
+    def find(self, query, projection=None):
+        field, condition = next(iter(query.items()))
+        self.batches.append(sorted(condition["$in"]))
+        collection = self
+
+        class Cursor:
+            async def to_list(self, length):
+                await asyncio.sleep(collection.delay)
+                if collection.error:
+                    raise collection.error
+                return [dict(d) for d in collection.docs if d.get(field) in condition["$in"]]
+        return Cursor()
+
+
+def _db(**kwargs):
+    services = SlowCollection([{"id": f"service-{i}", "price": 10.0 * i} for i in range(10)], **kwargs)
+    return FakeDb(services=services), services
+
+
+class TestBatchLoader:
+    """Coalescing and single-flight"""
+
+    def test_same_tick_is_one_query(self):
+        """Distinct and repeated keys requested together are one $in"""
+        db, services = _db()
+        loader = BatchLoader("services")
+
+        async def run():
+            return await asyncio.gather(*[
+                loader.load(db, key) for key in ("service-1", "service-2", "service-1", "missing")
+            ])
+        
+        first, second, again, missing = asyncio.run(run())
+        
+        assert services.batches == [["missing", "service-1", "service-2"]]
+        assert (first['price'], second['price'], missing) == (10.0, 20.0, None)
+        assert first == again and first is not again
+        assert loader.stats()['coalesced'] == 1
+        print(f"✅ One query for one tick: {loader.stats()}")
+
+    def test_single_flight_and_forget(self):
+        """A load during a fetch joins it; after forget() it fetches again"""
+        db, services = _db(delay=0.05)
+        loader = BatchLoader("services")
+
+        async def run():
+            first = asyncio.ensure_future(loader.load(db, "service-3"))
+            await asyncio.sleep(0.01)  # first fetch is now in flight
+            joined = asyncio.ensure_future(loader.load(db, "service-3"))
+            await asyncio.sleep(0.01)
+            loader.forget("service-3")
+            fresh = asyncio.ensure_future(loader.load(db, "service-3"))
+            return await asyncio.gather(first, joined, fresh)
+        
+        docs = asyncio.run(run())
+        
+        assert all(doc['price'] == 30.0 for doc in docs)
+        assert services.batches == [["service-3"], ["service-3"]]
+        print("✅ Single-flight until forgotten")
+
+    def test_errors_reach_every_waiter(self):
+        """A failed batch raises in each caller and is not remembered"""
+        db, services = _db(error=RuntimeError("mongo down"))
+        loader = BatchLoader("services")
+
+        async def run():
+            return await asyncio.gather(
+                loader.load(db, "service-1"), loader.load(db, "service-2"), return_exceptions=True
+            )
+        
+        results = asyncio.run(run())
+        assert all(isinstance(r, RuntimeError) for r in results)
+        
+        services.error = None
+        assert asyncio.run(loader.load(db, "service-1"))['price'] == 10.0
+        assert len(services.batches) == 2
+        print("✅ Errors propagate, next load retries")
+
+    def test_concurrent_slug_requests(self, mongo_db):
+        """A spike of cold booking page views is one masters query"""
+        import server
+        from doc_cache import doc_cache
+
+        async def run():
+            db = mongo_db()
+            await db.masters.insert_one({
+                "id": "master-1", "email": "m@slotta.app", "name": "Anna", "booking_slug": "anna"
+            })
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                responses = await asyncio.gather(*[http.get("/api/masters/anna") for _ in range(20)])
+            return responses
+        
+        responses = asyncio.run(run())
+        
+        assert all(r.status_code == 200 and r.json()['name'] == "Anna" for r in responses)
+        loads = doc_cache.stats()['loaders']['master_slugs']
+        assert loads['queries'] == 1
+        print(f"✅ 20 concurrent page views, {loads['queries']} query: {loads}")
@@ -0,0 +1,154 @@
+"""
+Client Booking History Tests
+Tests for:
+- /bookings/client/email/{email} issues a fixed number of queries per
+  page no matter how many bookings are on it
+- Cursor pagination walks every booking exactly once, newest first
+- Without a limit the whole history fits on one page, as the client
+  portal expects
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+from pymongo import monitoring
+
+BOOKING_COUNT = 250
+PAGE_SIZE = 100
+
+# client lookup, bookings page, services $in, masters $in
+QUERIES_PER_PAGE = 4
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts read commands sent to one database"""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.commands = []
+
+    def started(self, event):
+        if event.database_name == self.db_name and event.command_name in ('find', 'aggregate', 'getMore'):
+            self.commands.append((event.command_name, event.command.get(event.command_name)))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def _seed(db, bookings=BOOKING_COUNT):
+    start = datetime(2026, 1, 1, 9, 0)
+    await db.clients.insert_one({"id": "client-1", "email": "c@slotta.app", "name": "Client"})
+    await db.masters.insert_many([
+        {"id": f"master-{i}", "email": f"m{i}@slotta.app", "name": f"Master {i}", "location": "Lisbon"}
+        for i in range(2)
+    ])
+    await db.services.insert_many([
+        {"id": f"service-{i}", "master_id": f"master-{i % 2}", "name": f"Service {i}", "price": 50.0 + i}
+        for i in range(3)
+    ])
+    await db.bookings.insert_many([
+        {
+            "id": f"booking-{i:04d}",
+            "master_id": f"master-{i % 2}",
+            "client_id": "client-1",
+            "service_id": f"service-{i % 3}",
+            "status": "confirmed",
+            # Pairs share a start time so paging has to break ties on id
+            "booking_date": start + timedelta(hours=i // 2),
+            "slotta_amount": 20.0
+        }
+        for i in range(bookings)
+    ])
+
+
+class TestClientBookingsByEmail:
+    """Booking history is enriched without per-booking queries"""
+
+    def test_query_count_and_pagination(self, mongo_db_name, mongo_db):
+        """Each page costs QUERIES_PER_PAGE reads; pages cover every booking once"""
+        import server
+        
+        counter = CommandCounter(mongo_db_name)
+
+        async def run():
+            db = mongo_db(event_listeners=[counter])
+            await _seed(db)
+            
+            pages = []
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                cursor = None
+                while True:
+                    counter.commands = []
+                    params = {"limit": PAGE_SIZE}
+                    if cursor:
+                        params["cursor"] = cursor
+                    response = await http.get("/api/bookings/client/email/c@slotta.app", params=params)
+                    assert response.status_code == 200
+                    pages.append((response.json(), list(counter.commands)))
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+                
+                bad = await http.get("/api/bookings/client/email/c@slotta.app", params={"cursor": "not-a-cursor"})
+                assert bad.status_code == 400
+            
+            return pages
+        
+        pages = asyncio.run(run())
+        
+        assert [len(rows) for rows, _ in pages] == [100, 100, 50]
+        for _, commands in pages:
+            assert len(commands) == QUERIES_PER_PAGE, commands
+        
+        rows = [row for page, _ in pages for row in page]
+        ids = [row['id'] for row in rows]
+        assert len(set(ids)) == BOOKING_COUNT
+        assert ids == sorted(ids, reverse=True)
+        
+        first = rows[0]
+        assert first['service_name'] == f"Service {int(first['id'][-4:]) % 3}"
+        assert first['master_name'] == f"Master {int(first['id'][-4:]) % 2}"
+        assert first['master_location'] == "Lisbon"
+        print(f"✅ {BOOKING_COUNT} bookings in {len(pages)} pages, {QUERIES_PER_PAGE} queries per page")
+
+    def test_default_page_size(self, mongo_db):
+        """The portal's plain request gets every booking and no cursor"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.get("/api/bookings/client/email/c@slotta.app")
+        
+        response = asyncio.run(run())
+        
+        assert response.status_code == 200
+        assert len(response.json()) == BOOKING_COUNT
+        assert "X-Next-Cursor" not in response.headers
+        print(f"✅ Default page holds all {BOOKING_COUNT} bookings")
+
+    def test_unknown_client(self, mongo_db):
+        """Unknown email returns an empty list"""
+        import server
+
+        async def run():
+            mongo_db()
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                response = await http.get("/api/bookings/client/email/nobody@slotta.app")
+            return response
+        
+        response = asyncio.run(run())
+        
+        assert response.status_code == 200
+        assert response.json() == []
+        print("✅ Unknown client has no bookings")
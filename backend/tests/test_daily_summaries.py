@@ -0,0 +1,152 @@
+"""
+Daily Summary Tests
+Tests for:
+- Summaries for every master are built from batched aggregations with
+  the right schedule, names and totals
+- A re-run (e.g. after an interruption) does not send twice and only
+  retries failed sends
+- A send left at "sending" by a crashed run is retried once its lease
+  has run out, and left alone while the lease is live
+
+Runs against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+DAY = date(2026, 3, 2)
+MASTERS = 23
+
+
+class StubSender:
+    """Records summaries; fails for the given master emails"""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.sent = {}
+
+    async def send(self, to_email, master_name, upcoming_bookings, time_protected, pending_payouts):
+        await asyncio.sleep(0.01)
+        if to_email in self.fail_for:
+            return False
+        self.sent[to_email] = {
+            "upcoming": upcoming_bookings,
+            "time_protected": time_protected,
+            "pending_payouts": pending_payouts
+        }
+        return True
+
+
+async def _seed(db):
+    morning = datetime.combine(DAY, datetime.min.time()) + timedelta(hours=9)
+    await db.masters.insert_many([
+        {
+            "id": f"master-{i:02d}",
+            "email": f"m{i:02d}@slotta.app",
+            "name": f"Master {i}",
+            "settings": {"daily_summary_enabled": i != 0}
+        }
+        for i in range(MASTERS)
+    ])
+    await db.services.insert_one({"id": "service-1", "name": "Haircut"})
+    await db.clients.insert_one({"id": "client-1", "name": "Ana"})
+    await db.bookings.insert_many([
+        # Two bookings today, listed in time order
+        {"id": "b1", "master_id": "master-01", "service_id": "service-1", "client_id": "client-1",
+         "booking_date": morning + timedelta(hours=2), "status": "confirmed", "slotta_amount": 15.0},
+        {"id": "b2", "master_id": "master-01", "service_id": "service-1", "client_id": "client-1",
+         "booking_date": morning, "status": "pending", "slotta_amount": 10.0},
+        # Not today, still counts towards time protected
+        {"id": "b3", "master_id": "master-01", "service_id": "service-1", "client_id": "client-1",
+         "booking_date": morning + timedelta(days=3), "status": "confirmed", "slotta_amount": 20.0},
+        # Cancelled bookings are not on the schedule
+        {"id": "b4", "master_id": "master-02", "service_id": "service-1", "client_id": "client-1",
+         "booking_date": morning, "status": "cancelled", "slotta_amount": 10.0},
+    ])
+    await db.transactions.insert_many([
+        {"id": "t1", "master_id": "master-01", "amount": 12.5},
+        {"id": "t2", "master_id": "master-01", "amount": 7.5},
+    ])
+
+
+class TestDailySummaries:
+    """Batched summary fan-out with checkpointing"""
+
+    def test_summaries_content(self, mongo_db):
+        """Each enabled master gets one summary with today's schedule and totals"""
+        from daily_summaries import send_daily_summaries
+        
+        sender = StubSender()
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            counts = await send_daily_summaries(db, sender.send, day=DAY, batch_size=5, concurrency=4)
+            return counts
+        
+        counts = asyncio.run(run())
+        
+        assert counts == {"sent": MASTERS - 1, "skipped": 0, "failed": 0}
+        assert "m00@slotta.app" not in sender.sent
+        
+        summary = sender.sent["m01@slotta.app"]
+        assert summary["upcoming"] == [
+            {"time": "09:00", "client": "Ana", "service": "Haircut"},
+            {"time": "11:00", "client": "Ana", "service": "Haircut"}
+        ]
+        assert summary["time_protected"] == 35.0
+        assert summary["pending_payouts"] == 20.0
+        
+        assert sender.sent["m02@slotta.app"] == {"upcoming": [], "time_protected": 0, "pending_payouts": 0}
+        print(f"✅ {counts['sent']} summaries built in batches")
+
+    def test_rerun_does_not_double_send(self, mongo_db):
+        """A second run skips sent masters and retries only failures"""
+        from daily_summaries import send_daily_summaries
+        
+        failing = StubSender(fail_for={"m03@slotta.app", "m17@slotta.app"})
+        retry = StubSender()
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            first = await send_daily_summaries(db, failing.send, day=DAY, batch_size=5)
+            second = await send_daily_summaries(db, retry.send, day=DAY, batch_size=5)
+            third = await send_daily_summaries(db, retry.send, day=DAY, batch_size=5)
+            return first, second, third
+        
+        first, second, third = asyncio.run(run())
+        
+        assert first == {"sent": MASTERS - 3, "skipped": 0, "failed": 2}
+        assert second == {"sent": 2, "skipped": MASTERS - 3, "failed": 0}
+        assert set(retry.sent) == {"m03@slotta.app", "m17@slotta.app"}
+        assert third == {"sent": 0, "skipped": MASTERS - 1, "failed": 0}
+        print("✅ Re-runs only retry failed summaries")
+
+    def test_expired_sending_is_retried(self, mongo_db):
+        """A crashed run's claim is taken over after its lease; a live claim is not"""
+        from daily_summaries import checkpoint_id, send_daily_summaries
+        
+        sender = StubSender()
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            now = datetime.utcnow()
+            await db.daily_summary_runs.insert_many([
+                {"_id": checkpoint_id(DAY, "master-03"), "master_id": "master-03", "status": "sending",
+                 "started_at": now - timedelta(hours=1), "locked_until": now - timedelta(minutes=55)},
+                {"_id": checkpoint_id(DAY, "master-17"), "master_id": "master-17", "status": "sending",
+                 "started_at": now, "locked_until": now + timedelta(minutes=5)}
+            ])
+            counts = await send_daily_summaries(db, sender.send, day=DAY, batch_size=5)
+            retried = await db.daily_summary_runs.find_one({"_id": checkpoint_id(DAY, "master-03")})
+            return counts, retried
+        
+        counts, retried = asyncio.run(run())
+        
+        assert counts == {"sent": MASTERS - 2, "skipped": 1, "failed": 0}
+        assert "m03@slotta.app" in sender.sent
+        assert "m17@slotta.app" not in sender.sent
+        assert retried['status'] == "sent" and "locked_until" not in retried
+        print("✅ Expired sending checkpoint retried, live one left alone")
@@ -0,0 +1,156 @@
+"""
+Document Cache Tests
+Tests for:
+- TTLCache LRU eviction, expiry and counters
+- The identity map returns one document per request and is dropped after
+- Public booking page reads are served from the process cache, and
+  update_master / update_service / delete_service invalidate it
+
+The API tests run in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+
+import httpx
+
+from doc_cache import DocumentCache, TTLCache, _request_docs
+
+
+class FakeCollection:
+    """find over a list of documents (the batch loaders' $in queries), counting calls"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.reads = 0
+
+    def find(self, query, projection=None):
+        self.reads += 1
+        key, condition = next(iter(query.items()))
+        matches = [dict(d) for d in self.docs if d.get(key) in condition["$in"]]
+
+        class Cursor:
+            async def to_list(self, length):
+                return matches
+        return Cursor()
+
+
+class TestTTLCache:
+    """LRU with expiry"""
+
+    def test_lru_eviction(self):
+        """The least recently used entry goes first"""
+        cache = TTLCache(maxsize=2, ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+        cache.set("c", 3)
+        
+        assert cache.get("b") is None
+        assert (cache.get("a"), cache.get("c")) == (1, 3)
+        assert cache.stats()['evictions'] == 1
+        assert (cache.stats()['hits'], cache.stats()['misses']) == (3, 1)
+        print("✅ LRU eviction")
+
+    def test_expiry(self, monkeypatch):
+        """Entries are misses once ttl_seconds have passed"""
+        import doc_cache
+        
+        now = [1000.0]
+        monkeypatch.setattr(doc_cache.time, "monotonic", lambda: now[0])
+        cache = TTLCache(maxsize=10, ttl_seconds=30)
+        cache.set("a", 1)
+        now[0] += 29
+        assert cache.get("a") == 1
+        now[0] += 1
+        assert cache.get("a") is None
+        assert cache.stats()['size'] == 0
+        print("✅ TTL expiry")
+
+
+class TestDocumentCache:
+    """Identity map and process cache"""
+
+    def test_identity_map_and_invalidation(self):
+        """Within a request a client is read once; masters are shared across requests"""
+        cache = DocumentCache(maxsize=100, ttl_seconds=60)
+        db = {
+            "masters": FakeCollection([{"id": "master-1", "booking_slug": "anna", "name": "Anna"}]),
+            "clients": FakeCollection([{"id": "client-1", "name": "Client", "reliability": "new"}]),
+        }
+
+        class FakeDb(dict):
+            masters = db["masters"]
+
+        async def request(work):
+            token = _request_docs.set({})
+            try:
+                return await work()
+            finally:
+                _request_docs.reset(token)
+
+        async def first():
+            client = await cache.get_client(FakeDb(db), "client-1")
+            again = await cache.get_client(FakeDb(db), "client-1")
+            # A client returned by a write replaces the mapped copy
+            written = {**client, "reliability": "reliable"}
+            cache.remember_client(written)
+            after_write = await cache.get_client(FakeDb(db), "client-1")
+            master = await cache.get_master_by_slug(FakeDb(db), "anna")
+            return client is again and after_write is written, after_write['reliability'], master
+
+        async def second():
+            await cache.get_client(FakeDb(db), "client-1")
+            return await cache.get_master(FakeDb(db), "master-1")
+        
+        same, reliability, master = asyncio.run(request(first))
+        other = asyncio.run(request(second))
+        
+        assert same and reliability == "reliable"
+        assert db["clients"].reads == 2  # once per request
+        assert db["masters"].reads == 1  # shared across requests
+        assert other == master and other is not master
+        
+        cache.invalidate_master("master-1")
+        asyncio.run(request(lambda: cache.get_master(FakeDb(db), "master-1")))
+        assert db["masters"].reads == 2
+        print("✅ Identity map per request, masters shared until invalidated")
+
+    def test_api_reads_and_invalidation(self, mongo_db):
+        """Repeated page views hit the cache; writes are visible immediately"""
+        import server
+        from doc_cache import doc_cache
+
+        async def run():
+            db = mongo_db()
+            await db.masters.insert_one({
+                "id": "master-1", "email": "m@slotta.app", "name": "Anna", "booking_slug": "anna"
+            })
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                service = (await http.post("/api/services", json={
+                    "master_id": "master-1", "name": "Cut", "duration_minutes": 60, "price": 80.0
+                })).json()
+                for _ in range(3):
+                    assert (await http.get("/api/masters/anna")).status_code == 200
+                    assert len((await http.get("/api/services/master/master-1")).json()) == 1
+                stats = doc_cache.stats()
+                
+                await http.put("/api/masters/master-1", json={"name": "Anna B."})
+                renamed = (await http.get("/api/masters/anna")).json()
+                await http.put(f"/api/services/{service['id']}", json={
+                    "master_id": "master-1", "name": "Long cut", "duration_minutes": 90, "price": 100.0
+                })
+                updated = (await http.get("/api/services/master/master-1")).json()
+                await http.delete(f"/api/services/{service['id']}")
+                active = (await http.get("/api/services/master/master-1")).json()
+            return stats, renamed, updated, active
+        
+        stats, renamed, updated, active = asyncio.run(run())
+        
+        assert stats['masters']['hits'] >= 2
+        assert stats['service_lists']['hits'] == 2
+        assert renamed['name'] == "Anna B."
+        assert [s['name'] for s in updated] == ["Long cut"]
+        assert active == []
+        print(f"✅ Cached reads and invalidation: {stats['masters']}")
@@ -0,0 +1,166 @@
+"""
+Double-Booking Prevention Tests
+Tests for:
+- Hundreds of parallel /bookings/with-payment requests for one slot
+  produce exactly one booking
+- A request that fails after reserving its slot frees it again
+- A retried booking reuses its Stripe idempotency key, and a hold placed
+  by a request that then failed is cancelled
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+PARALLEL_REQUESTS = 300
+
+
+async def _seed(db):
+    master = {"id": "master-1", "email": "m@slotta.app", "name": "Master", "booking_slug": "master-1", "settings": {}}
+    service = {"id": "service-1", "master_id": "master-1", "name": "Cut", "duration_minutes": 60, "price": 80.0, "active": True}
+    await db.masters.insert_one(master)
+    await db.services.insert_one(service)
+
+
+class TestConcurrentBookings:
+    """Atomic slot reservation under load"""
+
+    def test_parallel_requests_single_winner(self, mongo_db):
+        """Exactly one of the parallel requests for a slot succeeds"""
+        import server
+        from db_indexes import ensure_indexes
+
+        slot = (datetime.utcnow() + timedelta(days=3)).replace(hour=10, minute=0, second=0, microsecond=0)
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+            await _seed(db)
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as http:
+                responses = await asyncio.gather(*[
+                    http.post("/api/bookings/with-payment", json={
+                        "master_id": "master-1",
+                        "service_id": "service-1",
+                        "booking_date": (slot + timedelta(minutes=15 * (i % 3))).isoformat(),
+                        "client_name": f"Client {i}",
+                        "client_email": f"client{i}@slotta.app",
+                        "payment_method_id": "pm_card_visa"
+                    })
+                    for i in range(PARALLEL_REQUESTS)
+                ])
+
+            bookings = await db.bookings.count_documents({"master_id": "master-1"})
+            return [r.status_code for r in responses], bookings
+
+        codes, bookings = asyncio.run(run())
+
+        assert codes.count(200) == 1
+        assert codes.count(409) == PARALLEL_REQUESTS - 1
+        assert bookings == 1
+        print(f"✅ {PARALLEL_REQUESTS} parallel requests, one winner")
+
+    def test_failure_after_reservation_frees_slot(self, mongo_db, monkeypatch):
+        """An error building the booking releases the lease instead of holding it for its TTL"""
+        import server
+        from db_indexes import ensure_indexes
+
+        slot = (datetime.utcnow() + timedelta(days=4)).replace(hour=10, minute=0, second=0, microsecond=0)
+        booking_model = server.Booking
+
+        def broken_booking(**kwargs):
+            raise RuntimeError("booking construction failed")
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+            await _seed(db)
+            await db.clients.insert_one({
+                "id": "client-1", "email": "client@slotta.app", "name": "Client", "reliability": "new",
+                "total_bookings": 0, "completed_bookings": 0, "no_shows": 0, "cancellations": 0
+            })
+            request = {"master_id": "master-1", "service_id": "service-1", "booking_date": slot.isoformat()}
+            requests = {
+                "/api/bookings": {**request, "client_id": "client-1"},
+                "/api/bookings/with-payment": {
+                    **request, "client_name": "Client", "client_email": "client@slotta.app",
+                    "payment_method_id": "pm_card_visa"
+                }
+            }
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                monkeypatch.setattr(server, "Booking", broken_booking)
+                for path, body in requests.items():
+                    with pytest.raises(RuntimeError):
+                        await http.post(path, json=body)
+                leases = await db.slot_reservations.count_documents({})
+                monkeypatch.setattr(server, "Booking", booking_model)
+                retried = await http.post("/api/bookings", json=requests["/api/bookings"])
+
+            return leases, retried.status_code
+
+        leases, retried = asyncio.run(run())
+
+        assert leases == 0
+        assert retried == 201
+        print("✅ Failed booking released its slot")
+
+    def test_retry_reuses_key_and_failure_cancels_hold(self, mongo_db, monkeypatch):
+        """Retries send the same key; once a hold is cancelled the slot gets a new one"""
+        import server
+        from db_indexes import ensure_indexes
+        from services.stripe_service import PaymentAuthorizationError
+
+        slot = (datetime.utcnow() + timedelta(days=5)).replace(hour=10, minute=0, second=0, microsecond=0)
+        booking_model = server.Booking
+        keys, cancelled = [], []
+
+        async def authorize_payment(idempotency_key, **kwargs):
+            keys.append(idempotency_key)
+            if len(keys) == 1:
+                raise PaymentAuthorizationError("connection timed out")
+            return {"id": f"pi_{len(keys)}", "status": "requires_capture"}
+
+        async def cancel_payment(payment_intent_id):
+            cancelled.append(payment_intent_id)
+            return True
+
+        def broken_booking(**kwargs):
+            raise RuntimeError("booking construction failed")
+
+        monkeypatch.setattr(server.stripe_service, "authorize_payment", authorize_payment)
+        monkeypatch.setattr(server.stripe_service, "cancel_payment", cancel_payment)
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+            await _seed(db)
+            body = {
+                "master_id": "master-1", "service_id": "service-1", "booking_date": slot.isoformat(),
+                "client_name": "Client", "client_email": "client@slotta.app", "payment_method_id": "pm_card_visa"
+            }
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                declined = await http.post("/api/bookings/with-payment", json=body)
+                monkeypatch.setattr(server, "Booking", broken_booking)
+                with pytest.raises(RuntimeError):
+                    await http.post("/api/bookings/with-payment", json=body)
+                monkeypatch.setattr(server, "Booking", booking_model)
+                booked = await http.post("/api/bookings/with-payment", json=body)
+
+            return declined.status_code, booked.json()
+
+        declined, booked = asyncio.run(run())
+
+        assert declined == 400
+        assert keys[0] == keys[1] != keys[2]
+        assert cancelled == ["pi_2"]
+        assert booked["payment_intent_id"] == "pi_3"
+        print("✅ Retries reuse the hold key, abandoned holds are cancelled")
@@ -0,0 +1,77 @@
+"""
+Fast JSON Response Tests
+Tests for:
+- trusted_response produces the same JSON as response_model validation
+  (model fields only, defaults filled, datetimes as ISO 8601)
+- The list routes keep their response schema in OpenAPI
+"""
+
+import json
+from datetime import datetime
+from typing import List
+
+from pydantic import TypeAdapter
+
+from fast_json import dumps, trusted_response
+from models import Booking, BookingStatus, Service
+
+NOW = datetime(2026, 5, 4, 10, 30, 15, 123000)
+
+
+def _bookings(count=3):
+    return [
+        {
+            "id": f"booking-{i}", "master_id": "master-1", "client_id": "client-1", "service_id": "service-1",
+            "booking_date": NOW, "duration_minutes": 60, "service_price": 80.0, "slotta_amount": 12.5,
+            "status": "confirmed", "risk_score": 40, "created_at": NOW, "updated_at": NOW,
+            # Not a Booking field, dropped like response_model would
+            "legacy_field": "x"
+        }
+        for i in range(count)
+    ]
+
+
+class TestFastJson:
+    """orjson path matches the Pydantic path"""
+
+    def test_matches_response_model(self):
+        """Same document after json.loads"""
+        docs = _bookings()
+        adapter = TypeAdapter(List[Booking])
+        expected = json.loads(adapter.dump_json(adapter.validate_python(docs)))
+        
+        actual = json.loads(trusted_response(docs, Booking).body)
+        
+        assert actual == expected
+        assert 'legacy_field' not in actual[0]
+        assert actual[0]['booking_date'] == NOW.isoformat()
+        print("✅ trusted_response matches response_model output")
+
+    def test_defaults_and_headers(self):
+        """Missing simple defaults are filled; headers are passed through"""
+        response = trusted_response(
+            [{"id": "service-1", "master_id": "master-1", "name": "Cut", "duration_minutes": 30, "price": 20.0}],
+            Service,
+            {"X-Next-Cursor": "abc"}
+        )
+        
+        body = json.loads(response.body)
+        assert body[0]['active'] is True and body[0]['base_slotta'] == 0.0
+        assert response.headers['x-next-cursor'] == "abc"
+        assert dumps({"status": BookingStatus.NO_SHOW}) == b'{"status":"no-show"}'
+        print("✅ Defaults filled and headers kept")
+
+    def test_openapi_schema_unchanged(self):
+        """List routes still document their models"""
+        import server
+        
+        paths = server.app.openapi()['paths']
+        for path, model in (
+            ("/api/bookings/master/{master_id}", "Booking"),
+            ("/api/bookings/client/{client_id}", "Booking"),
+            ("/api/services/master/{master_id}", "Service"),
+            ("/api/clients/master/{master_id}", "MasterClient"),
+        ):
+            schema = paths[path]['get']['responses']['200']['content']['application/json']['schema']
+            assert schema['items']['$ref'].endswith(f"/{model}"), (path, schema)
+        print("✅ OpenAPI schemas unchanged")
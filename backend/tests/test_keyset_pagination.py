@@ -0,0 +1,171 @@
+"""
+Keyset Pagination Tests
+Tests for:
+- Master bookings, calendar blocks and transactions walk every row
+  exactly once, in order, when following the cursors
+- Rows sharing a sort value are split across pages without loss
+- Rows with a null or missing sort value are paged through in both
+  directions
+- The transactions response keeps its offset key for offset callers
+- A malformed cursor is rejected with 400
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from pagination import fetch_page
+
+import httpx
+
+ROWS = 53
+PAGE_SIZE = 10
+START = datetime(2026, 3, 1, 9, 0)
+
+
+async def _seed(db):
+    # Pairs of rows share a sort value so pages break inside ties
+    await db.bookings.insert_many([
+        {"id": f"booking-{i:03d}", "master_id": "master-1", "client_id": "client-1", "service_id": "service-1",
+         "status": "pending", "booking_date": START + timedelta(hours=i // 2), "duration_minutes": 60,
+         "service_price": 50.0, "slotta_amount": 10.0}
+        for i in range(ROWS)
+    ])
+    await db.calendar_blocks.insert_many([
+        {"id": f"block-{i:03d}", "master_id": "master-1", "start_datetime": START + timedelta(hours=i // 2),
+         "end_datetime": START + timedelta(hours=i // 2, minutes=30)}
+        for i in range(ROWS)
+    ])
+    await db.transactions.insert_many([
+        {"id": f"tx-{i:03d}", "master_id": "master-1", "type": "wallet_credit", "amount": 1.0,
+         "description": "Credit", "created_at": START + timedelta(hours=i // 2)}
+        for i in range(ROWS)
+    ])
+
+
+async def _walk(http, path):
+    """Follow X-Next-Cursor until the last page"""
+    
+    rows, cursor = [], None
+    while True:
+        params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+        response = await http.get(path, params=params)
+        assert response.status_code == 200, response.text
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return rows
+
+
+class TestKeysetPagination:
+    """Cursor pages cover every row exactly once"""
+
+    def test_walk_list_endpoints(self, mongo_db):
+        """Bookings (newest first), blocks (by start) and transactions"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                bookings = await _walk(http, "/api/bookings/master/master-1")
+                blocks = await _walk(http, "/api/calendar/blocks/master/master-1")
+                
+                transactions, cursor = [], None
+                while True:
+                    params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+                    page = (await http.get("/api/transactions/master/master-1", params=params)).json()
+                    transactions.extend(page['transactions'])
+                    cursor = page['next_cursor']
+                    if not cursor:
+                        break
+                total_count = page['total_count']
+            return bookings, blocks, transactions, total_count
+        
+        bookings, blocks, transactions, total_count = asyncio.run(run())
+        
+        expected = [f"{i:03d}" for i in range(ROWS)]
+        assert [b['id'] for b in bookings] == [f"booking-{i}" for i in reversed(expected)]
+        assert [b['id'] for b in blocks] == [f"block-{i}" for i in expected]
+        assert [t['id'] for t in transactions] == [f"tx-{i}" for i in reversed(expected)]
+        assert total_count == ROWS
+        print(f"✅ {ROWS} rows walked in pages of {PAGE_SIZE} on three endpoints")
+
+    def test_invalid_cursor(self, mongo_db):
+        """Garbage cursors are a client error"""
+        import server
+
+        async def run():
+            mongo_db()
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                responses = [
+                    await http.get(path, params={"cursor": "not-a-cursor"})
+                    for path in (
+                        "/api/bookings/master/master-1",
+                        "/api/services/master/master-1",
+                        "/api/transactions/master/master-1"
+                    )
+                ]
+            return responses
+        
+        responses = asyncio.run(run())
+        
+        assert [r.status_code for r in responses] == [400, 400, 400]
+        print("✅ Invalid cursors rejected")
+
+    def test_null_sort_values(self, mongo_db):
+        """Null and missing sort values come first ascending and last descending"""
+
+        async def walk(collection, direction):
+            ids, cursor = [], None
+            while True:
+                docs, cursor = await fetch_page(collection, {}, "created_at", direction, 3, cursor)
+                ids.extend(d['id'] for d in docs)
+                if not cursor:
+                    return ids
+
+        async def run():
+            db = mongo_db()
+            await db.transactions.insert_many(
+                [{"id": f"tx-{i}", "created_at": START + timedelta(hours=i)} for i in range(4)]
+                + [{"id": "tx-null", "created_at": None}, {"id": "tx-missing"}]
+            )
+            return await walk(db.transactions, 1), await walk(db.transactions, -1)
+        
+        ascending, descending = asyncio.run(run())
+        
+        dated = [f"tx-{i}" for i in range(4)]
+        assert ascending == ["tx-missing", "tx-null"] + dated
+        assert descending == list(reversed(dated)) + ["tx-null", "tx-missing"]
+        print("✅ Rows without a sort value paged in both directions")
+
+    def test_transactions_offset(self, mongo_db):
+        """offset still skips rows and is echoed; a cursor overrides it"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                first = (await http.get("/api/transactions/master/master-1", params={"limit": 5})).json()
+                skipped = (await http.get("/api/transactions/master/master-1", params={"limit": 5, "offset": 5})).json()
+                cursor = (await http.get(
+                    "/api/transactions/master/master-1",
+                    params={"limit": 5, "offset": 5, "cursor": first['next_cursor']}
+                )).json()
+            return first, skipped, cursor
+        
+        first, skipped, cursor = asyncio.run(run())
+        
+        assert first['offset'] == 0
+        assert skipped['offset'] == 5
+        assert [t['id'] for t in skipped['transactions']] == [t['id'] for t in cursor['transactions']]
+        assert cursor['offset'] == 0
+        print("✅ Transactions offset kept alongside cursors")
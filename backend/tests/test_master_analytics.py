@@ -0,0 +1,109 @@
+"""
+Master Analytics Tests
+Tests for:
+- Counts per status, Slotta totals and wallet balance from the $facet
+  aggregation match a straightforward computation
+- Date-range filtering and the per-service breakdown
+- Masters without bookings
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+START = datetime(2026, 2, 1, 10, 0)
+STATUSES = ["confirmed", "completed", "completed", "no-show", "cancelled"]
+
+
+def _bookings(count=60):
+    return [
+        {
+            "id": f"booking-{i}",
+            "master_id": "master-1",
+            "service_id": f"service-{i % 3}",
+            "client_id": "client-1",
+            "status": STATUSES[i % len(STATUSES)],
+            "booking_date": START + timedelta(days=i),
+            "slotta_amount": float(10 + i % 4)
+        }
+        for i in range(count)
+    ]
+
+
+async def _seed(db):
+    await db.bookings.insert_many(_bookings())
+    # Another master's data must not leak in
+    await db.bookings.insert_one({**_bookings(1)[0], "id": "other", "master_id": "master-2"})
+    await db.services.insert_many([{"id": f"service-{i}", "name": f"Service {i}"} for i in range(2)])
+    await db.transactions.insert_many([
+        {"id": "t1", "master_id": "master-1", "type": "wallet_credit", "amount": 12.0},
+        {"id": "t2", "master_id": "master-1", "type": "wallet_credit", "amount": 8.0},
+        {"id": "t3", "master_id": "master-1", "type": "payout", "amount": 5.0},
+        {"id": "t4", "master_id": "master-2", "type": "wallet_credit", "amount": 99.0},
+    ])
+
+
+async def _get(path, mongo_db, params=None):
+    import server
+    
+    db = mongo_db()
+    if not await db.bookings.count_documents({}):
+        await _seed(db)
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        response = await http.get(path, params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestMasterAnalytics:
+    """Analytics are aggregated server-side"""
+
+    def test_totals(self, mongo_db):
+        """Whole-history totals match the seeded data"""
+        analytics = asyncio.run(_get("/api/analytics/master/master-1", mongo_db))
+        
+        bookings = _bookings()
+        slotta = sum(b['slotta_amount'] for b in bookings)
+        assert analytics['total_bookings'] == 60
+        assert analytics['completed_bookings'] == 24
+        assert analytics['no_shows'] == 12
+        assert analytics['no_show_rate'] == 20.0
+        assert analytics['time_protected_eur'] == slotta
+        assert analytics['avg_slotta'] == slotta / 60
+        assert analytics['wallet_balance'] == 20.0
+        assert analytics['by_status'] == {"confirmed": 12, "completed": 24, "no-show": 12, "cancelled": 12}
+        assert 'services' not in analytics
+        print(f"✅ Totals for {analytics['total_bookings']} bookings")
+
+    def test_date_range_and_services(self, mongo_db):
+        """from/to restrict bookings; by_service breaks them down"""
+        analytics = asyncio.run(_get("/api/analytics/master/master-1", mongo_db, params={
+            "from": START.isoformat(),
+            "to": (START + timedelta(days=10)).isoformat(),
+            "by_service": "true"
+        }))
+        
+        in_range = _bookings()[:10]
+        assert analytics['total_bookings'] == 10
+        assert analytics['time_protected_eur'] == sum(b['slotta_amount'] for b in in_range)
+        
+        services = {s['service_id']: s for s in analytics['services']}
+        assert services['service-0']['bookings'] == 4
+        assert services['service-0']['service_name'] == "Service 0"
+        assert services['service-2']['service_name'] == "Unknown"
+        assert sum(s['completed'] for s in services.values()) == 4
+        assert sum(s['no_shows'] for s in services.values()) == 2
+        print(f"✅ {len(services)} services in range")
+
+    def test_master_without_bookings(self, mongo_db):
+        """A master with no bookings gets zeros"""
+        analytics = asyncio.run(_get("/api/analytics/master/master-3", mongo_db))
+        
+        assert analytics['total_bookings'] == 0
+        assert analytics['no_show_rate'] == 0
+        assert analytics['wallet_balance'] == 0
+        print("✅ Empty analytics")
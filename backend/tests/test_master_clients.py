@@ -0,0 +1,102 @@
+"""
+Master Clients Tests
+Tests for:
+- /clients/master/{master_id} returns each client once with its stats
+  for that master, most recent booking first
+- Cursor pages cover every client exactly once
+- Bookings of deleted clients and of other masters are left out
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+
+CLIENTS = 25
+START = datetime(2026, 2, 1, 9, 0)
+
+
+async def _seed(db):
+    await db.clients.insert_many([
+        {"id": f"client-{i:02d}", "email": f"c{i}@slotta.app", "name": f"Client {i}", "total_bookings": 99}
+        for i in range(CLIENTS)
+    ])
+    # Client i has i + 1 bookings with master-1; the latest is on day i
+    bookings = []
+    for i in range(CLIENTS):
+        for n in range(i + 1):
+            bookings.append({
+                "id": f"booking-{i:02d}-{n:02d}",
+                "master_id": "master-1",
+                "client_id": f"client-{i:02d}",
+                "status": "no-show" if n == 0 else "completed",
+                "booking_date": START + timedelta(days=i - n)
+            })
+    bookings.append({"id": "other-master", "master_id": "master-2", "client_id": "client-00",
+                     "status": "completed", "booking_date": START + timedelta(days=90)})
+    bookings.append({"id": "orphan", "master_id": "master-1", "client_id": "deleted-client",
+                     "status": "completed", "booking_date": START + timedelta(days=10, hours=1)})
+    await db.bookings.insert_many(bookings)
+
+
+class TestMasterClients:
+    """Clients are grouped server-side and paged by last booking"""
+
+    def test_grouped_sorted_and_paged(self, mongo_db):
+        """Every client once, newest first, with per-master stats"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                clients, cursor, pages = [], None, 0
+                while True:
+                    params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+                    response = await http.get("/api/clients/master/master-1", params=params)
+                    assert response.status_code == 200, response.text
+                    clients.extend(response.json())
+                    pages += 1
+                    cursor = response.headers.get("X-Next-Cursor")
+                    if not cursor:
+                        break
+            return clients, pages
+        
+        clients, pages = asyncio.run(run())
+        
+        assert pages == 3
+        assert [c['id'] for c in clients] == [f"client-{i:02d}" for i in reversed(range(CLIENTS))]
+        newest = clients[0]
+        assert newest['master_bookings'] == CLIENTS
+        assert newest['master_visits'] == CLIENTS - 1
+        assert newest['master_no_shows'] == 1
+        assert newest['total_bookings'] == 99
+        assert newest['last_booking_date'].startswith((START + timedelta(days=CLIENTS - 1)).date().isoformat())
+        print(f"✅ {len(clients)} clients in {pages} pages, most recent first")
+
+    def test_sparse_fields(self, mongo_db):
+        """fields= keeps only the selected client and relationship fields across pages"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                params = {"limit": 20, "fields": "name,master_visits"}
+                first = await http.get("/api/clients/master/master-1", params=params)
+                params["cursor"] = first.headers["X-Next-Cursor"]
+                second = await http.get("/api/clients/master/master-1", params=params)
+            return first.json(), second.json()
+        
+        first, second = asyncio.run(run())
+        
+        assert first[0] == {"id": "client-24", "name": "Client 24", "master_visits": CLIENTS - 1}
+        assert len(first) + len(second) == CLIENTS
+        assert all(set(c) == {"id", "name", "master_visits"} for c in first + second)
+        print("✅ Master clients with sparse fields")
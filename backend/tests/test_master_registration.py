@@ -0,0 +1,74 @@
+"""
+Master Registration Tests
+Tests for:
+- Concurrent registrations with the same booking slug give one account
+  and 400s, never a 500 from the unique index
+- POST /masters rejects an email that is already registered with 400
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+
+import httpx
+
+PARALLEL_REQUESTS = 20
+
+
+class TestMasterRegistration:
+    """Unique email and booking slug surface as client errors"""
+
+    def test_concurrent_registrations(self, mongo_db):
+        """Only one of the parallel registrations for a slug succeeds"""
+        import server
+        from db_indexes import ensure_indexes
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as http:
+                responses = await asyncio.gather(*[
+                    http.post("/api/auth/register", json={
+                        "email": f"master{i}@slotta.app", "name": f"Master {i}",
+                        "password": "secret", "booking_slug": "anna"
+                    })
+                    for i in range(PARALLEL_REQUESTS)
+                ])
+
+            masters = await db.masters.count_documents({"booking_slug": "anna"})
+            return responses, masters
+
+        responses, masters = asyncio.run(run())
+
+        codes = [r.status_code for r in responses]
+        assert codes.count(200) == 1
+        assert codes.count(400) == PARALLEL_REQUESTS - 1
+        assert {r.json()['detail'] for r in responses if r.status_code == 400} == {"Booking slug already taken"}
+        assert masters == 1
+        print(f"✅ {PARALLEL_REQUESTS} parallel registrations, one account")
+
+    def test_create_master_duplicate_email(self, mongo_db):
+        """A second master with a registered email is a 400"""
+        import server
+        from db_indexes import ensure_indexes
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return [
+                    await http.post("/api/masters", json={
+                        "email": "anna@slotta.app", "name": "Anna", "password": "secret", "booking_slug": slug
+                    })
+                    for slug in ("anna", "anna-2")
+                ]
+
+        first, second = asyncio.run(run())
+
+        assert first.status_code == 201
+        assert (second.status_code, second.json()['detail']) == (400, "Email already registered")
+        print("✅ Duplicate master email rejected")
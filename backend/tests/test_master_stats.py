@@ -0,0 +1,203 @@
+"""
+Master Stats Rollup Tests
+Tests for:
+- Create, cancel, complete and no-show keep the master_stats rollup and
+  day buckets equal to a recomputation from raw data
+- Analytics and wallet endpoints read from the rollup
+- Reconcile reports and repairs drift
+- Until a new rollup has settled, reads are computed from raw data
+- A backfill that a write overlaps is retried instead of counting the
+  write twice
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import httpx
+
+
+async def _seed(db):
+    await db.masters.insert_one({"id": "master-1", "email": "m@slotta.app", "name": "Master", "booking_slug": "master-1"})
+    await db.services.insert_one({
+        "id": "service-1", "master_id": "master-1", "name": "Cut", "duration_minutes": 60, "price": 80.0, "active": True
+    })
+
+
+async def _book_and_transition(http, day):
+    """Create four bookings and move three of them to a final status"""
+    
+    client = (await http.post("/api/clients", json={"email": "c@slotta.app", "name": "Client"})).json()
+    ids = []
+    for hour in (9, 11, 13, 15):
+        response = await http.post("/api/bookings", json={
+            "master_id": "master-1",
+            "client_id": client['id'],
+            "service_id": "service-1",
+            "booking_date": day.replace(hour=hour).isoformat()
+        })
+        assert response.status_code == 201, response.text
+        ids.append(response.json()['id'])
+    
+    assert (await http.put(f"/api/bookings/{ids[0]}/cancel")).status_code == 200
+    assert (await http.put(f"/api/bookings/{ids[1]}/complete")).status_code == 200
+    assert (await http.put(f"/api/bookings/{ids[2]}/no-show")).status_code == 200
+    # A stale second transition is rejected instead of double counted
+    assert (await http.put(f"/api/bookings/{ids[2]}/cancel")).status_code == 400
+    return ids
+
+
+class TestMasterStats:
+    """Rollups follow the booking lifecycle"""
+
+    def test_rollup_matches_recomputation(self, mongo_db, monkeypatch):
+        """Incremental rollup equals the rebuild; endpoints read it"""
+        import server
+        import master_stats
+        from master_stats import reconcile_master_stats
+        
+        monkeypatch.setattr(master_stats, "BUILD_SETTLE_SECONDS", 0)
+        day = (datetime.utcnow() + timedelta(days=5)).replace(minute=0, second=0, microsecond=0)
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                # First read builds the (empty) rollup so later writes apply deltas
+                await http.get("/api/analytics/master/master-1")
+                await _book_and_transition(http, day)
+                
+                analytics = (await http.get("/api/analytics/master/master-1")).json()
+                day_start = day.replace(hour=0)
+                daily = (await http.get("/api/analytics/master/master-1", params={
+                    "from": day_start.isoformat(),
+                    "to": (day_start + timedelta(days=1)).isoformat()
+                })).json()
+                other_day = (await http.get("/api/analytics/master/master-1", params={
+                    "from": (day_start + timedelta(days=1)).isoformat()
+                })).json()
+                wallet = (await http.get("/api/wallet/master/master-1")).json()
+            
+            report = await reconcile_master_stats(db, fix=False)
+            return analytics, daily, other_day, wallet, report
+        
+        analytics, daily, other_day, wallet, report = asyncio.run(run())
+        
+        assert analytics['by_status'] == {"cancelled": 1, "completed": 1, "no-show": 1, "pending": 1}
+        assert analytics['total_bookings'] == 4
+        assert analytics['wallet_balance'] > 0
+        assert daily['by_status'] == analytics['by_status']
+        assert other_day['total_bookings'] == 0
+        assert wallet['wallet_balance'] == analytics['wallet_balance']
+        assert len(wallet['transactions']) == 1
+        assert report['drifted'] == []
+        print(f"✅ Rollup matches recomputation: {analytics['by_status']}")
+
+    def test_reconcile_reports_and_fixes_drift(self, mongo_db, monkeypatch):
+        """A corrupted rollup is reported, then rebuilt"""
+        import master_stats
+        from master_stats import get_master_stats, reconcile_master_stats
+        
+        monkeypatch.setattr(master_stats, "BUILD_SETTLE_SECONDS", 0)
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            await db.bookings.insert_many([
+                {"id": f"b{i}", "master_id": "master-1", "status": "confirmed", "slotta_amount": 10.0,
+                 "booking_date": datetime(2026, 4, 1 + i, 10, 0)}
+                for i in range(3)
+            ])
+            await get_master_stats(db, "master-1")
+            await db.master_stats.update_one({"_id": "master-1"}, {"$inc": {"counts.confirmed": 5}})
+            
+            report = await reconcile_master_stats(db, fix=True)
+            stats = await get_master_stats(db, "master-1")
+            after = await reconcile_master_stats(db, fix=False)
+            return report, stats, after
+        
+        report, stats, after = asyncio.run(run())
+        
+        assert report['checked'] == 1
+        assert report['drifted'][0]['fields'] == {"counts.confirmed": {"stored": 8, "actual": 3}}
+        assert stats['counts'] == {"confirmed": 3}
+        assert after['drifted'] == []
+        print("✅ Drift reported and repaired")
+
+    def test_unsettled_rollup_reads_raw_data(self, mongo_db):
+        """A new rollup is not backfilled yet; reads and day ranges still see every booking"""
+        from master_stats import get_master_stats, stats_analytics, reconcile_master_stats
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            await db.bookings.insert_many([
+                {"id": f"b{i}", "master_id": "master-1", "status": "confirmed", "slotta_amount": 10.0,
+                 "booking_date": datetime(2026, 4, 1 + i, 10, 0)}
+                for i in range(3)
+            ])
+            stats = await get_master_stats(db, "master-1")
+            day = await stats_analytics(db, "master-1", date(2026, 4, 2), date(2026, 4, 3))
+            report = await reconcile_master_stats(db, fix=True)
+            stored = await db.master_stats.find_one({"_id": "master-1"})
+            return stats, day, report, stored
+        
+        stats, day, report, stored = asyncio.run(run())
+        
+        assert stats['counts'] == {"confirmed": 3}
+        assert day['by_status'] == {"confirmed": 1}
+        assert report['drifted'] == []
+        assert stored['building'] is True
+        print("✅ Unsettled rollup served from raw data")
+
+    def test_backfill_overlapping_a_write_is_retried(self, mongo_db, monkeypatch):
+        """Concurrent reads run one backfill; a booking written during a backfill is counted once"""
+        import master_stats
+        
+        monkeypatch.setattr(master_stats, "BUILD_SETTLE_SECONDS", 0)
+        compute = master_stats.compute_master_stats
+        adjust = master_stats._adjust
+        backfills = []
+
+        async def book_during_compute(db, master_id):
+            # Stored after the backfill's first read, seen by the recomputation,
+            # and its delta lands before the second read
+            booking = {"id": "late", "master_id": master_id, "status": "pending", "slotta_amount": 5.0,
+                       "booking_date": datetime(2026, 4, 9, 10, 0)}
+            await db.bookings.insert_one(dict(booking))
+            computed = await compute(db, master_id)
+            await master_stats.record_booking_created(db, booking)
+            monkeypatch.setattr(master_stats, "compute_master_stats", compute)
+            return computed
+
+        async def counted_adjust(db, master_id, stored, actual):
+            backfills.append(master_id)
+            await adjust(db, master_id, stored, actual)
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            await db.bookings.insert_many([
+                {"id": f"b{i}", "master_id": "master-1", "status": "confirmed", "slotta_amount": 10.0,
+                 "booking_date": datetime(2026, 4, 1 + i, 10, 0)}
+                for i in range(3)
+            ])
+            monkeypatch.setattr(master_stats, "_adjust", counted_adjust)
+            monkeypatch.setattr(master_stats, "compute_master_stats", book_during_compute)
+            first = await master_stats.get_master_stats(db, "master-1")
+            abandoned = await db.master_stats.find_one({"_id": "master-1"})
+            concurrent = await asyncio.gather(*[master_stats.get_master_stats(db, "master-1") for _ in range(5)])
+            report = await master_stats.reconcile_master_stats(db, fix=False)
+            return first, abandoned, concurrent, report
+        
+        first, abandoned, concurrent, report = asyncio.run(run())
+        
+        assert first['counts'] == {"confirmed": 3, "pending": 1}
+        assert abandoned['building'] is True
+        assert backfills == ["master-1"]
+        assert all(s['counts'] == {"confirmed": 3, "pending": 1} for s in concurrent)
+        assert report['drifted'] == []
+        print("✅ Backfill overlapping a write retried, write counted once")
@@ -0,0 +1,146 @@
+"""
+No-Show Processing Tests
+Tests for:
+- A no-show returns without waiting for Stripe or the notifiers; the
+  capture (with its idempotency key) and the alerts are outbox jobs that
+  the workers run afterwards
+- Booking, client, transactions, wallet and outbox jobs are written together
+- On a replica set a failure part-way through leaves nothing behind
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+import httpx
+import pytest
+
+from mongo_transactions import supports_transactions
+
+SIDE_EFFECT_DELAY_SECONDS = 1.0
+
+
+class StubSideEffects:
+    """Records outbox calls and takes SIDE_EFFECT_DELAY_SECONDS per call"""
+
+    def __init__(self):
+        self.calls = []
+
+    def handler(self, kind):
+        async def run(**payload):
+            await asyncio.sleep(SIDE_EFFECT_DELAY_SECONDS)
+            self.calls.append((kind, payload))
+            return True
+        return run
+
+
+async def _seed(db):
+    await db.masters.insert_one({
+        "id": "master-1", "email": "m@slotta.app", "name": "Anna", "booking_slug": "anna", "telegram_chat_id": "42"
+    })
+    await db.clients.insert_one({
+        "id": "client-1", "email": "c@slotta.app", "name": "Client", "total_bookings": 1, "no_shows": 0
+    })
+    await db.bookings.insert_one({
+        "id": "booking-1", "master_id": "master-1", "client_id": "client-1", "service_id": "service-1",
+        "booking_date": datetime(2026, 4, 1, 10), "status": "confirmed", "slotta_amount": 20.0,
+        "stripe_payment_intent_id": "pi_123"
+    })
+
+
+class TestNoShow:
+    """One transaction, side effects after the commit"""
+
+    def test_side_effects_run_after_commit(self, mongo_db):
+        """The response does not wait for Stripe or notifiers; the workers run them once"""
+        import server
+        from notification_outbox import notification_outbox
+        
+        stub = StubSideEffects()
+        original_handlers = dict(notification_outbox.handlers)
+        for kind in original_handlers:
+            notification_outbox.register(kind, stub.handler(kind))
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                started = time.perf_counter()
+                response = await http.put("/api/bookings/booking-1/no-show")
+                latency = time.perf_counter() - started
+            
+            state = {
+                "booking": await db.bookings.find_one({"id": "booking-1"}),
+                "client": await db.clients.find_one({"id": "client-1"}),
+                "transactions": await db.transactions.count_documents({"booking_id": "booking-1"}),
+                "wallet": await server.get_wallet_balance(db, "master-1"),
+                "queued": await db.notifications.count_documents({"status": "pending"}),
+            }
+            
+            await notification_outbox.start(db)
+            deadline = time.monotonic() + 15
+            while len(stub.calls) < 3 and time.monotonic() < deadline:
+                await asyncio.sleep(0.1)
+            await notification_outbox.stop()
+            return response, latency, state
+        
+        try:
+            response, latency, state = asyncio.run(run())
+        finally:
+            notification_outbox.handlers = original_handlers
+        
+        assert response.status_code == 200
+        assert latency < SIDE_EFFECT_DELAY_SECONDS
+        compensation = response.json()['master_compensation']
+        assert state['booking']['status'] == "no-show"
+        assert (state['client']['no_shows'], state['client']['wallet_balance']) == (1, response.json()['client_wallet_credit'])
+        assert state['transactions'] == 2
+        assert state['wallet']['balance'] == compensation
+        assert state['queued'] == 3
+        
+        calls = dict(stub.calls)
+        assert sorted(calls) == ["email.no_show_alert", "stripe.capture_payment", "telegram.no_show"]
+        assert calls["stripe.capture_payment"] == {
+            "payment_intent_id": "pi_123", "amount": 20.0, "idempotency_key": "slotta-capture-booking-1"
+        }
+        assert calls["email.no_show_alert"]['client_name'] == "Client"
+        print(f"✅ No-show in {latency * 1000:.0f}ms, side effects after commit")
+
+    def test_failure_rolls_back(self, mongo_db, monkeypatch):
+        """An error after the first writes leaves the booking, client and ledger untouched"""
+        import server
+
+        async def fail(*args, **kwargs):
+            raise RuntimeError("crash after the ledger writes")
+        
+        monkeypatch.setattr(server, "record_transaction", fail)
+
+        async def run():
+            db = mongo_db()
+            if not await supports_transactions(db):
+                return None
+            await _seed(db)
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                with pytest.raises(RuntimeError):
+                    await http.put("/api/bookings/booking-1/no-show")
+            
+            state = (
+                (await db.bookings.find_one({"id": "booking-1"}))['status'],
+                (await db.clients.find_one({"id": "client-1"}))['no_shows'],
+                await db.transactions.count_documents({}),
+                await db.notifications.count_documents({}),
+            )
+            return state
+        
+        state = asyncio.run(run())
+        if state is None:
+            pytest.skip("Transactions need a replica set")
+        
+        assert state == ("confirmed", 0, 0, 0)
+        print("✅ Partial no-show rolled back")
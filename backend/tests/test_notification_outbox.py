@@ -0,0 +1,157 @@
+"""
+Notification Outbox Tests
+Tests for:
+- Booking latency does not depend on notifier latency
+- Workers drain queued jobs through the registered transport
+- Failing jobs are retried with backoff and dead-lettered, including
+  services that report failure by returning None
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+NOTIFIER_DELAY_SECONDS = 1.0
+
+
+class StubTransport:
+    """Records sends and takes NOTIFIER_DELAY_SECONDS per call"""
+
+    def __init__(self, delay=NOTIFIER_DELAY_SECONDS, fail=False, result=True):
+        self.delay = delay
+        self.fail = fail
+        self.result = result
+        self.calls = []
+
+    def handler(self, kind):
+        async def send(**payload):
+            await asyncio.sleep(self.delay)
+            self.calls.append(kind)
+            if self.fail:
+                raise RuntimeError("stub transport down")
+            return self.result
+        return send
+
+
+async def _wait_for(predicate, timeout=15):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if await predicate():
+            return True
+        await asyncio.sleep(0.1)
+    return False
+
+
+async def _all_sent(db):
+    return await db.notifications.count_documents({"status": {"$ne": "sent"}}) == 0
+
+
+class TestNotificationOutbox:
+    """Notifications are sent off the request path"""
+
+    def test_booking_latency_independent_of_notifier(self, mongo_db):
+        """Creating a booking returns long before the notifier would"""
+        import server
+        from notification_outbox import notification_outbox
+
+        stub = StubTransport()
+        original_handlers = dict(notification_outbox.handlers)
+        for kind in original_handlers:
+            notification_outbox.register(kind, stub.handler(kind))
+
+        slot = (datetime.utcnow() + timedelta(days=2)).replace(hour=11, minute=0, second=0, microsecond=0)
+
+        async def run():
+            db = mongo_db()
+            await db.masters.insert_one({"id": "m1", "email": "m@slotta.app", "name": "Master", "booking_slug": "m1", "telegram_chat_id": "42"})
+            await db.services.insert_one({"id": "s1", "master_id": "m1", "name": "Nails", "duration_minutes": 45, "price": 40.0, "active": True})
+
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                started = time.perf_counter()
+                response = await http.post("/api/bookings/with-payment", json={
+                    "master_id": "m1",
+                    "service_id": "s1",
+                    "booking_date": slot.isoformat(),
+                    "client_name": "Client",
+                    "client_email": "client@slotta.app",
+                    "payment_method_id": "pm_card_visa"
+                })
+                latency = time.perf_counter() - started
+
+            queued = await db.notifications.count_documents({"status": "pending"})
+
+            await notification_outbox.start(db)
+            drained = await _wait_for(lambda: _all_sent(db))
+            await notification_outbox.stop()
+            return response.status_code, latency, queued, drained
+
+        try:
+            status_code, latency, queued, drained = asyncio.run(run())
+        finally:
+            notification_outbox.handlers = original_handlers
+
+        assert status_code == 200
+        assert queued == 3  # client email, master email, telegram
+        assert latency < NOTIFIER_DELAY_SECONDS
+        assert drained
+        assert sorted(stub.calls) == ["email.booking_confirmation", "email.master_new_booking", "telegram.new_booking_alert"]
+        print(f"✅ Booking latency {latency * 1000:.0f}ms with a {NOTIFIER_DELAY_SECONDS * 1000:.0f}ms notifier")
+
+    def test_failing_jobs_are_dead_lettered(self, mongo_db):
+        """A job that keeps failing is retried, then marked dead"""
+        from notification_outbox import NotificationOutbox
+
+        stub = StubTransport(delay=0, fail=True)
+        outbox = NotificationOutbox(workers=2, max_attempts=3, backoff_seconds=0.05)
+        outbox.register("email.test", stub.handler("email.test"))
+
+        async def run():
+            db = mongo_db()
+            await outbox.start(db)
+            job_id = await outbox.enqueue(db, "email.test", to_email="x@slotta.app")
+
+            async def dead():
+                job = await db.notifications.find_one({"id": job_id})
+                return job['status'] == "dead"
+
+            finished = await _wait_for(dead)
+            await outbox.stop()
+            job = await db.notifications.find_one({"id": job_id})
+            return finished, job
+
+        finished, job = asyncio.run(run())
+
+        assert finished
+        assert job['attempts'] == 3
+        assert job['last_error'] == "stub transport down"
+        assert len(stub.calls) == 3
+
+    def test_none_result_is_a_failure(self, mongo_db):
+        """A service that swallows its error and returns None is retried, not marked sent"""
+        from notification_outbox import NotificationOutbox
+
+        stub = StubTransport(delay=0, result=None)
+        outbox = NotificationOutbox(workers=1, max_attempts=2, backoff_seconds=0.05)
+        outbox.register("calendar.create_event", stub.handler("calendar.create_event"))
+
+        async def run():
+            db = mongo_db()
+            await outbox.start(db)
+            job_id = await outbox.enqueue(db, "calendar.create_event", summary="Cut")
+
+            async def dead():
+                job = await db.notifications.find_one({"id": job_id})
+                return job['status'] == "dead"
+
+            finished = await _wait_for(dead)
+            await outbox.stop()
+            return finished
+
+        assert asyncio.run(run())
+        assert len(stub.calls) == 2
+        print("✅ None result retried and dead-lettered")
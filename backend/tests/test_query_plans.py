@@ -0,0 +1,286 @@
+"""
+Query Plan Tests
+Tests for:
+- Every query the API and its background jobs send is served by an index
+  (no COLLSCAN stage in its winning plan) once db_indexes has run
+- Duplicate data blocking one unique index does not stop the other
+  indexes of that collection from being created
+
+The queries are not written out here: the endpoints, the daily summary
+job and the notification outbox are exercised in-process while a command
+listener records what they send, and each recorded read, update and
+delete is then explained. A new or changed query builder is checked as
+soon as an endpoint uses it.
+
+Runs against the local mongod from conftest.py.
+"""
+
+import asyncio
+import copy
+from datetime import datetime, timedelta
+
+import httpx
+from pymongo import MongoClient, monitoring
+
+from conftest import TEST_MONGO_URL
+
+NOW = datetime(2026, 1, 15, 12, 0)
+
+# Command fields that describe the query (session and cluster fields are dropped)
+QUERY_FIELDS = {
+    "find": ("find", "filter", "sort", "projection", "limit"),
+    "aggregate": ("aggregate", "pipeline"),
+    "findAndModify": ("findAndModify", "query", "sort", "update", "remove", "new", "fields", "upsert"),
+    "update": ("update", "updates"),
+    "delete": ("delete", "deletes"),
+}
+
+# Collections the exercised endpoints and jobs are expected to query
+QUERIED_COLLECTIONS = {
+    "masters", "clients", "services", "bookings", "transactions", "calendar_blocks",
+    "notifications", "slot_reservations", "master_stats", "master_stats_daily", "wallet_balances",
+    "daily_summary_runs",
+}
+
+
+class CommandRecorder(monitoring.CommandListener):
+    """Keeps the query commands sent to one database"""
+
+    def __init__(self, database):
+        self.database = database
+        self.commands = []
+
+    def started(self, event):
+        if event.database_name == self.database and event.command_name in QUERY_FIELDS:
+            self.commands.append((event.command_name, copy.deepcopy(dict(event.command))))
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def _explainable(name, command):
+    """One explain-able command per statement of a recorded command"""
+    
+    query = {field: command[field] for field in QUERY_FIELDS[name] if field in command}
+    if name == "aggregate":
+        if any("$indexStats" in stage for stage in query["pipeline"]):
+            return []
+        return [{**query, "cursor": {}}]
+    # explain takes a single update or delete statement
+    if name in ("update", "delete"):
+        statements = query.pop(name + "s")
+        return [{**query, name + "s": [statement]} for statement in statements]
+    return [query]
+
+
+def _stages(plan):
+    """All stage names anywhere in an explain document"""
+    
+    if isinstance(plan, dict):
+        for key, value in plan.items():
+            if key == 'stage':
+                yield value
+            else:
+                yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+def _winning_plans(explain):
+    """queryPlanner.winningPlan of a find, or of each $cursor stage"""
+    
+    if 'queryPlanner' in explain:
+        return [explain['queryPlanner']['winningPlan']]
+    plans = []
+    for stage in explain.get('stages', []):
+        if '$cursor' in stage:
+            plans.append(stage['$cursor']['queryPlanner']['winningPlan'])
+    for shard in explain.get('shards', {}).values():
+        plans.extend(_winning_plans(shard))
+    return plans
+
+
+async def _seed(db):
+    await db.masters.insert_many([
+        {"id": f"master-{i}", "email": f"m{i}@slotta.app", "name": f"Master {i}", "booking_slug": f"master-{i}"}
+        for i in range(5)
+    ])
+    await db.clients.insert_many([
+        {"id": f"client-{i}", "email": f"c{i}@slotta.app", "name": f"Client {i}"} for i in range(20)
+    ])
+    await db.services.insert_many([
+        {"id": f"service-{i}", "master_id": f"master-{i % 5}", "name": f"Service {i}", "duration_minutes": 60,
+         "price": 50.0, "active": True, "created_at": NOW + timedelta(minutes=i)}
+        for i in range(20)
+    ])
+    await db.bookings.insert_many([
+        {"id": f"booking-{i}", "master_id": f"master-{i % 5}", "client_id": f"client-{i % 20}",
+         "service_id": f"service-{i % 5}", "status": "confirmed", "booking_date": NOW + timedelta(hours=i),
+         "duration_minutes": 60, "service_price": 50.0, "slotta_amount": 10.0}
+        for i in range(100)
+    ])
+    await db.transactions.insert_many([
+        {"id": f"tx-{i}", "master_id": f"master-{i % 5}", "type": "wallet_credit", "amount": 10.0,
+         "description": "Credit", "created_at": NOW + timedelta(minutes=i)}
+        for i in range(50)
+    ])
+    await db.calendar_blocks.insert_many([
+        {"id": f"block-{i}", "master_id": f"master-{i % 5}", "start_datetime": NOW + timedelta(days=i),
+         "end_datetime": NOW + timedelta(days=i, hours=1)}
+        for i in range(20)
+    ])
+
+
+async def _get(http, path, **params):
+    response = await http.get(path, params=params)
+    assert response.status_code == 200, (path, response.text)
+    return response
+
+
+async def _walk_two_pages(http, path, **params):
+    """First page and the one after it, so the cursor filter is sent too"""
+    
+    response = await _get(http, path, limit=2, **params)
+    cursor = response.headers["X-Next-Cursor"]
+    await _get(http, path, limit=2, cursor=cursor, **params)
+
+
+async def _exercise(http, db):
+    """Reads, writes and jobs covering the API's query shapes"""
+    from daily_summaries import send_daily_summaries
+    from notification_outbox import notification_outbox
+    
+    await _get(http, "/api/masters/master-1")
+    await _get(http, "/api/masters/id/master-1")
+    assert (await http.post("/api/auth/login", json={"email": "m1@slotta.app", "password": "wrong"})).status_code == 401
+    
+    await _get(http, "/api/clients/client-1")
+    await _get(http, "/api/clients/email/c1@slotta.app")
+    assert (await http.post("/api/clients/batch-get", json={"ids": ["client-1", "client-2"]})).status_code == 200
+    await _walk_two_pages(http, "/api/clients/master/master-1")
+    
+    await _get(http, "/api/services/service-1")
+    await _walk_two_pages(http, "/api/services/master/master-1")
+    await _walk_two_pages(http, "/api/services/master/master-1", active_only="false")
+    
+    await _get(http, "/api/bookings/booking-1")
+    await _walk_two_pages(http, "/api/bookings/master/master-1")
+    await _walk_two_pages(http, "/api/bookings/master/master-1", status="confirmed")
+    await _walk_two_pages(http, "/api/bookings/client/client-1")
+    await _walk_two_pages(http, "/api/bookings/client/email/c1@slotta.app")
+    await _get(
+        http, "/api/availability/master-1", service_id="service-1",
+        **{"from": NOW.isoformat(), "to": (NOW + timedelta(days=7)).isoformat()}
+    )
+    
+    first = await _get(http, "/api/transactions/master/master-1", limit=2)
+    await _get(http, "/api/transactions/master/master-1", limit=2, cursor=first.json()['next_cursor'])
+    await _get(http, "/api/wallet/master/master-1")
+    
+    await _get(http, "/api/analytics/master/master-1")
+    await _get(http, "/api/analytics/master/master-1", **{"from": "2026-01-01T00:00:00", "to": "2026-02-01T00:00:00"})
+    await _get(http, "/api/analytics/master/master-1", by_service="true")
+    
+    await _walk_two_pages(http, "/api/calendar/blocks/master/master-1")
+    assert (await http.delete("/api/calendar/blocks/block-1")).status_code == 200
+    
+    assert (await http.put("/api/bookings/booking-1/cancel")).status_code == 200
+    assert (await http.put("/api/bookings/booking-6/complete")).status_code == 200
+
+    async def send(**summary):
+        return True
+    
+    await send_daily_summaries(db, send, day=NOW.date())
+    
+    original_handlers = dict(notification_outbox.handlers)
+    for kind in original_handlers:
+        notification_outbox.register(kind, send)
+    try:
+        await notification_outbox.start(db)
+        await asyncio.sleep(0.5)
+        await notification_outbox.stop()
+    finally:
+        notification_outbox.handlers = original_handlers
+
+
+class TestQueryPlans:
+    """Declared indexes cover the API's queries"""
+
+    def test_no_collection_scans(self, mongo_db, mongo_db_name, monkeypatch):
+        """No query sent by the endpoints or jobs falls back to a collection scan"""
+        import server
+        import master_stats
+        from db_indexes import ensure_indexes
+        
+        # Build rollups on first read so the bucket queries are sent too
+        monkeypatch.setattr(master_stats, "BUILD_SETTLE_SECONDS", 0)
+        recorder = CommandRecorder(mongo_db_name)
+
+        async def run():
+            db = mongo_db(event_listeners=[recorder])
+            ensured = await ensure_indexes(db)
+            await _seed(db)
+            recorder.commands.clear()
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                await _exercise(http, db)
+            return ensured
+        
+        ensured = asyncio.run(run())
+        
+        sync_client = MongoClient(TEST_MONGO_URL)
+        db = sync_client[mongo_db_name]
+        
+        explained, scans = 0, []
+        for name, command in recorder.commands:
+            for query in _explainable(name, command):
+                explain = db.command("explain", query, verbosity="queryPlanner")
+                explained += 1
+                if 'COLLSCAN' in set(_stages(_winning_plans(explain))):
+                    scans.append(query)
+        
+        sync_client.close()
+        
+        queried = {command[name] for name, command in recorder.commands}
+        assert QUERIED_COLLECTIONS <= queried, f"Not exercised: {QUERIED_COLLECTIONS - queried}"
+        assert not scans, f"Collection scans: {scans}"
+        print(f"✅ {explained} queries sent by the API use indexes ({len(ensured)} collections)")
+
+    def test_index_report(self, mongo_db):
+        """Nothing is missing after ensure_indexes"""
+        from db_indexes import ensure_indexes, index_report
+
+        async def run():
+            db = mongo_db()
+            await ensure_indexes(db)
+            return await index_report(db)
+        
+        report = asyncio.run(run())
+        
+        assert all(not r['missing'] for r in report.values())
+        assert report['bookings']['unused']
+        print(f"✅ Index report covers {len(report)} collections")
+
+    def test_dirty_field_keeps_other_indexes(self, mongo_db):
+        """A unique index that cannot be built only loses itself"""
+        from db_indexes import ensure_indexes
+
+        async def run():
+            db = mongo_db()
+            await db.masters.insert_many([
+                {"id": f"master-{i}", "email": "same@slotta.app", "booking_slug": f"master-{i}"} for i in range(2)
+            ])
+            ensured = await ensure_indexes(db)
+            return ensured, await db.masters.index_information()
+        
+        ensured, indexes = asyncio.run(run())
+        
+        assert "email_1" not in indexes
+        assert {"id_1", "booking_slug_1"} <= set(indexes)
+        assert ensured["masters"] == ["id_1", "booking_slug_1"]
+        print("✅ Duplicate emails only skip the email index")
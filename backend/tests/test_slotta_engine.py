@@ -0,0 +1,135 @@
+"""
+Slotta Engine Tests
+Tests for:
+- Vectorized batch pricing matches the scalar calculate_slotta
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from slotta_engine import SlottaEngine
+
+PRICES = [0.0, 9.99, 25.0, 33.33, 45.5, 60.0, 80.0, 99.95, 120.0, 250.0, 1234.56]
+DURATIONS = [15, 59, 60, 90, 180, 181, 240]
+RELIABILITIES = ['reliable', 'new', 'needs-protection', 'unknown']
+CANCELLATIONS = [0, 1, 2, 5]
+PEAK = [False, True]
+
+
+def _grid():
+    rows = list(itertools.product(PRICES, DURATIONS, RELIABILITIES, CANCELLATIONS, PEAK))
+    return pd.DataFrame(rows, columns=['price', 'duration_minutes', 'client_reliability', 'cancellations', 'is_peak_slot'])
+
+
+def _scalar(frame):
+    return [
+        SlottaEngine.calculate_slotta(
+            price=row.price,
+            duration_minutes=row.duration_minutes,
+            client_reliability=row.client_reliability,
+            cancellations=row.cancellations,
+            is_peak_slot=row.is_peak_slot
+        )
+        for row in frame.itertuples()
+    ]
+
+
+class TestCalculateSlottaBatch:
+    """Batch pricing parity with the scalar engine"""
+
+    def test_batch_matches_scalar_on_grid(self):
+        """Every combination of inputs prices identically"""
+        frame = _grid()
+        batch = SlottaEngine.calculate_slotta_batch(
+            frame['price'].to_numpy(),
+            frame['duration_minutes'].to_numpy(),
+            client_reliability=frame['client_reliability'].to_numpy(),
+            cancellations=frame['cancellations'].to_numpy(),
+            is_peak_slot=frame['is_peak_slot'].to_numpy()
+        )
+        assert batch.tolist() == _scalar(frame)
+        print(f"✅ Batch pricing matches scalar for {len(frame)} combinations")
+
+    def test_batch_matches_scalar_random_prices(self):
+        """Random cent prices hit the rounding edge cases"""
+        rng = np.random.default_rng(2025)
+        size = 20000
+        frame = pd.DataFrame({
+            'price': rng.integers(0, 100000, size) / 100,
+            'duration_minutes': rng.integers(10, 300, size),
+            'client_reliability': rng.choice(RELIABILITIES, size),
+            'no_shows': rng.integers(0, 4, size),
+            'cancellations': rng.integers(0, 4, size),
+            'is_peak_slot': rng.integers(0, 2, size).astype(bool),
+            'booking_lead_time_hours': rng.integers(0, 72, size)
+        })
+        batch = SlottaEngine.calculate_slotta_batch(frame)
+        assert isinstance(batch, pd.Series)
+        assert batch.tolist() == _scalar(frame)
+        print(f"✅ Batch pricing matches scalar for {size} random bookings")
+
+    def test_batch_defaults(self):
+        """Omitted arrays fall back to the scalar defaults"""
+        prices = np.array([50.0, 200.0])
+        durations = np.array([30, 240])
+        batch = SlottaEngine.calculate_slotta_batch(prices, durations)
+        expected = [SlottaEngine.calculate_slotta(p, d) for p, d in zip(prices, durations)]
+        assert batch.tolist() == expected
+
+
+class TestClientClassificationBatch:
+    """Batch risk score and reliability parity with the scalar engine"""
+
+    def test_risk_and_reliability_match_scalar(self):
+        """Every small history combination scores identically"""
+        combos = [
+            (total, no_shows, cancellations, lead)
+            for total in range(0, 12)
+            for no_shows in range(0, 4)
+            for cancellations in range(0, 4)
+            for lead in [None, 0, 1, 12, 23, 24, 48]
+        ]
+        totals, no_shows, cancellations, leads = zip(*combos)
+        lead_array = np.array([np.nan if lead is None else lead for lead in leads])
+
+        risk = SlottaEngine.calculate_risk_score_batch(totals, no_shows, cancellations, lead_array)
+        reliability = SlottaEngine.determine_reliability_batch(totals, no_shows)
+
+        assert risk.tolist() == [
+            SlottaEngine.calculate_risk_score(t, 0, n, c, lead) for t, n, c, lead in combos
+        ]
+        assert reliability.tolist() == [
+            SlottaEngine.determine_reliability(t, n) for t, n, _, _ in combos
+        ]
+        print(f"✅ Batch classification matches scalar for {len(combos)} histories")
+
+    def test_reclassification_only_touches_changed_clients(self):
+        """Clients whose stored tags are current produce no writes"""
+        from client_reclassification import build_reclassification_ops
+
+        chunk = [
+            {"_id": 1, "total_bookings": 5, "no_shows": 0, "cancellations": 0, "reliability": "reliable", "risk_score": 0},
+            {"_id": 2, "total_bookings": 4, "no_shows": 2, "cancellations": 0, "reliability": "new", "risk_score": 30},
+            {"_id": 3, "total_bookings": 0, "no_shows": 0, "cancellations": 0, "reliability": "new"}
+        ]
+        ops = build_reclassification_ops(chunk)
+
+        assert [op._filter["_id"] for op in ops] == [2, 3]
+        assert ops[0]._doc == {"$set": {"risk_score": 30, "reliability": "needs-protection"}}
+        assert ops[1]._doc == {"$set": {"risk_score": 50, "reliability": "new"}}
+
+    def test_reclassification_without_stored_tags(self):
+        """A chunk where no client has risk_score or reliability yet is written in full"""
+        from client_reclassification import build_reclassification_ops
+
+        chunk = [
+            {"_id": 1, "total_bookings": 5, "no_shows": 0, "cancellations": 0},
+            {"_id": 2, "total_bookings": 4, "no_shows": 2}
+        ]
+        ops = build_reclassification_ops(chunk)
+
+        assert [op._filter["_id"] for op in ops] == [1, 2]
+        assert ops[0]._doc == {"$set": {"risk_score": 0, "reliability": "reliable"}}
+        assert ops[1]._doc["$set"]["reliability"] == "needs-protection"
@@ -0,0 +1,120 @@
+"""
+Sparse Fieldset Tests
+Tests for:
+- fields= parsing, validation and the MongoDB projection it produces
+- batch_get returns documents in request order with one $in query
+- The API routes return only the selected fields, keep paging with them,
+  and batch-get resolves many ids in one request
+
+The API test runs in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from fast_json import trusted_rows
+from models import Booking, Client
+from sparse_fields import InvalidFieldsError, batch_get, parse_fields, projection
+
+
+class FakeCollection:
+    """find over a list of documents, recording each query"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        ids = query["id"]["$in"]
+        matches = [dict(d) for d in self.docs if d["id"] in ids]
+
+        class Cursor:
+            async def to_list(self, length):
+                return matches
+        return Cursor()
+
+
+class TestSparseFields:
+    """Field selection and batch reads"""
+
+    def test_parse_and_project(self):
+        """Fields come back in model order with id; unknown names are rejected"""
+        assert parse_fields(None, Booking) is None
+        assert parse_fields(" , ", Booking) is None
+        assert parse_fields("status, booking_date", Booking) == ["id", "booking_date", "status"]
+        
+        with pytest.raises(InvalidFieldsError, match="password_hash"):
+            parse_fields("name,password_hash", Client)
+        
+        assert projection(None) == {"_id": 0}
+        assert projection(["id", "status"], "booking_date") == {"_id": 0, "id": 1, "status": 1, "booking_date": 1}
+        print("✅ fields parsed and projected")
+
+    def test_trusted_rows_keep_selection(self):
+        """Only selected fields are sent; defaults are filled for those only"""
+        rows = trusted_rows(
+            [{"id": "client-1", "name": "Ann", "booking_date": datetime(2026, 1, 1)}],
+            Client,
+            ["id", "name", "reliability"]
+        )
+        assert rows == [{"id": "client-1", "name": "Ann", "reliability": "new"}]
+        print("✅ Rows trimmed to the selection")
+
+    def test_batch_get_order(self):
+        """One $in query, results in request order, unknown and repeated ids skipped"""
+        collection = FakeCollection([{"id": f"b{i}", "status": "confirmed"} for i in range(5)])
+        docs = asyncio.run(batch_get(collection, ["b3", "missing", "b1", "b3"], ["id", "status"]))
+        
+        assert [d["id"] for d in docs] == ["b3", "b1"]
+        assert collection.queries == [({"id": {"$in": ["b3", "missing", "b1"]}}, {"_id": 0, "id": 1, "status": 1})]
+        print("✅ batch_get in one query")
+
+    def test_api_fields_and_batch_get(self, mongo_db):
+        """Selected fields only, paging still works, batch-get in one call"""
+        import server
+        
+        start = datetime(2026, 3, 2, 9, 0)
+        bookings = [
+            Booking(
+                id=f"booking-{i}", master_id="master-1", client_id="client-1", service_id="service-1",
+                booking_date=start + timedelta(hours=i), status="confirmed", notes="long note " * 50
+            ).model_dump()
+            for i in range(5)
+        ]
+
+        async def run():
+            db = mongo_db()
+            await db.bookings.insert_many([dict(b) for b in bookings])
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                params = {"fields": "status", "limit": 3}
+                first = await http.get("/api/bookings/master/master-1", params=params)
+                params["cursor"] = first.headers["X-Next-Cursor"]
+                second = await http.get("/api/bookings/master/master-1", params=params)
+                single = await http.get("/api/bookings/booking-0", params={"fields": "notes"})
+                batch = await http.post(
+                    "/api/bookings/batch-get",
+                    params={"fields": "booking_date"},
+                    json={"ids": ["booking-4", "nope", "booking-0"]}
+                )
+                unknown = await http.get("/api/bookings/booking-0", params={"fields": "secret"})
+                too_many = await http.post("/api/bookings/batch-get", json={"ids": ["x"] * 101})
+            return first, second, single, batch, unknown, too_many
+        
+        first, second, single, batch, unknown, too_many = asyncio.run(run())
+        
+        assert first.json() == [{"id": f"booking-{i}", "status": "confirmed"} for i in (4, 3, 2)]
+        assert [b["id"] for b in second.json()] == ["booking-1", "booking-0"]
+        assert set(single.json()) == {"id", "notes"}
+        assert batch.json() == [
+            {"id": "booking-4", "booking_date": "2026-03-02T13:00:00"},
+            {"id": "booking-0", "booking_date": "2026-03-02T09:00:00"}
+        ]
+        assert unknown.status_code == 400
+        assert too_many.status_code == 422
+        print(f"✅ Sparse fields over the API: {len(first.content)} bytes for 3 bookings")
@@ -0,0 +1,178 @@
+"""
+State Transition Tests
+Tests for:
+- update_master, update_service, delete_service, mark_booking_complete and
+  mark_booking_no_show issue one write per document they change and no
+  extra reads
+- The reliability pipeline update agrees with SlottaEngine.determine_reliability
+- A no-show counts once towards reliability
+- Marking a booking twice is a 409, an unknown booking a 404
+- A cancelled booking cannot become a no-show, nor a no-show completed
+
+Runs the API in-process against the local mongod from conftest.py.
+"""
+
+import asyncio
+from datetime import datetime
+
+import httpx
+from pymongo import monitoring
+
+from slotta_engine import SlottaEngine
+from state_transitions import update_client_stats
+
+# Only the document collections the handlers read and write
+COLLECTIONS = {"masters", "services", "clients", "bookings"}
+
+EXPECTED_OPS = {
+    "update_master": {"masters": ["findAndModify"]},
+    "update_service": {"services": ["findAndModify"]},
+    "delete_service": {"services": ["findAndModify"]},
+    "complete": {"bookings": ["findAndModify"], "clients": ["findAndModify"]},
+    # The master read is for the notifications
+    "no_show": {"bookings": ["findAndModify"], "clients": ["findAndModify"], "masters": ["find"]},
+}
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Commands sent to the document collections of one database, by collection"""
+
+    def __init__(self, db_name):
+        self.db_name = db_name
+        self.commands = {}
+
+    def started(self, event):
+        collection = event.command.get(event.command_name)
+        if event.database_name == self.db_name and collection in COLLECTIONS:
+            self.commands.setdefault(collection, []).append(event.command_name)
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+async def _seed(db):
+    await db.masters.insert_one({"id": "master-1", "email": "m@slotta.app", "name": "Anna", "booking_slug": "anna"})
+    await db.services.insert_one({
+        "id": "service-1", "master_id": "master-1", "name": "Cut", "duration_minutes": 60,
+        "price": 80.0, "base_slotta": 20.0, "active": True
+    })
+    await db.clients.insert_one({
+        "id": "client-1", "email": "c@slotta.app", "name": "Client", "total_bookings": 3,
+        "completed_bookings": 1, "no_shows": 0, "cancellations": 0, "wallet_balance": 0.0, "reliability": "reliable"
+    })
+    await db.bookings.insert_many([
+        {
+            "id": f"booking-{i}", "master_id": "master-1", "client_id": "client-1", "service_id": "service-1",
+            "booking_date": datetime(2026, 4, 1, 9 + i), "status": "confirmed", "slotta_amount": 20.0
+        }
+        for i in range(2)
+    ])
+
+
+class TestStateTransitions:
+    """One round trip per state transition"""
+
+    def test_op_counts(self, mongo_db_name, mongo_db):
+        """Each handler sends exactly EXPECTED_OPS to the document collections"""
+        import server
+        from doc_cache import doc_cache
+        
+        counter = CommandCounter(mongo_db_name)
+
+        async def run():
+            db = mongo_db(event_listeners=[counter])
+            await _seed(db)
+            
+            calls = {
+                "update_master": ("put", "/api/masters/master-1", {"json": {"name": "Anna B."}}),
+                "update_service": ("put", "/api/services/service-1", {"json": {
+                    "master_id": "master-1", "name": "Long cut", "duration_minutes": 90, "price": 100.0
+                }}),
+                "delete_service": ("delete", "/api/services/service-1", {}),
+                "complete": ("put", "/api/bookings/booking-0/complete", {}),
+                "no_show": ("put", "/api/bookings/booking-1/no-show", {}),
+            }
+            ops, responses = {}, {}
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                for name, (method, url, kwargs) in calls.items():
+                    doc_cache.clear()
+                    counter.commands = {}
+                    responses[name] = await http.request(method, url, **kwargs)
+                    ops[name] = counter.commands
+                counter.commands = {}
+                again = await http.put("/api/bookings/booking-0/complete")
+                missing = await http.put("/api/bookings/nope/no-show")
+            client = await db.clients.find_one({"id": "client-1"}, {"_id": 0})
+            return ops, responses, again, missing, client
+        
+        ops, responses, again, missing, client = asyncio.run(run())
+        
+        assert all(r.status_code == 200 for r in responses.values()), {n: r.text for n, r in responses.items()}
+        assert responses["update_master"].json()['name'] == "Anna B."
+        assert responses["update_service"].json()['base_slotta'] == SlottaEngine.calculate_base_slotta(100.0, 90)
+        assert ops == EXPECTED_OPS
+        assert (again.status_code, missing.status_code) == (409, 404)
+        # One no-show out of three bookings is still reliable
+        assert (client['completed_bookings'], client['no_shows'], client['reliability']) == (2, 1, "reliable")
+        print(f"✅ One write per changed document: {ops}")
+
+    def test_reliability_expression_matches_engine(self, mongo_db):
+        """The $switch agrees with determine_reliability on a grid, including missing counters"""
+        grid = [(total, no_shows) for total in range(6) for no_shows in range(4) if no_shows <= total]
+
+        async def run():
+            db = mongo_db()
+            await db.clients.insert_many([
+                {"id": f"{total}-{no_shows}", "total_bookings": total, "no_shows": no_shows}
+                for total, no_shows in grid
+            ] + [{"id": "blank"}])
+            updated = {}
+            for total, no_shows in grid:
+                client = await update_client_stats(db, f"{total}-{no_shows}", {"cancellations": 1})
+                updated[(total, no_shows)] = client['reliability']
+            blank = await update_client_stats(db, "blank", {"no_shows": 1})
+            return updated, blank
+        
+        updated, blank = asyncio.run(run())
+        
+        assert updated == {key: SlottaEngine.determine_reliability(*key) for key in grid}
+        assert (blank['no_shows'], blank['reliability']) == (1, SlottaEngine.determine_reliability(0, 1))
+        print(f"✅ Pipeline reliability matches the engine on {len(grid)} cases")
+
+    def test_closed_bookings_do_not_transition(self, mongo_db):
+        """No-show after cancel and complete after no-show are 409s with no side effects"""
+        import server
+
+        async def run():
+            db = mongo_db()
+            await _seed(db)
+            await db.bookings.update_one({"id": "booking-1"}, {"$set": {"stripe_payment_intent_id": "pi_123"}})
+            
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                cancelled = await http.put("/api/bookings/booking-1/cancel")
+                no_show = await http.put("/api/bookings/booking-1/no-show")
+                assert (await http.put("/api/bookings/booking-0/no-show")).status_code == 200
+                completed = await http.put("/api/bookings/booking-0/complete")
+            
+            state = {
+                "statuses": [b['status'] async for b in db.bookings.find({}, {"status": 1}).sort("id", 1)],
+                "client": await db.clients.find_one({"id": "client-1"}, {"_id": 0}),
+                "captures": await db.notifications.count_documents({"kind": "stripe.capture_payment"}),
+                "transactions": await db.transactions.count_documents({"booking_id": "booking-1"}),
+            }
+            return cancelled, no_show, completed, state
+        
+        cancelled, no_show, completed, state = asyncio.run(run())
+        
+        assert cancelled.status_code == 200
+        assert (no_show.status_code, completed.status_code) == (409, 409)
+        assert no_show.json()['detail'] == "Booking is cancelled and cannot be marked no-show"
+        assert state['statuses'] == ["no-show", "cancelled"]
+        assert (state['client']['no_shows'], state['client']['completed_bookings'], state['client']['cancellations']) == (1, 1, 1)
+        assert (state['captures'], state['transactions']) == (0, 0)
+        print("✅ Closed bookings rejected without side effects")
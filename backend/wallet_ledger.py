@@ -0,0 +1,220 @@
+"""Master Wallet Ledger
+
+Keeps a running balance per master in wallet_balances so the wallet
+endpoint reads one document by _id instead of summing transactions:
+
+    {"_id": master_id, "balance": 42.5, "lifetime_credits": 60.0,
+     "payouts": 17.5, "pending_holds": 30.0}
+
+Transactions are inserted together with the $inc on their master's
+balance, inside one multi-document transaction where the deployment
+supports it (see mongo_transactions). pending_holds is the Slotta held
+on confirmed bookings and moves whenever a booking enters or leaves the
+confirmed status.
+
+A balance is built lazily like a master_stats rollup. The first read
+inserts a zero balance marked building, and reads compute the figures
+from raw data until the marker has settled. Then one read $incs the
+balance up to a recomputation. If a credit or hold change landed while
+it was recomputing, the build is abandoned and retried later. As with
+the rollups, a write that is in flight across that check can still be
+counted twice. check_wallets reports drift, can $inc drifted balances
+back to the recomputed figures, and is meant to run as a periodic job.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from master_stats import DRIFT_TOLERANCE, enum_value, settled_before
+
+logger = logging.getLogger(__name__)
+
+CREDIT_TYPES = ['wallet_credit', 'payout_received']
+DEBIT_TYPES = ['payout']
+HOLD_STATUS = 'confirmed'
+
+BALANCE_FIELDS = ('balance', 'lifetime_credits', 'payouts', 'pending_holds')
+
+
+def transaction_deltas(transactions: List[dict]) -> Dict[str, Dict[str, float]]:
+    """$inc per master for a batch of transactions"""
+    
+    deltas = defaultdict(lambda: defaultdict(float))
+    for transaction in transactions:
+        master_id = transaction.get('master_id')
+        kind = enum_value(transaction['type'])
+        if not master_id:
+            continue
+        if kind in CREDIT_TYPES:
+            deltas[master_id]['balance'] += transaction['amount']
+            deltas[master_id]['lifetime_credits'] += transaction['amount']
+        elif kind in DEBIT_TYPES:
+            deltas[master_id]['balance'] -= transaction['amount']
+            deltas[master_id]['payouts'] += transaction['amount']
+    return {master_id: dict(inc) for master_id, inc in deltas.items()}
+
+
+def hold_delta(old_status, new_status, amount: float) -> float:
+    """Change in pending holds when a booking moves between statuses"""
+    
+    was_held = enum_value(old_status) == HOLD_STATUS
+    is_held = enum_value(new_status) == HOLD_STATUS
+    return (amount or 0) * (int(is_held) - int(was_held))
+
+
+async def _inc(db, master_id: str, inc: Dict[str, float], session=None):
+    await db.wallet_balances.update_one(
+        {"_id": master_id},
+        {"$inc": inc, "$set": {"updated_at": datetime.utcnow()}},
+        session=session
+    )
+
+
+async def insert_transactions(db, transactions: List[dict], session=None):
+    """Insert transactions and apply them to the balances (within session if given)"""
+    
+    await db.transactions.insert_many(transactions, session=session)
+    for master_id, inc in transaction_deltas(transactions).items():
+        await _inc(db, master_id, inc, session)
+
+
+async def record_hold_change(db, master_id: str, old_status, new_status, amount: float, session=None):
+    """Move pending_holds for a booking entering or leaving confirmed"""
+    
+    delta = hold_delta(old_status, new_status, amount)
+    if delta:
+        await _inc(db, master_id, {"pending_holds": delta}, session)
+
+
+async def compute_balances(db, master_ids: Optional[List[str]] = None) -> Dict[str, dict]:
+    """Balances recomputed from transactions and confirmed bookings"""
+    
+    match = {"master_id": {"$in": master_ids} if master_ids is not None else {"$ne": None}}
+
+    def sum_if(types):
+        return {"$sum": {"$cond": [{"$in": ["$type", types]}, "$amount", 0]}}
+    
+    sums = await db.transactions.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$master_id", "credits": sum_if(CREDIT_TYPES), "payouts": sum_if(DEBIT_TYPES)}}
+    ], allowDiskUse=True).to_list(None)
+    
+    holds = await db.bookings.aggregate([
+        {"$match": {**match, "status": HOLD_STATUS}},
+        {"$group": {"_id": "$master_id", "pending": {"$sum": {"$ifNull": ["$slotta_amount", 0]}}}}
+    ], allowDiskUse=True).to_list(None)
+    
+    balances = defaultdict(lambda: {field: 0.0 for field in BALANCE_FIELDS})
+    for master_id in master_ids or []:
+        balances[master_id] = {field: 0.0 for field in BALANCE_FIELDS}
+    for row in sums:
+        balances[row['_id']].update({
+            "balance": row['credits'] - row['payouts'],
+            "lifetime_credits": row['credits'],
+            "payouts": row['payouts']
+        })
+    for row in holds:
+        balances[row['_id']]['pending_holds'] = row['pending']
+    return dict(balances)
+
+
+async def _adjust(db, master_id: str, stored: dict, actual: dict):
+    """$inc a balance from stored to actual, keeping deltas applied meanwhile"""
+    
+    inc = {
+        field: actual[field] - stored.get(field, 0)
+        for field in BALANCE_FIELDS
+        if actual[field] != stored.get(field, 0)
+    }
+    update = {"$set": {"updated_at": datetime.utcnow()}, "$unset": {"building": "", "building_since": ""}}
+    if inc:
+        update["$inc"] = inc
+    await db.wallet_balances.update_one({"_id": master_id}, update)
+
+
+def _figures(wallet: dict) -> dict:
+    return {field: wallet.get(field, 0) for field in BALANCE_FIELDS}
+
+
+async def _finish_build(db, master_id: str) -> bool:
+    """Claim a settled building balance and backfill it; False if not claimed or deltas landed meanwhile"""
+    
+    now = datetime.utcnow()
+    before = await db.wallet_balances.find_one_and_update(
+        {"_id": master_id, "building": True, "building_since": {"$lte": settled_before(now)}},
+        # Other readers wait another settle period before they try
+        {"$set": {"building_since": now}}
+    )
+    if before is None:
+        return False
+    
+    computed = (await compute_balances(db, [master_id]))[master_id]
+    after = await db.wallet_balances.find_one({"_id": master_id})
+    if _figures(before) != _figures(after):
+        return False
+    await _adjust(db, master_id, after, computed)
+    return True
+
+
+async def get_wallet_balance(db, master_id: str) -> dict:
+    """The master's balance document, computed from raw data until it is built"""
+    
+    wallet = await db.wallet_balances.find_one({"_id": master_id})
+    if wallet is not None and not wallet.get('building'):
+        return wallet
+    
+    if wallet is None:
+        now = datetime.utcnow()
+        try:
+            await db.wallet_balances.insert_one({
+                "_id": master_id, **{field: 0.0 for field in BALANCE_FIELDS},
+                "building": True, "building_since": now, "updated_at": now
+            })
+        except DuplicateKeyError:
+            pass
+    
+    if await _finish_build(db, master_id):
+        return await db.wallet_balances.find_one({"_id": master_id})
+    computed = (await compute_balances(db, [master_id]))[master_id]
+    return {"_id": master_id, **computed}
+
+
+async def check_wallets(db, master_ids: Optional[List[str]] = None, fix: bool = False) -> dict:
+    """Compare stored balances with a recomputation; optionally $inc drifted ones back to it
+    
+    Balances still building and not yet settled are skipped (reads compute
+    them from raw data).
+    """
+    
+    settled = settled_before(datetime.utcnow())
+    query = {"_id": {"$in": master_ids}} if master_ids is not None else {}
+    stored = {
+        w['_id']: w for w in await db.wallet_balances.find(query).to_list(None)
+        if not (w.get('building') and w.get('building_since', settled) > settled)
+    }
+    computed = await compute_balances(db, master_ids if master_ids is not None else list(stored))
+    
+    drifted = []
+    for master_id, wallet in stored.items():
+        actual = computed.get(master_id) or {field: 0.0 for field in BALANCE_FIELDS}
+        fields = {
+            field: {"stored": round(wallet.get(field, 0), 2), "actual": round(actual[field], 2)}
+            for field in BALANCE_FIELDS
+            if abs(wallet.get(field, 0) - actual[field]) > DRIFT_TOLERANCE
+        }
+        if not fields and not wallet.get('building'):
+            continue
+        if fields:
+            drifted.append({"master_id": master_id, "fields": fields})
+        if fix:
+            # Also finishes a build that was interrupted
+            await _adjust(db, master_id, wallet, actual)
+    
+    if drifted:
+        logger.warning(f"⚠️ Wallet drift for {len(drifted)} of {len(stored)} masters{' (fixed)' if fix else ''}")
+    logger.info(f"✅ Wallet consistency check: {len(stored)} balances checked")
+    return {"checked": len(stored), "drifted": drifted, "fixed": fix}
@@ -85,7 +85,8 @@ export const servicesAPI = {
   create: (data) => api.post('/services', data),
   update: (id, data) => api.put(`/services/${id}`, data),
   delete: (id) => api.delete(`/services/${id}`),
-  getById: (id) => api.get(`/services/${id}`),
+  getById: (id, fields) => api.get(`/services/${id}`, { params: { fields } }),
+  getMany: (ids, fields) => api.post('/services/batch-get', { ids }, { params: { fields } }),
   getByMaster: (masterId, activeOnly = false) => 
     api.get(`/services/master/${masterId}`, { params: { active_only: activeOnly } }),
 };
@@ -96,9 +97,10 @@ export const servicesAPI = {
 
 export const clientsAPI = {
   create: (data) => api.post('/clients', data),
-  getById: (id) => api.get(`/clients/${id}`),
+  getById: (id, fields) => api.get(`/clients/${id}`, { params: { fields } }),
+  getMany: (ids, fields) => api.post('/clients/batch-get', { ids }, { params: { fields } }),
   getByEmail: (email) => api.get(`/clients/email/${email}`),
-  getByMaster: (masterId) => api.get(`/clients/master/${masterId}`),
+  getByMaster: (masterId, fields) => api.get(`/clients/master/${masterId}`, { params: { fields } }),
 };
 
 // =============================================================================
@@ -108,11 +110,12 @@ export const clientsAPI = {
 export const bookingsAPI = {
   create: (data) => api.post('/bookings', data),
   createWithPayment: (data) => api.post('/bookings/with-payment', data),
-  getById: (id) => api.get(`/bookings/${id}`),
+  getById: (id, fields) => api.get(`/bookings/${id}`, { params: { fields } }),
+  getMany: (ids, fields) => api.post('/bookings/batch-get', { ids }, { params: { fields } }),
   getByMaster: (masterId, status = null) => 
     api.get(`/bookings/master/${masterId}`, { params: { status } }),
   getByClient: (clientId) => api.get(`/bookings/client/${clientId}`),
-  getByClientEmail: (email) => api.get(`/bookings/client/email/${email}`),
+  getByClientEmail: (email, params = {}) => api.get(`/bookings/client/email/${email}`, { params }),
   complete: (id) => api.put(`/bookings/${id}/complete`),
   noShow: (id) => api.put(`/bookings/${id}/no-show`),
   update: (id, data) => api.put(`/bookings/${id}`, data),
@@ -138,6 +141,15 @@ export const calendarAPI = {
   deleteBlock: (blockId) => api.delete(`/calendar/blocks/${blockId}`),
 };
 
+// =============================================================================
+// AVAILABILITY
+// =============================================================================
+
+export const availabilityAPI = {
+  getSlots: (masterId, serviceId, from, to) =>
+    api.get(`/availability/${masterId}`, { params: { service_id: serviceId, from, to } }),
+};
+
 // =============================================================================
 // GOOGLE CALENDAR
 // =============================================================================
@@ -156,7 +168,7 @@ export const googleCalendarAPI = {
 // =============================================================================
 
 export const analyticsAPI = {
-  getMasterAnalytics: (masterId) => api.get(`/analytics/master/${masterId}`),
+  getMasterAnalytics: (masterId, params = {}) => api.get(`/analytics/master/${masterId}`, { params }),
 };
 
 // =============================================================================
@@ -165,8 +177,8 @@ export const analyticsAPI = {
 
 export const walletAPI = {
   getWallet: (masterId) => api.get(`/wallet/master/${masterId}`),
-  getTransactions: (masterId, limit = 50, offset = 0) => 
-    api.get(`/transactions/master/${masterId}`, { params: { limit, offset } }),
+  getTransactions: (masterId, limit = 50, cursor = null) => 
+    api.get(`/transactions/master/${masterId}`, { params: { limit, cursor } }),
 };
 
 // =============================================================================
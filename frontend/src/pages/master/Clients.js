@@ -21,7 +21,10 @@ const Clients = () => {
   const loadClients = async () => {
     try {
       setLoading(true);
-      const response = await clientsAPI.getByMaster(masterId);
+      const response = await clientsAPI.getByMaster(
+        masterId,
+        'name,email,reliability,total_bookings,completed_bookings,no_shows,wallet_balance'
+      );
       setClients(response.data || []);
     } catch (error) {
       console.error('Failed to load clients:', error);